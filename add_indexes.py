@@ -0,0 +1,46 @@
+import os
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+if not DATABASE_URL:
+    print("Error: DATABASE_URL not found in environment variables.")
+    exit(1)
+
+# (nombre, tabla, columnas, condición del índice parcial o None)
+INDEXES = [
+    ("ix_pedido_estado_fechapedido", "pedidos", "estado, fecha_pedido", None),
+    ("ix_pedido_estado_fechalisto", "pedidos", "estado, fecha_listo_cocina", None),
+    ("ix_pedido_delivery_estado", "pedidos", "delivery_asignado_id, estado",
+     "delivery_asignado_id IS NOT NULL"),
+    ("ix_pedido_usuario_fecha", "pedidos", "usuario_id, fecha_pedido", None),
+    ("ix_pedido_item_pedido", "pedido_items", "pedido_id", None),
+    ("ix_usuario_rol_zona", "usuarios", "rol_id, zona_reparto_id", None),
+]
+
+def create_index_if_not_exists(engine, index_name, table_name, columns, where=None):
+    # CONCURRENTLY no bloquea escrituras en la tabla mientras se crea el
+    # índice, pero no puede correr dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        print(f"Creating index '{index_name}' on '{table_name}' ({columns})...")
+        create_query = text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {table_name} ({columns})"
+            + (f" WHERE {where}" if where else "") + ";")
+        connection.execute(create_query)
+        print(f"Index '{index_name}' ready.")
+
+def main():
+    print(f"Connecting to database...")
+    engine = create_engine(DATABASE_URL)
+
+    for index_name, table_name, columns, where in INDEXES:
+        create_index_if_not_exists(engine, index_name, table_name, columns, where)
+
+    print("Migration completed.")
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ class Settings(BaseSettings):
     CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024  # 10 MB por imagen
 
     # Aplicación
     APP_NAME: str = "Solandre API"
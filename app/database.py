@@ -13,7 +13,13 @@ engine = create_engine(
 )
 
 # Crear la sesión
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    # Los objetos siguen válidos tras commit (evita un SELECT extra por refresh)
+    expire_on_commit=False,
+    bind=engine
+)
 
 # Dependency para obtener la sesión de base de datos
 
@@ -24,3 +30,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency para los endpoints que abren su propia sesión (por ejemplo, las
+# respuestas en streaming, que terminan después de cerrar la del request).
+# Los tests la reemplazan igual que a get_db
+
+
+def get_session_factory():
+    return SessionLocal
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import time
 from app.config import settings
 from app.routers.role import router as role_router
@@ -13,13 +13,17 @@ from app.routers.admin import router as admin_router
 from app.routers.notificaciones import router as notificaciones_router
 from app.routers.health import router as health_router
 from app.routers.upload import router as upload_router
-from app.utils.logger import logger, log_request, log_error
+from app.utils.logger import logger, log_request, log_error, iniciar_logging, detener_logging
+from app.utils.token_generator import cargar_tokens_activos
+from app.database import SessionLocal
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="API para el sistema de pedidos de Solandre",
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
+    # orjson serializa listas grandes (datetime, Decimal) mucho más rápido
+    default_response_class=ORJSONResponse,
     contact={
         "name": "Solandre Team",
         "email": "soporte@solandre.com",
@@ -33,6 +37,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Headers propios que el frontend necesita leer (paginación y caché)
+    expose_headers=["X-Has-More", "ETag"],
 )
 
 
@@ -80,15 +86,26 @@ async def log_requests(request: Request, call_next):
 @app.on_event("startup")
 async def startup_event():
     """Se ejecuta al iniciar la aplicación"""
+    iniciar_logging()
     logger.info("🚀 Iniciando Solandre API...")
     logger.info(f"📌 Versión: {settings.APP_VERSION}")
     logger.info(f"🔧 Modo: {'Desarrollo' if settings.DEBUG else 'Producción'}")
 
+    # Si falla, los tokens de pedido se siguen verificando en la base de datos
+    db = SessionLocal()
+    try:
+        cargar_tokens_activos(db)
+    except Exception as e:
+        log_error(e, "Cargando tokens de pedidos")
+    finally:
+        db.close()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Se ejecuta al apagar la aplicación"""
     logger.info("🛑 Apagando Solandre API...")
+    detener_logging()
 
 
 # Incluir routers
@@ -1,4 +1,8 @@
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Relationship
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.models.ingrediente import Ingrediente
 
 
 class ItemExclusion(SQLModel, table=True):
@@ -8,3 +12,7 @@ class ItemExclusion(SQLModel, table=True):
                          primary_key=True, ondelete="CASCADE")
     ingrediente_id: int = Field(
         foreign_key="ingredientes.ingrediente_id", primary_key=True)
+
+    # Relación de solo lectura (para carga anticipada con joinedload)
+    ingrediente: Optional["Ingrediente"] = Relationship(
+        sa_relationship_kwargs={"viewonly": True})
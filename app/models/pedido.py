@@ -1,13 +1,30 @@
-from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import Enum as SQLAEnum
-from typing import Optional
+from sqlmodel import SQLModel, Field, Column, Relationship
+from sqlalchemy import Enum as SQLAEnum, Index, text
+from typing import List, Optional, TYPE_CHECKING
 from decimal import Decimal
 from datetime import datetime
 from app.models.enums import EstadoDelPedido, MetodoPago
 
+if TYPE_CHECKING:
+    from app.models.pedido_item import PedidoItem
+
 
 class Pedido(SQLModel, table=True):
     __tablename__ = "pedidos"
+    __table_args__ = (
+        # Cocina: pendientes por estado ordenados por fecha de pedido
+        Index("ix_pedido_estado_fechapedido", "estado", "fecha_pedido"),
+        # Cocina/Delivery: procesados por estado ordenados por fecha listo
+        Index("ix_pedido_estado_fechalisto", "estado", "fecha_listo_cocina"),
+        # Delivery: entregas asignadas filtradas por estado. Parcial: los
+        # pedidos sin delivery asignado no se buscan por esta columna
+        Index(
+            "ix_pedido_delivery_estado", "delivery_asignado_id", "estado",
+            postgresql_where=text("delivery_asignado_id IS NOT NULL")
+        ),
+        # Cliente: historial de sus pedidos ordenado por fecha
+        Index("ix_pedido_usuario_fecha", "usuario_id", "fecha_pedido"),
+    )
 
     pedido_id: Optional[int] = Field(default=None, primary_key=True)
     usuario_id: int = Field(foreign_key="usuarios.usuario_id", nullable=False)
@@ -34,6 +51,7 @@ class Pedido(SQLModel, table=True):
             )
         )
     )
+    # unique=True crea el índice que usa /pedidos/{token}/track
     token_recoger: str = Field(max_length=8, unique=True, nullable=False)
 
     # Dinero
@@ -64,3 +82,7 @@ class Pedido(SQLModel, table=True):
     fecha_listo_cocina: Optional[datetime] = Field(default=None)
     fecha_en_reparto: Optional[datetime] = Field(default=None)
     fecha_entrega: Optional[datetime] = Field(default=None)
+
+    # Relaciones de solo lectura (para carga anticipada con selectinload)
+    items: List["PedidoItem"] = Relationship(
+        sa_relationship_kwargs={"viewonly": True, "order_by": "PedidoItem.item_id"})
@@ -1,10 +1,18 @@
-from sqlmodel import SQLModel, Field
-from typing import Optional
+from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
+from typing import List, Optional, TYPE_CHECKING
 from decimal import Decimal
 
+if TYPE_CHECKING:
+    from app.models.menu_dia import MenuDia
+    from app.models.item_exclusion import ItemExclusion
+
 
 class PedidoItem(SQLModel, table=True):
     __tablename__ = "pedido_items"
+    __table_args__ = (
+        Index("ix_pedido_item_pedido", "pedido_id"),
+    )
 
     item_id: Optional[int] = Field(default=None, primary_key=True)
     pedido_id: int = Field(foreign_key="pedidos.pedido_id",
@@ -14,3 +22,9 @@ class PedidoItem(SQLModel, table=True):
     cantidad: int = Field(default=1, nullable=False)
     precio_unitario: Decimal = Field(
         nullable=False, max_digits=10, decimal_places=2)
+
+    # Relaciones de solo lectura (para carga anticipada con selectinload)
+    menu: Optional["MenuDia"] = Relationship(
+        sa_relationship_kwargs={"viewonly": True})
+    exclusiones: List["ItemExclusion"] = Relationship(
+        sa_relationship_kwargs={"viewonly": True})
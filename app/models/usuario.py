@@ -1,9 +1,14 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 
 
 class Usuario(SQLModel, table=True):
     __tablename__ = "usuarios"
+    __table_args__ = (
+        # Asignación automática: deliverys de una zona
+        Index("ix_usuario_rol_zona", "rol_id", "zona_reparto_id"),
+    )
 
     usuario_id: Optional[int] = Field(default=None, primary_key=True)
     rol_id: int = Field(foreign_key="roles.rol_id", nullable=False)
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import List, Optional
 from datetime import datetime, date
 
@@ -36,37 +35,37 @@ from app.schemas.admin import (
     PlatoDetalleResponse,
     IngredienteEnPlatoResponse
 )
-from app.utils.dependencies import get_current_user
+from app.schemas._fast import construir_respuesta, respuesta_json
+from app.utils.dependencies import invalidar_usuario, require_roles
 from app.utils.security import get_password_hash
+from app.utils.fechas import rango_del_dia
+from app.utils.dinero import sumar_montos
+from app.utils.cache_referencia import invalidar_zona, obtener_nombre_zona
+from app.utils.stock import restaurar_stock_pedido
 
 router = APIRouter(
     prefix="/admin",
     tags=["Administración"]
 )
-def verificar_admin(current_user: Usuario):
-    """Verifica que el usuario sea administrador"""
-    if current_user.rol_id != 1:  # 1 = Administrador
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo los administradores pueden acceder a esta sección"
-        )
+
+# Todas las rutas de admin verifican el rol con esta dependency. Usa la
+# cache de get_current_user y retorna el usuario por si el endpoint lo necesita
+solo_admin = require_roles(
+    1, detail="Solo los administradores pueden acceder a esta sección")
 
 
 # ========== GESTIÓN DE MENÚS DEL DÍA ==========
 
-@router.post("/menu", response_model=MenuResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/menu", response_model=MenuResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(solo_admin)])
 def crear_menu_dia(
     request: CrearMenuRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Crea la oferta del menú para un día específico.
     Define qué plato se ofrecerá, su stock y precios.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Verificar que los 3 platos existen
     plato_principal = db.query(Plato).filter(
         Plato.plato_id == request.plato_principal_id).first()
@@ -125,22 +124,19 @@ def crear_menu_dia(
     db.commit()
     db.refresh(nuevo_menu)
 
-    return MenuResponse.from_orm(nuevo_menu)
+    return MenuResponse.model_validate(nuevo_menu)
 
 
-@router.put("/menu/{menu_id}", response_model=MenuResponse)
+@router.put("/menu/{menu_id}", response_model=MenuResponse, dependencies=[Depends(solo_admin)])
 def actualizar_menu_dia(
     menu_id: int,
     request: ActualizarMenuRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Actualiza stock, precio o visibilidad de un menú existente.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el menú
     menu = db.query(MenuDia).filter(MenuDia.menu_dia_id == menu_id).first()
     if not menu:
@@ -165,10 +161,10 @@ def actualizar_menu_dia(
     db.commit()
     db.refresh(menu)
 
-    return MenuResponse.from_orm(menu)
+    return MenuResponse.model_validate(menu)
 
 
-@router.get("/menu", response_model=List[MenuResponse])
+@router.get("/menu", response_model=List[MenuResponse], dependencies=[Depends(solo_admin)])
 def listar_menus(
     fecha_inicio: Optional[date] = Query(
         None, description="Fecha inicio del filtro"),
@@ -176,16 +172,13 @@ def listar_menus(
         None, description="Fecha fin del filtro"),
     publicado: Optional[bool] = Query(
         None, description="Filtrar por publicado"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Lista todos los menús con filtros opcionales.
     Permite filtrar por rango de fechas y estado de publicación.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Construir query base
     query = db.query(MenuDia)
 
@@ -202,21 +195,18 @@ def listar_menus(
     # Ordenar por fecha
     menus = query.order_by(MenuDia.fecha.desc()).all()
 
-    return [MenuResponse.from_orm(menu) for menu in menus]
+    return [MenuResponse.model_validate(menu) for menu in menus]
 
 
-@router.delete("/menu/{menu_id}")
+@router.delete("/menu/{menu_id}", dependencies=[Depends(solo_admin)])
 def eliminar_menu(
     menu_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Elimina un menú si no tiene pedidos asociados.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el menú
     menu = db.query(MenuDia).filter(MenuDia.menu_dia_id == menu_id).first()
     if not menu:
@@ -246,19 +236,16 @@ def eliminar_menu(
 
 # ========== GESTIÓN DE PLATOS ==========
 
-@router.post("/platos", response_model=PlatoResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/platos", response_model=PlatoResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(solo_admin)])
 def crear_plato(
     request: CrearPlatoRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Crea un nuevo plato en el catálogo.
     Opcionalmente puede incluir la lista de ingredientes que lo componen.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Verificar que no exista un plato con el mismo nombre
     plato_existente = db.query(Plato).filter(
         Plato.nombre == request.nombre).first()
@@ -302,37 +289,31 @@ def crear_plato(
     db.commit()
     db.refresh(nuevo_plato)
 
-    return PlatoResponse.from_orm(nuevo_plato)
+    return PlatoResponse.model_validate(nuevo_plato)
 
 
-@router.get("/platos", response_model=List[PlatoResponse])
+@router.get("/platos", response_model=List[PlatoResponse], dependencies=[Depends(solo_admin)])
 def listar_platos(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Lista todos los platos del catálogo.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     platos = db.query(Plato).all()
     platos = db.query(Plato).all()
-    return [PlatoResponse.from_orm(p) for p in platos]
+    return [PlatoResponse.model_validate(p) for p in platos]
 
 
-@router.get("/platos/{plato_id}", response_model=PlatoDetalleResponse)
+@router.get("/platos/{plato_id}", response_model=PlatoDetalleResponse, dependencies=[Depends(solo_admin)])
 def obtener_plato(
     plato_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Obtiene el detalle completo de un plato, incluyendo ingredientes y cantidades.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     plato = db.query(Plato).filter(Plato.plato_id == plato_id).first()
     if not plato:
         raise HTTPException(
@@ -367,19 +348,16 @@ def obtener_plato(
     )
 
 
-@router.put("/platos/{plato_id}", response_model=PlatoResponse)
+@router.put("/platos/{plato_id}", response_model=PlatoResponse, dependencies=[Depends(solo_admin)])
 def actualizar_plato(
     plato_id: int,
     request: CrearPlatoRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Actualiza un plato existente.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el plato
     plato = db.query(Plato).filter(Plato.plato_id == plato_id).first()
     if not plato:
@@ -412,21 +390,18 @@ def actualizar_plato(
     db.commit()
     db.refresh(plato)
 
-    return PlatoResponse.from_orm(plato)
+    return PlatoResponse.model_validate(plato)
 
 
-@router.delete("/platos/{plato_id}")
+@router.delete("/platos/{plato_id}", dependencies=[Depends(solo_admin)])
 def eliminar_plato(
     plato_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Elimina un plato si no está en menús activos.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el plato
     plato = db.query(Plato).filter(Plato.plato_id == plato_id).first()
     if not plato:
@@ -456,19 +431,16 @@ def eliminar_plato(
 
 # ========== GESTIÓN DE INGREDIENTES ==========
 
-@router.post("/ingredientes", response_model=IngredienteResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/ingredientes", response_model=IngredienteResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(solo_admin)])
 def crear_ingrediente(
     request: CrearIngredienteRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Crea un nuevo ingrediente en el sistema.
     Define nombre, unidad de medida y stock inicial.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Verificar que no exista un ingrediente con el mismo nombre
     ingrediente_existente = db.query(Ingrediente).filter(
         Ingrediente.nombre == request.nombre
@@ -490,36 +462,30 @@ def crear_ingrediente(
     db.commit()
     db.refresh(nuevo_ingrediente)
 
-    return IngredienteResponse.from_orm(nuevo_ingrediente)
+    return IngredienteResponse.model_validate(nuevo_ingrediente)
 
 
-@router.get("/ingredientes", response_model=List[IngredienteResponse])
+@router.get("/ingredientes", response_model=List[IngredienteResponse], dependencies=[Depends(solo_admin)])
 def listar_ingredientes(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Lista todos los ingredientes con su stock.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     ingredientes = db.query(Ingrediente).all()
-    return [IngredienteResponse.from_orm(i) for i in ingredientes]
+    return [IngredienteResponse.model_validate(i) for i in ingredientes]
 
 
-@router.get("/ingredientes/{ingrediente_id}", response_model=IngredienteResponse)
+@router.get("/ingredientes/{ingrediente_id}", response_model=IngredienteResponse, dependencies=[Depends(solo_admin)])
 def obtener_ingrediente(
     ingrediente_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Obtiene los detalles de un ingrediente específico.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     ingrediente = db.query(Ingrediente).filter(
         Ingrediente.ingrediente_id == ingrediente_id
     ).first()
@@ -530,23 +496,20 @@ def obtener_ingrediente(
             detail="Ingrediente no encontrado"
         )
 
-    return IngredienteResponse.from_orm(ingrediente)
+    return IngredienteResponse.model_validate(ingrediente)
 
 
-@router.put("/ingredientes/{ingrediente_id}", response_model=IngredienteResponse)
+@router.put("/ingredientes/{ingrediente_id}", response_model=IngredienteResponse, dependencies=[Depends(solo_admin)])
 def actualizar_ingrediente(
     ingrediente_id: int,
     request: CrearIngredienteRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Actualiza un ingrediente existente.
     Permite actualizar stock, stock mínimo y unidad de medida.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el ingrediente
     ingrediente = db.query(Ingrediente).filter(
         Ingrediente.ingrediente_id == ingrediente_id
@@ -565,7 +528,7 @@ def actualizar_ingrediente(
     db.commit()
     db.refresh(ingrediente)
 
-    return IngredienteResponse.from_orm(ingrediente)
+    return IngredienteResponse.model_validate(ingrediente)
 
 
 
@@ -573,19 +536,16 @@ def actualizar_ingrediente(
 
 # ========== GESTIÓN DE PERSONAL ==========
 
-@router.post("/empleados", response_model=EmpleadoResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/empleados", response_model=EmpleadoResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(solo_admin)])
 def crear_empleado(
     request: CrearEmpleadoRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Crea un nuevo empleado con rol Cocina o Delivery.
     Si es Delivery, opcionalmente se puede asignar zona.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Validar que el rol sea Admin (1), Cocina (2) o Delivery (3)
     # No se permite crear clientes (4) desde este endpoint
     if request.rol_id not in [1, 2, 3]:
@@ -655,20 +615,17 @@ def crear_empleado(
     )
 
 
-@router.patch("/empleados/{empleado_id}/zona", response_model=EmpleadoResponse)
+@router.patch("/empleados/{empleado_id}/zona", response_model=EmpleadoResponse, dependencies=[Depends(solo_admin)])
 def asignar_zona_delivery(
     empleado_id: int,
     request: AsignarZonaRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Asigna una zona de reparto a un delivery.
     Permite reasignar deliveries a diferentes zonas (ej: Marcos a Miraflores).
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el empleado
     empleado = db.query(Usuario).filter(
         Usuario.usuario_id == empleado_id).first()
@@ -699,6 +656,7 @@ def asignar_zona_delivery(
     empleado.zona_reparto_id = request.zona_reparto_id
     db.commit()
     db.refresh(empleado)
+    invalidar_usuario(empleado.usuario_id)
 
     # Obtener rol
     rol = db.query(Role).filter(Role.rol_id == empleado.rol_id).first()
@@ -715,17 +673,14 @@ def asignar_zona_delivery(
     )
 
 
-@router.get("/empleados", response_model=List[EmpleadoResponse])
+@router.get("/empleados", response_model=List[EmpleadoResponse], dependencies=[Depends(solo_admin)])
 def listar_empleados(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Lista todos los empleados (Cocina y Delivery) con sus zonas asignadas.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Obtener empleados con rol Admin (1), Cocina (2) o Delivery (3)
     empleados = db.query(Usuario).filter(
         Usuario.rol_id.in_([1, 2, 3])
@@ -745,7 +700,7 @@ def listar_empleados(
             if zona:
                 zona_nombre = zona.nombre_zona
 
-        resultado.append(EmpleadoResponse(
+        resultado.append(EmpleadoResponse.model_construct(
             usuario_id=empleado.usuario_id,
             email=empleado.email,
             nombre_completo=empleado.nombre_completo,
@@ -759,19 +714,16 @@ def listar_empleados(
     return resultado
 
 
-@router.put("/empleados/{empleado_id}", response_model=EmpleadoResponse)
+@router.put("/empleados/{empleado_id}", response_model=EmpleadoResponse, dependencies=[Depends(solo_admin)])
 def actualizar_empleado(
     empleado_id: int,
     request: CrearEmpleadoRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Actualiza datos de un empleado.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar empleado
     empleado = db.query(Usuario).filter(
         Usuario.usuario_id == empleado_id).first()
@@ -802,6 +754,7 @@ def actualizar_empleado(
 
     db.commit()
     db.refresh(empleado)
+    invalidar_usuario(empleado.usuario_id)
 
     # Obtener rol y zona
     rol = db.query(Role).filter(Role.rol_id == empleado.rol_id).first()
@@ -829,14 +782,12 @@ def actualizar_empleado(
 def desactivar_empleado(
     empleado_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Usuario = Depends(solo_admin)
 ):
     """
     Desactiva (elimina) un empleado.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar empleado
     empleado = db.query(Usuario).filter(
         Usuario.usuario_id == empleado_id).first()
@@ -881,37 +832,69 @@ def desactivar_empleado(
     # Eliminar
     db.delete(empleado)
     db.commit()
+    invalidar_usuario(empleado_id)
 
     return {"message": "Empleado desactivado exitosamente", "usuario_id": empleado_id}
 
 
-@router.get("/clientes", response_model=List[ClienteResponse])
+@router.get("/clientes", response_model=List[ClienteResponse], dependencies=[Depends(solo_admin)])
 def listar_clientes(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Lista todos los clientes registrados (Rol 4).
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     clientes = db.query(Usuario).filter(Usuario.rol_id == 4).all()
-    return [ClienteResponse.from_orm(c) for c in clientes]
+    return [ClienteResponse.model_validate(c) for c in clientes]
 
 
-@router.get("/clientes/{cliente_id}/historial", response_model=List[PedidoDashboardResponse])
+def _filas_dashboard(db: Session, pedidos: List[Pedido]) -> List[PedidoDashboardResponse]:
+    """
+    Construye las filas del dashboard de pedidos.
+    Clientes y deliveries se cargan en una sola consulta y los nombres de
+    zona salen de la cache; los campos propios del pedido se copian con
+    construir_respuesta.
+    """
+    usuarios_ids = {p.usuario_id for p in pedidos}
+    usuarios_ids.update(
+        p.delivery_asignado_id for p in pedidos if p.delivery_asignado_id)
+    usuarios = {
+        u.usuario_id: u
+        for u in db.query(
+            Usuario.usuario_id, Usuario.nombre_completo, Usuario.email, Usuario.telefono
+        ).filter(Usuario.usuario_id.in_(usuarios_ids))
+    } if usuarios_ids else {}
+
+    zonas = {
+        zona_id: obtener_nombre_zona(db, zona_id) or "N/A"
+        for zona_id in {p.zona_id for p in pedidos}
+    }
+
+    resultado = []
+    for pedido in pedidos:
+        cliente = usuarios.get(pedido.usuario_id)
+        delivery = usuarios.get(pedido.delivery_asignado_id)
+        resultado.append(construir_respuesta(
+            PedidoDashboardResponse, pedido,
+            cliente_nombre=cliente.nombre_completo if cliente else "Desconocido",
+            cliente_email=cliente.email if cliente else "N/A",
+            cliente_telefono=cliente.telefono if cliente else "N/A",
+            zona_nombre=zonas[pedido.zona_id],
+            delivery_nombre=delivery.nombre_completo if delivery else None
+        ))
+    return resultado
+
+
+@router.get("/clientes/{cliente_id}/historial", response_model=List[PedidoDashboardResponse], dependencies=[Depends(solo_admin)])
 def historial_cliente(
     cliente_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Obtiene el historial de pedidos de un cliente específico.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Verificar que el cliente existe
     cliente = db.query(Usuario).filter(Usuario.usuario_id == cliente_id).first()
     if not cliente:
@@ -925,44 +908,12 @@ def historial_cliente(
         Pedido.usuario_id == cliente_id
     ).order_by(Pedido.fecha_pedido.desc()).all()
 
-    resultado = []
-    for pedido in pedidos:
-        # Obtener zona
-        zona = db.query(ZonaDelivery).filter(
-            ZonaDelivery.zona_id == pedido.zona_id).first()
-
-        # Obtener delivery si está asignado
-        delivery_nombre = None
-        if pedido.delivery_asignado_id:
-            delivery = db.query(Usuario).filter(
-                Usuario.usuario_id == pedido.delivery_asignado_id
-            ).first()
-            if delivery:
-                delivery_nombre = delivery.nombre_completo
-
-        resultado.append(PedidoDashboardResponse(
-            pedido_id=pedido.pedido_id,
-            token_recoger=pedido.token_recoger,
-            estado=pedido.estado,
-            cliente_nombre=cliente.nombre_completo,
-            cliente_email=cliente.email,
-            cliente_telefono=cliente.telefono,
-            zona_nombre=zona.nombre_zona if zona else "N/A",
-            delivery_nombre=delivery_nombre,
-            total_pedido=pedido.total_pedido,
-            fecha_pedido=pedido.fecha_pedido,
-            fecha_confirmado=pedido.fecha_confirmado,
-            fecha_listo_cocina=pedido.fecha_listo_cocina,
-            fecha_en_reparto=pedido.fecha_en_reparto,
-            fecha_entrega=pedido.fecha_entrega
-        ))
-
-    return resultado
+    return respuesta_json(_filas_dashboard(db, pedidos))
 
 
 # ========== GESTIÓN DE PEDIDOS Y MÉTRICAS ==========
 
-@router.get("/pedidos", response_model=List[PedidoDashboardResponse])
+@router.get("/pedidos", response_model=List[PedidoDashboardResponse], dependencies=[Depends(solo_admin)])
 def obtener_dashboard_pedidos(
     fecha_inicio: Optional[date] = Query(
         None, description="Fecha inicio del filtro"),
@@ -971,25 +922,23 @@ def obtener_dashboard_pedidos(
     estado: Optional[EstadoDelPedido] = Query(
         None, description="Filtrar por estado"),
     zona_id: Optional[int] = Query(None, description="Filtrar por zona"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Dashboard global de pedidos con filtros.
     Permite filtrar por fecha, estado y zona.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Construir query base
     query = db.query(Pedido)
 
     # Aplicar filtros
     if fecha_inicio:
-        query = query.filter(func.date(Pedido.fecha_pedido) >= fecha_inicio)
+        query = query.filter(
+            Pedido.fecha_pedido >= rango_del_dia(fecha_inicio)[0])
 
     if fecha_fin:
-        query = query.filter(func.date(Pedido.fecha_pedido) <= fecha_fin)
+        query = query.filter(Pedido.fecha_pedido < rango_del_dia(fecha_fin)[1])
 
     if estado:
         query = query.filter(Pedido.estado == estado)
@@ -1000,58 +949,19 @@ def obtener_dashboard_pedidos(
     # Ordenar por fecha descendente
     pedidos = query.order_by(Pedido.fecha_pedido.desc()).all()
 
-    resultado = []
-    for pedido in pedidos:
-        # Obtener cliente
-        cliente = db.query(Usuario).filter(
-            Usuario.usuario_id == pedido.usuario_id).first()
+    return respuesta_json(_filas_dashboard(db, pedidos))
 
-        # Obtener zona
-        zona = db.query(ZonaDelivery).filter(
-            ZonaDelivery.zona_id == pedido.zona_id).first()
 
-        # Obtener delivery si está asignado
-        delivery_nombre = None
-        if pedido.delivery_asignado_id:
-            delivery = db.query(Usuario).filter(
-                Usuario.usuario_id == pedido.delivery_asignado_id
-            ).first()
-            if delivery:
-                delivery_nombre = delivery.nombre_completo
-
-        resultado.append(PedidoDashboardResponse(
-            pedido_id=pedido.pedido_id,
-            token_recoger=pedido.token_recoger,
-            estado=pedido.estado,
-            cliente_nombre=cliente.nombre_completo if cliente else "Desconocido",
-            cliente_email=cliente.email if cliente else "N/A",
-            cliente_telefono=cliente.telefono if cliente else "N/A",
-            zona_nombre=zona.nombre_zona if zona else "N/A",
-            delivery_nombre=delivery_nombre,
-            total_pedido=pedido.total_pedido,
-            fecha_pedido=pedido.fecha_pedido,
-            fecha_confirmado=pedido.fecha_confirmado,
-            fecha_listo_cocina=pedido.fecha_listo_cocina,
-            fecha_en_reparto=pedido.fecha_en_reparto,
-            fecha_entrega=pedido.fecha_entrega
-        ))
-
-    return resultado
-
-
-@router.patch("/pedidos/{pedido_id}/confirmar", response_model=PedidoDashboardResponse)
+@router.patch("/pedidos/{pedido_id}/confirmar", response_model=PedidoDashboardResponse, dependencies=[Depends(solo_admin)])
 def confirmar_pedido(
     pedido_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Valida y confirma un pedido.
     Cambia el estado a 'Confirmado' y actualiza fecha_confirmado.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el pedido
     pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
     if not pedido:
@@ -1106,20 +1016,17 @@ def confirmar_pedido(
     )
 
 
-@router.patch("/pedidos/{pedido_id}/reasignar", response_model=PedidoDashboardResponse)
+@router.patch("/pedidos/{pedido_id}/reasignar", response_model=PedidoDashboardResponse, dependencies=[Depends(solo_admin)])
 def reasignar_delivery(
     pedido_id: int,
     request: ReasignarDeliveryRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Reasigna un pedido a otro delivery.
     Caso de emergencia: si Marcos se enferma, asignar a otro delivery.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el pedido
     pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
     if not pedido:
@@ -1180,12 +1087,11 @@ def reasignar_delivery(
     )
 
 
-@router.patch("/pedidos/{pedido_id}/estado", response_model=PedidoDashboardResponse)
+@router.patch("/pedidos/{pedido_id}/estado", response_model=PedidoDashboardResponse, dependencies=[Depends(solo_admin)])
 def actualizar_estado_pedido(
     pedido_id: int,
     request: ActualizarEstadoPedidoRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Actualiza manualmente el estado de un pedido.
@@ -1193,8 +1099,6 @@ def actualizar_estado_pedido(
     Si se cancela, restaura el stock.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el pedido
     pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
     if not pedido:
@@ -1213,15 +1117,7 @@ def actualizar_estado_pedido(
     # Si se cancela, restaurar stock (si no estaba ya cancelado)
     elif nuevo_estado == EstadoDelPedido.CANCELADO:
         if pedido.estado != EstadoDelPedido.CANCELADO:
-            from app.models.pedido_item import PedidoItem
-            items = db.query(PedidoItem).filter(
-                PedidoItem.pedido_id == pedido_id).all()
-
-            for item in items:
-                menu = db.query(MenuDia).filter(
-                    MenuDia.menu_dia_id == item.menu_dia_id).first()
-                if menu:
-                    menu.cantidad_disponible += item.cantidad
+            restaurar_stock_pedido(db, pedido_id)
     
     # Actualizar fechas según el estado
     if nuevo_estado == EstadoDelPedido.CONFIRMADO:
@@ -1271,27 +1167,27 @@ def actualizar_estado_pedido(
     )
 
 
-@router.get("/kpis", response_model=KPIsResponse)
+@router.get("/kpis", response_model=KPIsResponse, dependencies=[Depends(solo_admin)])
 def obtener_kpis(
     fecha: Optional[date] = Query(
         None, description="Fecha para el reporte (default: hoy)"),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Obtiene KPIs y métricas del día.
     Incluye: tiempos promedio, ventas, distribución por estado y método de pago.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Si no se proporciona fecha, usar hoy
     if not fecha:
         fecha = date.today()
 
+    inicio_dia, fin_dia = rango_del_dia(fecha)
+
     # Obtener pedidos del día
     pedidos = db.query(Pedido).filter(
-        func.date(Pedido.fecha_pedido) == fecha
+        Pedido.fecha_pedido >= inicio_dia,
+        Pedido.fecha_pedido < fin_dia
     ).all()
 
     total_pedidos = len(pedidos)
@@ -1303,7 +1199,7 @@ def obtener_kpis(
         pedidos_por_estado[estado.value] = count
 
     # Ventas totales
-    ventas_totales = sum(p.total_pedido for p in pedidos)
+    ventas_totales = sumar_montos(p.total_pedido for p in pedidos)
 
     # Ventas por método de pago (Deshabilitado por falta de campo en BD)
     ventas_por_metodo_pago = {}
@@ -1352,10 +1248,11 @@ def obtener_kpis(
     # Top 5 más rápidos y más lentos
     pedidos_ordenados = sorted(
         pedidos_con_tiempos, key=lambda x: x["minutos_total"])
-    pedidos_mas_rapidos = pedidos_ordenados[:5]
-    pedidos_mas_lentos = list(reversed(pedidos_ordenados))[:5]
+    pedidos_mas_rapidos = tuple(pedidos_ordenados[:5])
+    pedidos_mas_lentos = tuple(pedidos_ordenados[:-6:-1])
 
-    return KPIsResponse(
+    # Todos los valores se calculan acá con sus tipos finales
+    return KPIsResponse.model_construct(
         fecha=fecha,
         total_pedidos=total_pedidos,
         pedidos_por_estado=pedidos_por_estado,
@@ -1368,19 +1265,16 @@ def obtener_kpis(
     )
 
 
-@router.patch("/pedidos/{pedido_id}/cancelar")
+@router.patch("/pedidos/{pedido_id}/cancelar", dependencies=[Depends(solo_admin)])
 def cancelar_pedido_admin(
     pedido_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Cancela un pedido desde el panel de administración.
     Cambia el estado a 'Cancelado' y restaura el stock al menú.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el pedido
     pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
     if not pedido:
@@ -1403,15 +1297,7 @@ def cancelar_pedido_admin(
         )
 
     # Restaurar stock de los items
-    from app.models.pedido_item import PedidoItem
-    items = db.query(PedidoItem).filter(
-        PedidoItem.pedido_id == pedido_id).all()
-
-    for item in items:
-        menu = db.query(MenuDia).filter(
-            MenuDia.menu_dia_id == item.menu_dia_id).first()
-        if menu:
-            menu.cantidad_disponible += item.cantidad
+    restaurar_stock_pedido(db, pedido_id)
 
     # Cambiar estado a cancelado
     pedido.estado = EstadoDelPedido.CANCELADO
@@ -1425,19 +1311,16 @@ def cancelar_pedido_admin(
     }
 
 
-@router.get("/pedidos/{pedido_id}/detalle-completo")
+@router.get("/pedidos/{pedido_id}/detalle-completo", dependencies=[Depends(solo_admin)])
 def obtener_detalle_completo_pedido(
     pedido_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Obtiene el detalle completo de un pedido para análisis administrativo.
     Incluye items, exclusiones, información del cliente, delivery asignado, y todas las fechas.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar el pedido
     pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
     if not pedido:
@@ -1544,18 +1427,15 @@ def obtener_detalle_completo_pedido(
 
 # ========== GESTIÓN DE ZONAS DE DELIVERY ==========
 
-@router.post("/zonas", response_model=ZonaResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/zonas", response_model=ZonaResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(solo_admin)])
 def crear_zona(
     request: CrearZonaRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Crea una nueva zona de delivery.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Verificar que no exista una zona con ese nombre
     zona_existente = db.query(ZonaDelivery).filter(
         ZonaDelivery.nombre_zona == request.nombre_zona
@@ -1576,33 +1456,28 @@ def crear_zona(
     db.commit()
     db.refresh(nueva_zona)
 
-    return ZonaResponse.from_orm(nueva_zona)
+    return ZonaResponse.model_validate(nueva_zona)
 def listar_zonas(
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Usuario = Depends(solo_admin)
 ):
     """
     Lista todas las zonas de delivery.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     zonas = db.query(ZonaDelivery).order_by(ZonaDelivery.nombre_zona).all()
-    return [ZonaResponse.from_orm(z) for z in zonas]
+    return [ZonaResponse.model_validate(z) for z in zonas]
 
 
-@router.get("/zonas/{zona_id}", response_model=ZonaResponse)
+@router.get("/zonas/{zona_id}", response_model=ZonaResponse, dependencies=[Depends(solo_admin)])
 def obtener_zona(
     zona_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Obtiene una zona de delivery por ID.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     zona = db.query(ZonaDelivery).filter(
         ZonaDelivery.zona_id == zona_id).first()
     if not zona:
@@ -1611,22 +1486,19 @@ def obtener_zona(
             detail="Zona no encontrada"
         )
 
-    return ZonaResponse.from_orm(zona)
+    return ZonaResponse.model_validate(zona)
 
 
-@router.put("/zonas/{zona_id}", response_model=ZonaResponse)
+@router.put("/zonas/{zona_id}", response_model=ZonaResponse, dependencies=[Depends(solo_admin)])
 def actualizar_zona(
     zona_id: int,
     request: ActualizarZonaRequest,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Actualiza el nombre de una zona de delivery.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar la zona
     zona = db.query(ZonaDelivery).filter(
         ZonaDelivery.zona_id == zona_id).first()
@@ -1652,22 +1524,20 @@ def actualizar_zona(
     zona.nombre_zona = request.nombre_zona
     db.commit()
     db.refresh(zona)
+    invalidar_zona(zona_id)
 
-    return ZonaResponse.from_orm(zona)
+    return ZonaResponse.model_validate(zona)
 
 
-@router.delete("/zonas/{zona_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/zonas/{zona_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(solo_admin)])
 def eliminar_zona(
     zona_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: Session = Depends(get_db)
 ):
     """
     Elimina una zona de delivery si no tiene pedidos ni deliveries asignados.
     Solo administradores.
     """
-    verificar_admin(current_user)
-
     # Buscar la zona
     zona = db.query(ZonaDelivery).filter(
         ZonaDelivery.zona_id == zona_id).first()
@@ -1698,5 +1568,6 @@ def eliminar_zona(
     # Eliminar la zona
     db.delete(zona)
     db.commit()
+    invalidar_zona(zona_id)
 
     return None
@@ -12,7 +12,7 @@ from app.schemas.auth import (
     CambiarPasswordRequest
 )
 from app.utils.security import verify_password, get_password_hash, create_access_token
-from app.utils.dependencies import get_current_user
+from app.utils.dependencies import get_current_user, invalidar_usuario
 
 router = APIRouter(
     prefix="/auth",
@@ -164,6 +164,7 @@ def actualizar_perfil(
         current_user.telefono = request.telefono
 
     db.commit()
+    invalidar_usuario(current_user.usuario_id)
     db.refresh(current_user)
 
     # Obtener el rol del usuario
@@ -200,5 +201,6 @@ def cambiar_password(
     current_user.password_hash = get_password_hash(request.password_nueva)
 
     db.commit()
+    invalidar_usuario(current_user.usuario_id)
 
     return {"message": "Contraseña actualizada exitosamente"}
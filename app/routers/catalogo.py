@@ -17,6 +17,7 @@ from app.schemas.catalogo import (
     IngredienteResponse,
     MenuIngredientesResponse
 )
+from app.schemas._fast import respuesta_json
 
 router = APIRouter(
     prefix="/catalogo",
@@ -24,6 +25,18 @@ router = APIRouter(
 )
 
 
+def _plato_simple(plato: Optional[Plato]) -> Optional[PlatoSimpleResponse]:
+    """Datos del plato para anidar en la respuesta del menú (None si no hay)"""
+    if plato is None:
+        return None
+    return PlatoSimpleResponse(
+        plato_id=plato.plato_id,
+        nombre=plato.nombre,
+        descripcion=plato.descripcion,
+        tipo=plato.tipo
+    )
+
+
 @router.get("/zonas", response_model=List[ZonaResponse])
 def get_zonas(db: Session = Depends(get_db)):
     """
@@ -78,12 +91,12 @@ def listar_menus_publico(
             publicado=menu.publicado,
             info_nutricional=menu.info_nutricional,
             imagen_url=menu.imagen_url,
-            plato_principal=PlatoSimpleResponse.from_orm(plato_principal),
-            bebida=PlatoSimpleResponse.from_orm(bebida) if bebida else None,
-            postre=PlatoSimpleResponse.from_orm(postre) if postre else None
+            plato_principal=_plato_simple(plato_principal),
+            bebida=_plato_simple(bebida),
+            postre=_plato_simple(postre)
         ))
 
-    return resultado
+    return respuesta_json(resultado)
 
 
 @router.get("/menu-hoy", response_model=MenuDiaResponse)
@@ -125,9 +138,9 @@ def get_menu_hoy(db: Session = Depends(get_db)):
         cantidad_disponible=menu.cantidad_disponible,
         publicado=menu.publicado,
         info_nutricional=menu.info_nutricional,
-        plato_principal=PlatoSimpleResponse.from_orm(plato_principal),
-        bebida=PlatoSimpleResponse.from_orm(bebida) if bebida else None,
-        postre=PlatoSimpleResponse.from_orm(postre) if postre else None
+        plato_principal=_plato_simple(plato_principal),
+        bebida=_plato_simple(bebida),
+        postre=_plato_simple(postre)
     )
 
 
@@ -170,12 +183,12 @@ def get_menu_semanal(db: Session = Depends(get_db)):
             publicado=menu.publicado,
             info_nutricional=menu.info_nutricional,
             imagen_url=menu.imagen_url,
-            plato_principal=PlatoSimpleResponse.from_orm(plato_principal),
-            bebida=PlatoSimpleResponse.from_orm(bebida) if bebida else None,
-            postre=PlatoSimpleResponse.from_orm(postre) if postre else None
+            plato_principal=_plato_simple(plato_principal),
+            bebida=_plato_simple(bebida),
+            postre=_plato_simple(postre)
         ))
 
-    return resultado
+    return respuesta_json(resultado)
 
 
 @router.get("/menu/{menu_id}/ingredientes", response_model=MenuIngredientesResponse)
@@ -206,12 +219,12 @@ def get_menu_ingredientes(menu_id: int, db: Session = Depends(get_db)):
         ingrediente = db.query(Ingrediente).filter(
             Ingrediente.ingrediente_id == ing_id).first()
         if ingrediente:
-            ingredientes.append(IngredienteResponse.from_orm(ingrediente))
+            ingredientes.append(IngredienteResponse.model_validate(ingrediente))
 
     return MenuIngredientesResponse(
         menu_dia_id=menu.menu_dia_id,
         fecha=menu.fecha,
-        plato_principal=PlatoSimpleResponse.from_orm(plato_principal),
+        plato_principal=_plato_simple(plato_principal),
         ingredientes=ingredientes
     )
 
@@ -236,7 +249,7 @@ def get_platos(db: Session = Depends(get_db)):
             ingrediente = db.query(Ingrediente).filter(
                 Ingrediente.ingrediente_id == ing_id).first()
             if ingrediente:
-                ingredientes.append(IngredienteResponse.from_orm(ingrediente))
+                ingredientes.append(IngredienteResponse.model_validate(ingrediente))
         
         # Crear respuesta manual para incluir ingredientes
         plato_response = PlatoCompletoResponse(
@@ -289,7 +302,7 @@ def get_menu_por_fecha(fecha: date, db: Session = Depends(get_db)):
         publicado=menu.publicado,
         info_nutricional=menu.info_nutricional,
         imagen_url=menu.imagen_url,
-        plato_principal=PlatoSimpleResponse.from_orm(plato_principal),
-        bebida=PlatoSimpleResponse.from_orm(bebida) if bebida else None,
-        postre=PlatoSimpleResponse.from_orm(postre) if postre else None
+        plato_principal=_plato_simple(plato_principal),
+        bebida=_plato_simple(bebida),
+        postre=_plato_simple(postre)
     )
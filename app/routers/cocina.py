@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, load_only, sessionmaker
+from sqlalchemy import func, select
+from typing import Iterator, List, Optional
+from collections import defaultdict
 from datetime import datetime, date
 
-from app.database import get_db
+import orjson
+
+from app.database import get_db, get_session_factory
 from app.models.pedido import Pedido
 from app.models.pedido_item import PedidoItem
 from app.models.item_exclusion import ItemExclusion
@@ -15,11 +19,13 @@ from app.models.ingrediente import Ingrediente
 from app.models.enums import EstadoDelPedido
 from app.schemas.cocina import (
     PedidoCocinaResponse,
+    PedidoCocinaColumnasResponse,
     ItemCocina,
     CambiarEstadoCocinaRequest,
     EstadisticasCocinaResponse
 )
 from app.utils.dependencies import get_current_user
+from app.utils.fechas import rango_del_dia
 from app.utils.notificaciones import (
     notificar_cambio_estado,
     notificar_pedido_listo
@@ -30,111 +36,293 @@ router = APIRouter(
     tags=["Operaciones de Cocina"]
 )
 
+# Roles con acceso a cocina: 1=Admin, 2=Cocina
+_ROLES_COCINA = frozenset({1, 2})
+
+# Pedidos que cocina todavía debe preparar
+_ESTADOS_PENDIENTES = frozenset({
+    EstadoDelPedido.CONFIRMADO,
+    EstadoDelPedido.EN_COCINA
+})
+
+# Estados a los que cocina puede mover un pedido
+_ESTADOS_DESDE_COCINA = frozenset({
+    EstadoDelPedido.EN_COCINA,
+    EstadoDelPedido.LISTO_PARA_ENTREGA
+})
+
+# Pedidos que ya salieron de cocina
+_ESTADOS_PROCESADOS = frozenset({
+    EstadoDelPedido.LISTO_PARA_ENTREGA,
+    EstadoDelPedido.EN_REPARTO,
+    EstadoDelPedido.ENTREGADO
+})
+
+# Columnas de Pedido que usa la vista de cocina
+_COLUMNAS_PEDIDO_COCINA = (
+    Pedido.pedido_id,
+    Pedido.token_recoger,
+    Pedido.estado,
+    Pedido.fecha_pedido,
+    Pedido.usuario_id,
+    Pedido.delivery_asignado_id,
+    Pedido.fecha_listo_cocina
+)
 
-@router.get("/pendientes", response_model=List[PedidoCocinaResponse])
-def obtener_pedidos_pendientes(
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
-):
-    """
-    Lista todos los pedidos que están en Confirmado o En Cocina.
-    Muestra las exclusiones de ingredientes claramente para la cocina.
-    Requiere rol de Cocina o Administrador.
-    """
-    # Verificar que el usuario tenga el rol adecuado
-    if current_user.rol_id not in [1, 2]:  # 1=Admin, 2=Cocina
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permisos para acceder a esta sección"
-        )
-
-    # Obtener pedidos pendientes
-    pedidos = db.query(Pedido).filter(
-        Pedido.estado.in_([EstadoDelPedido.CONFIRMADO,
-                          EstadoDelPedido.EN_COCINA])
-    ).order_by(Pedido.fecha_pedido.asc()).all()
 
-    resultado = []
+def _items_en_columnas() -> dict:
+    return {
+        "item_ids": [],
+        "cantidades": [],
+        "menu_fechas": [],
+        "platos_principales": [],
+        "bebidas": [],
+        "postres": [],
+        "exclusiones": []
+    }
 
-    for pedido in pedidos:
-        # Obtener cliente
-        cliente = db.query(Usuario).filter(
-            Usuario.usuario_id == pedido.usuario_id
-        ).first()
 
-        # Obtener items del pedido
-        items_pedido = db.query(PedidoItem).filter(
-            PedidoItem.pedido_id == pedido.pedido_id
-        ).all()
+def _construir_pedidos_cocina(
+    db: Session,
+    pedidos: List[Pedido],
+    columnas: bool = False
+) -> list:
+    """
+    Construye la vista de cocina de una lista de pedidos.
+    Carga clientes, items, menús, platos y exclusiones con una consulta por
+    entidad (no por pedido) y seleccionando solo las columnas necesarias.
 
-        items_cocina = []
+    Con columnas=True retorna PedidoCocinaColumnasResponse (items como
+    listas paralelas) en lugar de PedidoCocinaResponse.
+    """
+    if not pedidos:
+        return []
+
+    # Clientes de los pedidos
+    clientes = {
+        c.usuario_id: c
+        for c in db.query(
+            Usuario.usuario_id, Usuario.nombre_completo, Usuario.telefono
+        ).filter(
+            Usuario.usuario_id.in_({p.usuario_id for p in pedidos})
+        )
+    }
+
+    # Items de todos los pedidos
+    items_pedido = db.query(
+        PedidoItem.item_id,
+        PedidoItem.pedido_id,
+        PedidoItem.menu_dia_id,
+        PedidoItem.cantidad
+    ).filter(
+        PedidoItem.pedido_id.in_([p.pedido_id for p in pedidos])
+    ).order_by(PedidoItem.item_id).all()
+
+    menus = {}
+    platos = {}
+    exclusiones = defaultdict(list)
+
+    if items_pedido:
+        # Menús de los items
+        menus = {
+            m.menu_dia_id: m
+            for m in db.query(
+                MenuDia.menu_dia_id,
+                MenuDia.fecha,
+                MenuDia.plato_principal_id,
+                MenuDia.bebida_id,
+                MenuDia.postre_id
+            ).filter(
+                MenuDia.menu_dia_id.in_({i.menu_dia_id for i in items_pedido})
+            )
+        }
+
+        # Nombres de los platos de esos menús
+        platos_ids = {
+            plato_id
+            for m in menus.values()
+            for plato_id in (m.plato_principal_id, m.bebida_id, m.postre_id)
+            if plato_id
+        }
+        if platos_ids:
+            platos = dict(db.query(Plato.plato_id, Plato.nombre).filter(
+                Plato.plato_id.in_(platos_ids)
+            ).all())
+
+        # Exclusiones con el nombre del ingrediente
+        for item_id, nombre in db.query(
+            ItemExclusion.item_id, Ingrediente.nombre
+        ).join(
+            Ingrediente, Ingrediente.ingrediente_id == ItemExclusion.ingrediente_id
+        ).filter(
+            ItemExclusion.item_id.in_([i.item_id for i in items_pedido])
+        ):
+            exclusiones[item_id].append(f"Sin {nombre}")
+
+    if columnas:
+        items_por_pedido = defaultdict(_items_en_columnas)
         for item in items_pedido:
-            # Obtener menú
-            menu = db.query(MenuDia).filter(
-                MenuDia.menu_dia_id == item.menu_dia_id
-            ).first()
+            menu = menus.get(item.menu_dia_id)
+            if not menu:
+                continue
 
+            cols = items_por_pedido[item.pedido_id]
+            cols["item_ids"].append(item.item_id)
+            cols["cantidades"].append(item.cantidad)
+            cols["menu_fechas"].append(menu.fecha)
+            cols["platos_principales"].append(
+                platos.get(menu.plato_principal_id, "N/A"))
+            cols["bebidas"].append(platos.get(menu.bebida_id, "N/A"))
+            cols["postres"].append(platos.get(menu.postre_id, "N/A"))
+            cols["exclusiones"].append(exclusiones.get(item.item_id, []))
+    else:
+        items_por_pedido = defaultdict(list)
+        for item in items_pedido:
+            menu = menus.get(item.menu_dia_id)
             if not menu:
                 continue
 
-            # Obtener platos del menú
-            plato_principal = db.query(Plato).filter(
-                Plato.plato_id == menu.plato_principal_id
-            ).first()
-            bebida = db.query(Plato).filter(
-                Plato.plato_id == menu.bebida_id
-            ).first()
-            postre = db.query(Plato).filter(
-                Plato.plato_id == menu.postre_id
-            ).first()
-
-            # Obtener exclusiones del item
-            exclusiones_ids = db.query(ItemExclusion).filter(
-                ItemExclusion.item_id == item.item_id
-            ).all()
-
-            exclusiones = []
-            for excl in exclusiones_ids:
-                ingrediente = db.query(Ingrediente).filter(
-                    Ingrediente.ingrediente_id == excl.ingrediente_id
-                ).first()
-                if ingrediente:
-                    exclusiones.append(f"Sin {ingrediente.nombre}")
-
-            items_cocina.append(ItemCocina(
+            items_por_pedido[item.pedido_id].append(ItemCocina(
                 item_id=item.item_id,
                 cantidad=item.cantidad,
                 menu_fecha=menu.fecha,
-                plato_principal=plato_principal.nombre if plato_principal else "N/A",
-                bebida=bebida.nombre if bebida else "N/A",
-                postre=postre.nombre if postre else "N/A",
-                exclusiones=exclusiones
+                plato_principal=platos.get(menu.plato_principal_id, "N/A"),
+                bebida=platos.get(menu.bebida_id, "N/A"),
+                postre=platos.get(menu.postre_id, "N/A"),
+                exclusiones=exclusiones.get(item.item_id, [])
             ))
 
+    ahora = datetime.now()
+    resultado = []
+
+    for pedido in pedidos:
+        cliente = clientes.get(pedido.usuario_id)
+
         # Calcular minutos desde el pedido
         minutos_desde_pedido = None
         if pedido.fecha_pedido:
-            delta = datetime.now() - pedido.fecha_pedido.replace(tzinfo=None)
+            delta = ahora - pedido.fecha_pedido.replace(tzinfo=None)
             minutos_desde_pedido = int(delta.total_seconds() / 60)
 
-        resultado.append(PedidoCocinaResponse(
+        datos = dict(
             pedido_id=pedido.pedido_id,
             token_recoger=pedido.token_recoger,
             estado=pedido.estado,
             fecha_pedido=pedido.fecha_pedido,
             cliente_nombre=cliente.nombre_completo if cliente else "Desconocido",
             cliente_telefono=cliente.telefono if cliente else None,
-            items=items_cocina,
             minutos_desde_pedido=minutos_desde_pedido
-        ))
+        )
+        if columnas:
+            resultado.append(PedidoCocinaColumnasResponse.model_construct(
+                **datos,
+                **(items_por_pedido.get(pedido.pedido_id) or _items_en_columnas())
+            ))
+        else:
+            resultado.append(PedidoCocinaResponse.model_construct(
+                **datos,
+                items=items_por_pedido.get(pedido.pedido_id, [])
+            ))
 
     return resultado
 
 
+# Pedidos que se leen de la base de datos por cada lote del historial
+_LOTE_HISTORIAL = 50
+
+
+def _generar_historial_json(
+    fabrica_sesiones: sessionmaker, inicio_dia: datetime, fin_dia: datetime
+) -> Iterator[bytes]:
+    """
+    Genera el historial de cocina como un arreglo JSON, por lotes.
+    Usa su propia sesión porque la del request se cierra antes de que
+    termine el streaming de la respuesta.
+    """
+    db = fabrica_sesiones()
+    try:
+        consulta = select(Pedido).options(
+            load_only(*_COLUMNAS_PEDIDO_COCINA)
+        ).where(
+            Pedido.fecha_pedido >= inicio_dia,
+            Pedido.fecha_pedido < fin_dia,
+            Pedido.estado.in_(_ESTADOS_PROCESADOS)
+        ).order_by(Pedido.fecha_listo_cocina.desc())
+
+        yield b"["
+        primero = True
+        lotes = db.execute(
+            consulta, execution_options={"yield_per": _LOTE_HISTORIAL}
+        ).scalars().partitions()
+
+        for lote in lotes:
+            for pedido in _construir_pedidos_cocina(db, lote):
+                if not primero:
+                    yield b","
+                primero = False
+                yield orjson.dumps(pedido.model_dump())
+        yield b"]"
+    finally:
+        db.close()
+
+
+@router.get("/pendientes", response_model=List[PedidoCocinaResponse])
+def obtener_pedidos_pendientes(
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Lista todos los pedidos que están en Confirmado o En Cocina.
+    Muestra las exclusiones de ingredientes claramente para la cocina.
+    Requiere rol de Cocina o Administrador.
+    """
+    # Verificar que el usuario tenga el rol adecuado
+    if current_user.rol_id not in _ROLES_COCINA:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a esta sección"
+        )
+
+    # Obtener pedidos pendientes
+    pedidos = db.query(Pedido).options(
+        load_only(*_COLUMNAS_PEDIDO_COCINA)
+    ).filter(
+        Pedido.estado.in_(_ESTADOS_PENDIENTES)
+    ).order_by(Pedido.fecha_pedido.asc()).all()
+
+    return _construir_pedidos_cocina(db, pedidos)
+
+
+@router.get("/pendientes/columnas", response_model=List[PedidoCocinaColumnasResponse])
+def obtener_pedidos_pendientes_columnas(
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Igual que /pendientes, pero cada pedido trae sus items en columnas
+    (item_ids, cantidades, platos_principales, ...) en lugar de una lista
+    de objetos. Requiere rol de Cocina o Administrador.
+    """
+    if current_user.rol_id not in _ROLES_COCINA:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a esta sección"
+        )
+
+    pedidos = db.query(Pedido).options(
+        load_only(*_COLUMNAS_PEDIDO_COCINA)
+    ).filter(
+        Pedido.estado.in_(_ESTADOS_PENDIENTES)
+    ).order_by(Pedido.fecha_pedido.asc()).all()
+
+    return _construir_pedidos_cocina(db, pedidos, columnas=True)
+
+
 @router.patch("/pedidos/{pedido_id}/estado", response_model=PedidoCocinaResponse)
 def cambiar_estado_pedido(
     pedido_id: int,
     request: CambiarEstadoCocinaRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -144,14 +332,14 @@ def cambiar_estado_pedido(
     Actualiza automáticamente las fechas correspondientes.
     """
     # Verificar permisos
-    if current_user.rol_id not in [1, 2]:  # 1=Admin, 2=Cocina
+    if current_user.rol_id not in _ROLES_COCINA:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos para realizar esta acción"
         )
 
     # Buscar pedido
-    pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
+    pedido = db.get(Pedido, pedido_id)
     if not pedido:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -159,15 +347,10 @@ def cambiar_estado_pedido(
         )
 
     # Validar transiciones de estado permitidas desde cocina
-    estados_permitidos = [
-        EstadoDelPedido.EN_COCINA,
-        EstadoDelPedido.LISTO_PARA_ENTREGA
-    ]
-
-    if request.nuevo_estado not in estados_permitidos:
+    if request.nuevo_estado not in _ESTADOS_DESDE_COCINA:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Estado no permitido desde cocina. Estados válidos: {[e.value for e in estados_permitidos]}"
+            detail=f"Estado no permitido desde cocina. Estados válidos: {sorted(e.value for e in _ESTADOS_DESDE_COCINA)}"
         )
 
     # Actualizar estado y fechas
@@ -181,14 +364,14 @@ def cambiar_estado_pedido(
         pedido.fecha_listo_cocina = datetime.now()
 
     db.commit()
-    db.refresh(pedido)
 
     # 🔔 NOTIFICAR AL CLIENTE sobre cambio de estado
-    cliente = db.query(Usuario).filter(
-        Usuario.usuario_id == pedido.usuario_id).first()
+    # (se envía en segundo plano, después de responder)
+    cliente = db.get(Usuario, pedido.usuario_id)
 
     if cliente:
-        notificar_cambio_estado(
+        background_tasks.add_task(
+            notificar_cambio_estado,
             pedido_id=pedido.pedido_id,
             token=pedido.token_recoger,
             nuevo_estado=request.nuevo_estado.value,
@@ -198,70 +381,19 @@ def cambiar_estado_pedido(
 
     # 🔔 Si está listo, notificar al delivery
     if request.nuevo_estado == EstadoDelPedido.LISTO_PARA_ENTREGA and pedido.delivery_asignado_id:
-        delivery = db.query(Usuario).filter(
-            Usuario.usuario_id == pedido.delivery_asignado_id
-        ).first()
+        delivery = db.get(Usuario, pedido.delivery_asignado_id)
 
         if delivery:
-            notificar_pedido_listo(
+            background_tasks.add_task(
+                notificar_pedido_listo,
                 pedido_id=pedido.pedido_id,
                 token=pedido.token_recoger,
                 delivery_id=delivery.usuario_id,
                 delivery_nombre=delivery.nombre_completo
             )
 
-    # Construir respuesta similar a la de pedidos pendientes
-    items_pedido = db.query(PedidoItem).filter(
-        PedidoItem.pedido_id == pedido.pedido_id).all()
-
-    items_cocina = []
-    for item in items_pedido:
-        menu = db.query(MenuDia).filter(
-            MenuDia.menu_dia_id == item.menu_dia_id).first()
-        if not menu:
-            continue
-
-        plato_principal = db.query(Plato).filter(
-            Plato.plato_id == menu.plato_principal_id).first()
-        bebida = db.query(Plato).filter(
-            Plato.plato_id == menu.bebida_id).first()
-        postre = db.query(Plato).filter(
-            Plato.plato_id == menu.postre_id).first()
-
-        exclusiones_ids = db.query(ItemExclusion).filter(
-            ItemExclusion.item_id == item.item_id).all()
-        exclusiones = []
-        for excl in exclusiones_ids:
-            ingrediente = db.query(Ingrediente).filter(
-                Ingrediente.ingrediente_id == excl.ingrediente_id).first()
-            if ingrediente:
-                exclusiones.append(f"Sin {ingrediente.nombre}")
-
-        items_cocina.append(ItemCocina(
-            item_id=item.item_id,
-            cantidad=item.cantidad,
-            menu_fecha=menu.fecha,
-            plato_principal=plato_principal.nombre if plato_principal else "N/A",
-            bebida=bebida.nombre if bebida else "N/A",
-            postre=postre.nombre if postre else "N/A",
-            exclusiones=exclusiones
-        ))
-
-    minutos_desde_pedido = None
-    if pedido.fecha_pedido:
-        delta = datetime.now() - pedido.fecha_pedido.replace(tzinfo=None)
-        minutos_desde_pedido = int(delta.total_seconds() / 60)
-
-    return PedidoCocinaResponse(
-        pedido_id=pedido.pedido_id,
-        token_recoger=pedido.token_recoger,
-        estado=pedido.estado,
-        fecha_pedido=pedido.fecha_pedido,
-        cliente_nombre=cliente.nombre_completo if cliente else "Desconocido",
-        cliente_telefono=cliente.telefono if cliente else None,
-        items=items_cocina,
-        minutos_desde_pedido=minutos_desde_pedido
-    )
+    # Construir respuesta igual a la de pedidos pendientes
+    return _construir_pedidos_cocina(db, [pedido])[0]
 
 
 @router.get("/historial", response_model=List[PedidoCocinaResponse])
@@ -269,6 +401,7 @@ def obtener_historial_cocina(
     fecha: Optional[date] = Query(
         None, description="Fecha para filtrar (default: hoy)"),
     db: Session = Depends(get_db),
+    fabrica_sesiones: sessionmaker = Depends(get_session_factory),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
@@ -277,7 +410,7 @@ def obtener_historial_cocina(
     Útil para auditoría y revisión.
     """
     # Verificar permisos
-    if current_user.rol_id not in [1, 2]:  # 1=Admin, 2=Cocina
+    if current_user.rol_id not in _ROLES_COCINA:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos para acceder a esta sección"
@@ -287,85 +420,14 @@ def obtener_historial_cocina(
     if not fecha:
         fecha = date.today()
 
-    # Obtener pedidos listos o entregados del día
-    pedidos = db.query(Pedido).filter(
-        func.date(Pedido.fecha_pedido) == fecha,
-        Pedido.estado.in_([
-            EstadoDelPedido.LISTO_PARA_ENTREGA,
-            EstadoDelPedido.EN_REPARTO,
-            EstadoDelPedido.ENTREGADO
-        ])
-    ).order_by(Pedido.fecha_listo_cocina.desc()).all()
-
-    resultado = []
-
-    for pedido in pedidos:
-        cliente = db.query(Usuario).filter(
-            Usuario.usuario_id == pedido.usuario_id
-        ).first()
-
-        items_pedido = db.query(PedidoItem).filter(
-            PedidoItem.pedido_id == pedido.pedido_id
-        ).all()
-
-        items_cocina = []
-        for item in items_pedido:
-            menu = db.query(MenuDia).filter(
-                MenuDia.menu_dia_id == item.menu_dia_id
-            ).first()
-
-            if not menu:
-                continue
-
-            plato_principal = db.query(Plato).filter(
-                Plato.plato_id == menu.plato_principal_id
-            ).first()
-            bebida = db.query(Plato).filter(
-                Plato.plato_id == menu.bebida_id
-            ).first()
-            postre = db.query(Plato).filter(
-                Plato.plato_id == menu.postre_id
-            ).first()
-
-            exclusiones_ids = db.query(ItemExclusion).filter(
-                ItemExclusion.item_id == item.item_id
-            ).all()
-
-            exclusiones = []
-            for excl in exclusiones_ids:
-                ingrediente = db.query(Ingrediente).filter(
-                    Ingrediente.ingrediente_id == excl.ingrediente_id
-                ).first()
-                if ingrediente:
-                    exclusiones.append(f"Sin {ingrediente.nombre}")
-
-            items_cocina.append(ItemCocina(
-                item_id=item.item_id,
-                cantidad=item.cantidad,
-                menu_fecha=menu.fecha,
-                plato_principal=plato_principal.nombre if plato_principal else "N/A",
-                bebida=bebida.nombre if bebida else "N/A",
-                postre=postre.nombre if postre else "N/A",
-                exclusiones=exclusiones
-            ))
-
-        minutos_desde_pedido = None
-        if pedido.fecha_pedido:
-            delta = datetime.now() - pedido.fecha_pedido.replace(tzinfo=None)
-            minutos_desde_pedido = int(delta.total_seconds() / 60)
+    inicio_dia, fin_dia = rango_del_dia(fecha)
 
-        resultado.append(PedidoCocinaResponse(
-            pedido_id=pedido.pedido_id,
-            token_recoger=pedido.token_recoger,
-            estado=pedido.estado,
-            fecha_pedido=pedido.fecha_pedido,
-            cliente_nombre=cliente.nombre_completo if cliente else "Desconocido",
-            cliente_telefono=cliente.telefono if cliente else None,
-            items=items_cocina,
-            minutos_desde_pedido=minutos_desde_pedido
-        ))
-
-    return resultado
+    # Obtener pedidos listos o entregados del día
+    # (se envían a medida que se construyen, sin armar la lista completa)
+    return StreamingResponse(
+        _generar_historial_json(fabrica_sesiones, inicio_dia, fin_dia),
+        media_type="application/json"
+    )
 
 
 @router.get("/estadisticas", response_model=EstadisticasCocinaResponse)
@@ -380,7 +442,7 @@ def obtener_estadisticas_cocina(
     Incluye tiempos promedio, pedidos procesados y velocidad.
     """
     # Verificar permisos
-    if current_user.rol_id not in [1, 2]:  # 1=Admin, 2=Cocina
+    if current_user.rol_id not in _ROLES_COCINA:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permisos para acceder a esta sección"
@@ -390,25 +452,31 @@ def obtener_estadisticas_cocina(
     if not fecha:
         fecha = date.today()
 
+    inicio_dia, fin_dia = rango_del_dia(fecha)
+
     # Obtener pedidos del día
-    pedidos_del_dia = db.query(Pedido).filter(
-        func.date(Pedido.fecha_pedido) == fecha
+    pedidos_del_dia = db.query(Pedido).options(
+        load_only(
+            Pedido.pedido_id,
+            Pedido.estado,
+            Pedido.fecha_pedido,
+            Pedido.fecha_listo_cocina
+        )
+    ).filter(
+        Pedido.fecha_pedido >= inicio_dia,
+        Pedido.fecha_pedido < fin_dia
     ).all()
 
     # Pedidos procesados (listos o más avanzados)
     pedidos_procesados = [
         p for p in pedidos_del_dia
-        if p.estado in [
-            EstadoDelPedido.LISTO_PARA_ENTREGA,
-            EstadoDelPedido.EN_REPARTO,
-            EstadoDelPedido.ENTREGADO
-        ]
+        if p.estado in _ESTADOS_PROCESADOS
     ]
 
     # Pedidos en proceso
     pedidos_en_proceso = [
         p for p in pedidos_del_dia
-        if p.estado in [EstadoDelPedido.CONFIRMADO, EstadoDelPedido.EN_COCINA]
+        if p.estado in _ESTADOS_PENDIENTES
     ]
 
     # Calcular tiempos de preparación
@@ -434,12 +502,9 @@ def obtener_estadisticas_cocina(
     platos_preparados = db.query(func.sum(PedidoItem.cantidad)).join(
         Pedido, PedidoItem.pedido_id == Pedido.pedido_id
     ).filter(
-        func.date(Pedido.fecha_pedido) == fecha,
-        Pedido.estado.in_([
-            EstadoDelPedido.LISTO_PARA_ENTREGA,
-            EstadoDelPedido.EN_REPARTO,
-            EstadoDelPedido.ENTREGADO
-        ])
+        Pedido.fecha_pedido >= inicio_dia,
+        Pedido.fecha_pedido < fin_dia,
+        Pedido.estado.in_(_ESTADOS_PROCESADOS)
     ).scalar() or 0
 
     return EstadisticasCocinaResponse(
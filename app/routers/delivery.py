@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
@@ -16,6 +16,7 @@ from app.schemas.delivery import (
     FinalizarEntregaRequest,
     EstadisticasDeliveryResponse
 )
+from app.schemas._fast import construir_respuesta, respuesta_json
 from app.utils.dependencies import get_current_user
 from app.utils.notificaciones import (
     notificar_cambio_estado,
@@ -27,6 +28,15 @@ router = APIRouter(
     tags=["Operaciones de Delivery"]
 )
 
+# Roles con acceso a entregas: 1=Admin, 3=Delivery
+_ROLES_DELIVERY = frozenset({1, 3})
+
+# Pedidos que el delivery tiene pendientes de entregar
+_ESTADOS_POR_ENTREGAR = frozenset({
+    EstadoDelPedido.LISTO_PARA_ENTREGA,
+    EstadoDelPedido.EN_REPARTO
+})
+
 
 @router.get("/mis-entregas", response_model=List[EntregaDeliveryResponse])
 def obtener_mis_entregas(
@@ -39,7 +49,7 @@ def obtener_mis_entregas(
     Incluye link de Google Maps y toda la info necesaria para la entrega.
     """
     # Verificar que el usuario sea delivery
-    if current_user.rol_id not in [1, 3]:  # 1 = Admin, 3 = Delivery
+    if current_user.rol_id not in _ROLES_DELIVERY:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Solo los administradores y deliveries pueden acceder a esta sección"
@@ -48,29 +58,37 @@ def obtener_mis_entregas(
     # Obtener pedidos asignados al delivery
     pedidos = db.query(Pedido).filter(
         Pedido.delivery_asignado_id == current_user.usuario_id,
-        Pedido.estado.in_([
-            EstadoDelPedido.LISTO_PARA_ENTREGA,
-            EstadoDelPedido.EN_REPARTO
-        ])
+        Pedido.estado.in_(_ESTADOS_POR_ENTREGAR)
     ).order_by(Pedido.fecha_listo_cocina.asc()).all()
 
+    # Clientes, zonas y cantidad de items en una consulta cada uno
+    # (solo las columnas que usa la respuesta)
+    clientes = {}
+    zonas = {}
+    cantidades = {}
+    if pedidos:
+        clientes = {
+            c.usuario_id: c
+            for c in db.query(
+                Usuario.usuario_id, Usuario.nombre_completo, Usuario.telefono
+            ).filter(
+                Usuario.usuario_id.in_({p.usuario_id for p in pedidos})
+            )
+        }
+        zonas = dict(db.query(ZonaDelivery.zona_id, ZonaDelivery.nombre_zona).filter(
+            ZonaDelivery.zona_id.in_({p.zona_id for p in pedidos})
+        ).all())
+        cantidades = dict(db.query(
+            PedidoItem.pedido_id, func.count(PedidoItem.item_id)
+        ).filter(
+            PedidoItem.pedido_id.in_([p.pedido_id for p in pedidos])
+        ).group_by(PedidoItem.pedido_id).all())
+
     resultado = []
 
     for pedido in pedidos:
-        # Obtener cliente
-        cliente = db.query(Usuario).filter(
-            Usuario.usuario_id == pedido.usuario_id
-        ).first()
-
-        # Obtener zona
-        zona = db.query(ZonaDelivery).filter(
-            ZonaDelivery.zona_id == pedido.zona_id
-        ).first()
-
-        # Contar items
-        cantidad_items = db.query(func.count(PedidoItem.item_id)).filter(
-            PedidoItem.pedido_id == pedido.pedido_id
-        ).scalar()
+        cliente = clientes.get(pedido.usuario_id)
+        cantidad_items = cantidades.get(pedido.pedido_id)
 
         # Calcular minutos desde que está listo
         minutos_desde_listo = None
@@ -78,33 +96,23 @@ def obtener_mis_entregas(
             delta = datetime.now() - pedido.fecha_listo_cocina.replace(tzinfo=None)
             minutos_desde_listo = int(delta.total_seconds() / 60)
 
-        resultado.append(EntregaDeliveryResponse(
-            pedido_id=pedido.pedido_id,
-            token_recoger=pedido.token_recoger,
-            estado=pedido.estado,
+        resultado.append(construir_respuesta(
+            EntregaDeliveryResponse,
+            pedido,
             cliente_nombre=cliente.nombre_completo if cliente else "Desconocido",
             cliente_telefono=cliente.telefono if cliente else None,
-            zona_nombre=zona.nombre_zona if zona else "N/A",
-            direccion_referencia=pedido.direccion_referencia,
-            google_maps_link=pedido.google_maps_link,
-            latitud=pedido.latitud,
-            longitud=pedido.longitud,
-            total_pedido=pedido.total_pedido,
-            metodo_pago=pedido.metodo_pago,
-            esta_pagado=pedido.esta_pagado,
+            zona_nombre=zonas.get(pedido.zona_id, "N/A"),
             cantidad_items=cantidad_items or 0,
-            fecha_pedido=pedido.fecha_pedido,
-            fecha_listo_cocina=pedido.fecha_listo_cocina,
-            fecha_en_reparto=pedido.fecha_en_reparto,
             minutos_desde_listo=minutos_desde_listo
         ))
 
-    return resultado
+    return respuesta_json(resultado)
 
 
 @router.patch("/pedidos/{pedido_id}/tomar", response_model=EntregaDeliveryResponse)
 def tomar_pedido(
     pedido_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -113,14 +121,14 @@ def tomar_pedido(
     Cambia el estado a "En Reparto" y actualiza fecha_en_reparto.
     """
     # Verificar que el usuario sea delivery o admin
-    if current_user.rol_id not in [1, 3]:  # 1 = Admin, 3 = Delivery
+    if current_user.rol_id not in _ROLES_DELIVERY:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Solo los administradores y deliveries pueden entregar pedidos"
         )
 
     # Buscar pedido
-    pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
+    pedido = db.get(Pedido, pedido_id)
     if not pedido:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -146,17 +154,19 @@ def tomar_pedido(
     pedido.fecha_en_reparto = datetime.now()
 
     db.commit()
-    db.refresh(pedido)
 
     # 🔔 NOTIFICAR AL CLIENTE que el pedido va en camino
-    notificar_delivery_en_camino(
+    # (se envía en segundo plano, después de responder)
+    background_tasks.add_task(
+        notificar_delivery_en_camino,
         pedido_id=pedido.pedido_id,
         token=pedido.token_recoger,
         cliente_id=pedido.usuario_id,
         delivery_nombre=current_user.nombre_completo
     )
 
-    notificar_cambio_estado(
+    background_tasks.add_task(
+        notificar_cambio_estado,
         pedido_id=pedido.pedido_id,
         token=pedido.token_recoger,
         nuevo_estado="EN_REPARTO",
@@ -165,10 +175,8 @@ def tomar_pedido(
     )
 
     # Construir respuesta
-    cliente = db.query(Usuario).filter(
-        Usuario.usuario_id == pedido.usuario_id).first()
-    zona = db.query(ZonaDelivery).filter(
-        ZonaDelivery.zona_id == pedido.zona_id).first()
+    cliente = db.get(Usuario, pedido.usuario_id)
+    zona = db.get(ZonaDelivery, pedido.zona_id)
     cantidad_items = db.query(func.count(PedidoItem.item_id)).filter(
         PedidoItem.pedido_id == pedido.pedido_id
     ).scalar()
@@ -204,6 +212,7 @@ def tomar_pedido(
 def finalizar_entrega(
     pedido_id: int,
     request: FinalizarEntregaRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -220,7 +229,7 @@ def finalizar_entrega(
         )
 
     # Buscar pedido
-    pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
+    pedido = db.get(Pedido, pedido_id)
     if not pedido:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -250,10 +259,10 @@ def finalizar_entrega(
         pedido.esta_pagado = True
 
     db.commit()
-    db.refresh(pedido)
 
     # 🔔 NOTIFICAR AL CLIENTE que el pedido fue entregado
-    notificar_cambio_estado(
+    background_tasks.add_task(
+        notificar_cambio_estado,
         pedido_id=pedido.pedido_id,
         token=pedido.token_recoger,
         nuevo_estado="ENTREGADO",
@@ -262,10 +271,8 @@ def finalizar_entrega(
     )
 
     # Construir respuesta
-    cliente = db.query(Usuario).filter(
-        Usuario.usuario_id == pedido.usuario_id).first()
-    zona = db.query(ZonaDelivery).filter(
-        ZonaDelivery.zona_id == pedido.zona_id).first()
+    cliente = db.get(Usuario, pedido.usuario_id)
+    zona = db.get(ZonaDelivery, pedido.zona_id)
     cantidad_items = db.query(func.count(PedidoItem.item_id)).filter(
         PedidoItem.pedido_id == pedido.pedido_id
     ).scalar()
@@ -3,11 +3,13 @@ Endpoints de salud y monitoreo del sistema.
 """
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
+import orjson
 
 from app.database import get_db
 from app.config import settings
@@ -33,19 +35,24 @@ class InfoResponse(BaseModel):
     environment: str
 
 
+# La información de la API no cambia mientras corre el proceso:
+# se serializa una sola vez al importar el módulo
+_INFO_BYTES = orjson.dumps(InfoResponse(
+    name=settings.APP_NAME,
+    version=settings.APP_VERSION,
+    description="API para sistema de delivery de comida Solandre",
+    docs_url="/docs",
+    environment="development" if settings.DEBUG else "production"
+).model_dump())
+
+
 @router.get("/", response_model=InfoResponse)
 def root():
     """
     Endpoint raíz de la API.
     Retorna información básica sobre el servicio.
     """
-    return InfoResponse(
-        name=settings.APP_NAME,
-        version=settings.APP_VERSION,
-        description="API para sistema de delivery de comida Solandre",
-        docs_url="/docs",
-        environment="development" if settings.DEBUG else "production"
-    )
+    return Response(content=_INFO_BYTES, media_type="application/json")
 
 
 @router.get("/health", response_model=HealthResponse)
@@ -93,7 +100,7 @@ def ping():
     Endpoint simple de ping.
     Útil para verificar que el servidor está activo sin consultar la BD.
     """
-    return {
+    return ORJSONResponse({
         "status": "ok",
         "timestamp": datetime.now().isoformat()
-    }
+    })
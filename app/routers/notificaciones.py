@@ -1,12 +1,21 @@
 """
 Router para gestión de notificaciones en tiempo real.
-Sistema basado en polling (sin WebSockets).
+Sistema basado en polling, con un stream SSE opcional (sin WebSockets).
+
+Los endpoints de consulta solo leen el gestor en memoria, sin usar la base
+de datos, por eso son async: corren en el event loop sin ocupar un hilo
+del threadpool en cada polling.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
+from cachetools import TTLCache
+import asyncio
+import threading
+import zlib
 
 from app.database import get_db
 from app.models.usuario import Usuario
@@ -14,10 +23,12 @@ from app.models.pedido import Pedido
 from app.schemas.notificacion import (
     EventoResponse,
     ContadorEventosResponse,
+    CursorNotificacionesResponse,
     NotificarLlegadaRequest
 )
-from app.utils.dependencies import get_current_user
+from app.utils.dependencies import get_current_user, require_roles
 from app.utils.notificaciones import (
+    Evento,
     gestor_notificaciones,
     notificar_delivery_cerca
 )
@@ -27,9 +38,123 @@ router = APIRouter(
     tags=["Notificaciones"]
 )
 
+# Segundos sin eventos antes de enviar un comentario keep-alive por el stream
+_SSE_KEEPALIVE_SEGUNDOS = 15
+
+# Cache corta del contador (los clientes lo consultan muy seguido para el
+# badge). La clave incluye la versión de eventos del usuario, así que un
+# evento nuevo invalida su entrada sin tener que borrarla
+_CONTADOR_TTL_SEGUNDOS = 3
+_CONTADOR_BUCKET_SEGUNDOS = 5
+_cache_contador = TTLCache(maxsize=10_000, ttl=_CONTADOR_TTL_SEGUNDOS)
+_cache_contador_lock = threading.Lock()
+
+
+def _etag_eventos(
+    rol_id: int,
+    usuario_id: Optional[int],
+    version: tuple,
+    eventos: List[Evento],
+    *filtros
+) -> str:
+    """
+    ETag de una consulta de eventos: versión de los índices del rol/usuario,
+    filtros de la consulta y borde de la ventana de tiempo (cantidad de
+    eventos y hora del más antiguo). Cambia apenas llega un evento nuevo y
+    también cuando un evento sale de la ventana 'desde_minutos'.
+
+    La versión debe leerse antes de consultar los eventos: si llega un
+    evento entre ambas lecturas, el ETag queda viejo y el siguiente polling
+    lo trae (nunca al revés).
+    """
+    ventana = (len(eventos), eventos[-1].creado_us if eventos else 0)
+    version = "-".join(map(str, version))
+    filtros_crc = zlib.crc32(repr((filtros, ventana)).encode())
+    return f'"{rol_id}-{usuario_id or 0}-{version}-{filtros_crc:x}"'
+
+
+def _redondear_arriba(fecha: datetime, segundos: int) -> datetime:
+    """Redondea una fecha hacia arriba a un múltiplo de 'segundos'"""
+    resto = timedelta(
+        seconds=fecha.second % segundos, microseconds=fecha.microsecond)
+    if not resto:
+        return fecha
+    return fecha - resto + timedelta(seconds=segundos)
+
+
+def _no_modificado(request: Request, etag: str) -> Optional[Response]:
+    """Respuesta 304 si el cliente ya tiene la versión actual (If-None-Match)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (e.strip() for e in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def _respuesta_eventos(eventos: List[Evento], etag: str) -> Response:
+    """
+    Arma la lista JSON uniendo el JSON ya serializado de cada evento,
+    sin construir ni validar un EventoResponse por elemento.
+    """
+    return Response(
+        content=b"[" + b",".join(e.to_json_bytes() for e in eventos) + b"]",
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+
+@router.get("/stream")
+async def stream_notificaciones(
+    request: Request,
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Stream de notificaciones en tiempo real (Server-Sent Events).
+
+    Alternativa al polling: el cliente abre una conexión con EventSource y
+    recibe cada notificación apenas se crea, sin consultar periódicamente.
+    Los clientes conectados no generan consultas a la base de datos.
+    Si un cliente no lee, se guardan sus últimos 100 eventos pendientes y
+    se descartan los más antiguos.
+
+    Cada mensaje tiene el tipo de evento en 'event' y en 'data' el mismo
+    JSON que retorna /notificaciones/mis-notificaciones.
+    """
+    rol_id, usuario_id = current_user.rol_id, current_user.usuario_id
+
+    async def generar_eventos():
+        # Se suscribe al empezar el cuerpo de la respuesta: si el cliente se
+        # desconecta antes, no queda una suscripción sin el finally que la quita
+        suscripcion = gestor_notificaciones.suscribir(
+            rol_id=rol_id, usuario_id=usuario_id)
+        try:
+            while True:
+                try:
+                    evento = await asyncio.wait_for(
+                        suscripcion.cola.get(), timeout=_SSE_KEEPALIVE_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+
+                datos = evento.to_json_bytes().decode()
+                yield f"id: {evento.evento_id}\nevent: {evento.tipo}\ndata: {datos}\n\n"
+        finally:
+            gestor_notificaciones.desuscribir(suscripcion)
+
+    return StreamingResponse(
+        generar_eventos(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Evita el buffering en proxies (nginx)
+        }
+    )
+
 
 @router.get("/mis-notificaciones", response_model=List[EventoResponse])
-def obtener_mis_notificaciones(
+async def obtener_mis_notificaciones(
+    request: Request,
     desde_minutos: int = Query(
         default=5, ge=1, le=60, description="Minutos hacia atrás"),
     tipo: Optional[str] = Query(
@@ -52,7 +177,12 @@ def obtener_mis_notificaciones(
     - Cocina: Consulta cada 10 segundos para ver nuevos pedidos
     - Cliente: Consulta cada 30 segundos para ver estado de su pedido
     - Delivery: Consulta cada 15 segundos para ver nuevas asignaciones
+
+    La respuesta incluye un ETag: si se envía en If-None-Match y la lista
+    no cambió, se responde 304 sin cuerpo.
     """
+    version = gestor_notificaciones.version(
+        current_user.rol_id, current_user.usuario_id)
     desde = datetime.now() - timedelta(minutes=desde_minutos)
 
     eventos = gestor_notificaciones.obtener_eventos_recientes(
@@ -63,21 +193,15 @@ def obtener_mis_notificaciones(
         limit=limit
     )
 
-    return [
-        EventoResponse(
-            evento_id=e.evento_id,
-            tipo=e.tipo,
-            titulo=e.titulo,
-            mensaje=e.mensaje,
-            data=e.data,
-            fecha_creacion=e.fecha_creacion
-        )
-        for e in eventos
-    ]
+    etag = _etag_eventos(
+        current_user.rol_id, current_user.usuario_id, version, eventos,
+        desde_minutos, tipo, limit)
+    return _no_modificado(request, etag) or _respuesta_eventos(eventos, etag)
 
 
 @router.get("/contador", response_model=ContadorEventosResponse)
-def contador_notificaciones_nuevas(
+async def contador_notificaciones_nuevas(
+    response: Response,
     desde: Optional[datetime] = Query(
         default=None,
         description="Fecha desde la cual contar (ISO format)"
@@ -89,7 +213,9 @@ def contador_notificaciones_nuevas(
 
     Útil para mostrar badge con número de notificaciones no vistas.
 
-    Si no se proporciona 'desde', cuenta las de los últimos 5 minutos.
+    Si no se proporciona 'desde', cuenta las de los últimos 5 minutos
+    (el inicio se redondea hacia arriba a múltiplos de 5 segundos). El
+    resultado se cachea por 3 segundos.
 
     El frontend puede:
     1. Guardar la última fecha de consulta en localStorage
@@ -97,32 +223,68 @@ def contador_notificaciones_nuevas(
     3. Mostrar badge: "🔔 3" si hay 3 notificaciones nuevas
     """
     if desde is None:
-        desde = datetime.now() - timedelta(minutes=5)
-
-    eventos = gestor_notificaciones.obtener_eventos_recientes(
-        rol_id=current_user.rol_id,
-        usuario_id=current_user.usuario_id,
-        desde=desde
+        # Redondeado hacia arriba, los pollings seguidos usan la misma
+        # entrada de la cache sin contar eventos fuera de la ventana
+        desde = _redondear_arriba(
+            datetime.now() - timedelta(minutes=5), _CONTADOR_BUCKET_SEGUNDOS)
+
+    # Un 'desde' enviado por el cliente se usa exacto: si se redondeara
+    # hacia abajo, eventos que ya vio volverían a contarse como nuevos
+    clave = (
+        current_user.rol_id,
+        current_user.usuario_id,
+        desde,
+        gestor_notificaciones.version(
+            current_user.rol_id, current_user.usuario_id)
     )
 
-    # Contar por tipo
-    eventos_por_tipo = {}
-    for evento in eventos:
-        if evento.tipo not in eventos_por_tipo:
-            eventos_por_tipo[evento.tipo] = 0
-        eventos_por_tipo[evento.tipo] += 1
+    with _cache_contador_lock:
+        contador = _cache_contador.get(clave)
+
+    if contador is None:
+        eventos_por_tipo = gestor_notificaciones.contar_eventos_por_tipo(
+            rol_id=current_user.rol_id,
+            usuario_id=current_user.usuario_id,
+            desde=desde
+        )
+        contador = (sum(eventos_por_tipo.values()), eventos_por_tipo)
+        with _cache_contador_lock:
+            _cache_contador[clave] = contador
+
+    # Permite que el navegador reutilice la respuesta mientras dura la cache
+    response.headers["Cache-Control"] = f"private, max-age={_CONTADOR_TTL_SEGUNDOS}"
 
+    total, eventos_por_tipo = contador
     return ContadorEventosResponse(
-        total=len(eventos),
+        total=total,
         desde=desde,
-        eventos_por_tipo=eventos_por_tipo
+        eventos_por_tipo=dict(eventos_por_tipo)
+    )
+
+
+@router.get("/cursor", response_model=CursorNotificacionesResponse)
+async def cursor_notificaciones(
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Retorna el número del último evento visible para el usuario.
+
+    Es una consulta en memoria, mucho más liviana que /mis-notificaciones.
+    El frontend puede consultarla cada pocos segundos y pedir la lista
+    completa solo cuando 'seq' cambia respecto de la última vez.
+    """
+    return CursorNotificacionesResponse(
+        seq=gestor_notificaciones.cursor(
+            current_user.rol_id, current_user.usuario_id)
     )
 
 
 @router.get("/cocina/nuevos-pedidos", response_model=List[EventoResponse])
-def obtener_nuevos_pedidos_cocina(
+async def obtener_nuevos_pedidos_cocina(
+    request: Request,
     desde_minutos: int = Query(default=10, ge=1, le=60),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Usuario = Depends(require_roles(
+        1, 2, detail="Solo cocina y administradores pueden acceder a este endpoint"))
 ):
     """
     Endpoint especializado para tablets de cocina.
@@ -133,13 +295,7 @@ def obtener_nuevos_pedidos_cocina(
 
     Solo accesible por usuarios con rol Cocina (2) o Admin (1).
     """
-    # Verificar permisos
-    if current_user.rol_id not in [1, 2]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo cocina y administradores pueden acceder a este endpoint"
-        )
-
+    version = gestor_notificaciones.version(2)
     desde = datetime.now() - timedelta(minutes=desde_minutos)
 
     eventos = gestor_notificaciones.obtener_eventos_recientes(
@@ -148,23 +304,16 @@ def obtener_nuevos_pedidos_cocina(
         tipo="NUEVO_PEDIDO"
     )
 
-    return [
-        EventoResponse(
-            evento_id=e.evento_id,
-            tipo=e.tipo,
-            titulo=e.titulo,
-            mensaje=e.mensaje,
-            data=e.data,
-            fecha_creacion=e.fecha_creacion
-        )
-        for e in eventos
-    ]
+    etag = _etag_eventos(2, None, version, eventos, desde_minutos, "NUEVO_PEDIDO")
+    return _no_modificado(request, etag) or _respuesta_eventos(eventos, etag)
 
 
 @router.get("/delivery/mis-asignaciones", response_model=List[EventoResponse])
-def obtener_mis_asignaciones_delivery(
+async def obtener_mis_asignaciones_delivery(
+    request: Request,
     desde_minutos: int = Query(default=30, ge=1, le=120),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Usuario = Depends(require_roles(
+        1, 3, detail="Solo administradores y delivery pueden acceder a este endpoint"))
 ):
     """
     Endpoint especializado para app móvil de delivery.
@@ -173,13 +322,7 @@ def obtener_mis_asignaciones_delivery(
 
     Solo accesible por usuarios con rol Delivery (3).
     """
-    # Verificar permisos
-    if current_user.rol_id not in [1, 3]:  # 1 = Admin, 3 = Delivery
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores y delivery pueden acceder a este endpoint"
-        )
-
+    version = gestor_notificaciones.version(3, current_user.usuario_id)
     desde = datetime.now() - timedelta(minutes=desde_minutos)
 
     eventos = gestor_notificaciones.obtener_eventos_recientes(
@@ -189,24 +332,19 @@ def obtener_mis_asignaciones_delivery(
         tipo="PEDIDO_ASIGNADO"
     )
 
-    return [
-        EventoResponse(
-            evento_id=e.evento_id,
-            tipo=e.tipo,
-            titulo=e.titulo,
-            mensaje=e.mensaje,
-            data=e.data,
-            fecha_creacion=e.fecha_creacion
-        )
-        for e in eventos
-    ]
+    etag = _etag_eventos(
+        3, current_user.usuario_id, version, eventos,
+        desde_minutos, "PEDIDO_ASIGNADO")
+    return _no_modificado(request, etag) or _respuesta_eventos(eventos, etag)
 
 
 @router.post("/delivery/notificar-llegada/{pedido_id}")
 def notificar_llegada_delivery(
     pedido_id: int,
+    datos: Optional[NotificarLlegadaRequest] = None,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Usuario = Depends(require_roles(
+        1, 3, detail="Solo administradores y delivery pueden notificar llegadas"))
 ):
     """
     El delivery notifica que llegó a la ubicación del cliente.
@@ -218,17 +356,18 @@ def notificar_llegada_delivery(
     - Automáticamente cuando GPS detecta que llegó
     - Manualmente con un botón "Notificar que llegué"
 
+    El body es opcional: la ubicación del delivery y un mensaje adicional
+    para el cliente (por ejemplo "Estoy en la puerta lateral").
+
     Solo accesible por usuarios con rol Delivery (3).
     """
-    # Verificar permisos
-    if current_user.rol_id not in [1, 3]:  # 1 = Admin, 3 = Delivery
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores y delivery pueden notificar llegadas"
-        )
-
-    # Buscar el pedido
-    pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
+    # Buscar el pedido (solo las columnas necesarias)
+    pedido = db.query(Pedido).with_entities(
+        Pedido.pedido_id,
+        Pedido.usuario_id,
+        Pedido.delivery_asignado_id,
+        Pedido.token_recoger
+    ).filter(Pedido.pedido_id == pedido_id).first()
 
     if not pedido:
         raise HTTPException(
@@ -248,7 +387,10 @@ def notificar_llegada_delivery(
         pedido_id=pedido.pedido_id,
         token=pedido.token_recoger,
         cliente_id=pedido.usuario_id,
-        delivery_nombre=current_user.nombre_completo
+        delivery_nombre=current_user.nombre_completo,
+        latitud=datos.latitud if datos else None,
+        longitud=datos.longitud if datos else None,
+        mensaje_adicional=datos.mensaje_adicional if datos else None
     )
 
     return {
@@ -259,9 +401,11 @@ def notificar_llegada_delivery(
 
 
 @router.get("/cliente/mis-pedidos", response_model=List[EventoResponse])
-def obtener_notificaciones_mis_pedidos(
+async def obtener_notificaciones_mis_pedidos(
+    request: Request,
     desde_minutos: int = Query(default=60, ge=1, le=1440),
-    current_user: Usuario = Depends(get_current_user)
+    current_user: Usuario = Depends(require_roles(
+        1, 4, detail="Solo administradores y clientes pueden acceder a este endpoint"))
 ):
     """
     Endpoint especializado para clientes.
@@ -271,13 +415,7 @@ def obtener_notificaciones_mis_pedidos(
 
     Solo accesible por usuarios con rol Cliente (4).
     """
-    # Verificar permisos
-    if current_user.rol_id not in [1, 4]:  # 1 = Admin, 4 = Cliente
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores y clientes pueden acceder a este endpoint"
-        )
-
+    version = gestor_notificaciones.version(4, current_user.usuario_id)
     desde = datetime.now() - timedelta(minutes=desde_minutos)
 
     # Obtener todas las notificaciones del cliente
@@ -287,36 +425,22 @@ def obtener_notificaciones_mis_pedidos(
         desde=desde
     )
 
-    return [
-        EventoResponse(
-            evento_id=e.evento_id,
-            tipo=e.tipo,
-            titulo=e.titulo,
-            mensaje=e.mensaje,
-            data=e.data,
-            fecha_creacion=e.fecha_creacion
-        )
-        for e in eventos
-    ]
+    etag = _etag_eventos(4, current_user.usuario_id, version, eventos, desde_minutos)
+    return _no_modificado(request, etag) or _respuesta_eventos(eventos, etag)
 
 
-@router.delete("/limpiar-antiguas")
-def limpiar_notificaciones_antiguas(
-    current_user: Usuario = Depends(get_current_user)
-):
+@router.delete(
+    "/limpiar-antiguas",
+    dependencies=[Depends(require_roles(
+        1, detail="Solo administradores pueden limpiar notificaciones"))]
+)
+def limpiar_notificaciones_antiguas():
     """
     Limpia notificaciones antiguas del sistema.
 
     Solo accesible por administradores.
     Se ejecuta automáticamente cada hora, pero puede ejecutarse manualmente.
     """
-    # Verificar que sea admin
-    if current_user.rol_id != 1:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Solo administradores pueden limpiar notificaciones"
-        )
-
     gestor_notificaciones.limpiar_eventos_antiguos()
 
     return {
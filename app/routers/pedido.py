@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, case, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
 from datetime import datetime
 
 from app.database import get_db
@@ -10,8 +11,6 @@ from app.models.pedido_item import PedidoItem
 from app.models.item_exclusion import ItemExclusion
 from app.models.menu_dia import MenuDia
 from app.models.usuario import Usuario
-from app.models.ingrediente import Ingrediente
-from app.models.zona_delivery import ZonaDelivery
 from app.schemas.pedido import (
     CrearPedidoRequest,
     PedidoResponse,
@@ -21,8 +20,12 @@ from app.schemas.pedido import (
     ItemPedidoResponse,
     MenuDiaSimple
 )
+from app.schemas._fast import construir_respuesta, respuesta_json
 from app.utils.dependencies import get_current_user
 from app.utils.token_generator import generar_token_unico
+from app.utils.cache_referencia import obtener_nombre_zona
+from app.utils.dinero import a_centavos, desde_centavos
+from app.utils.stock import restaurar_stock_pedido
 from app.models.enums import EstadoDelPedido
 from app.utils.notificaciones import (
     notificar_nuevo_pedido,
@@ -36,10 +39,17 @@ router = APIRouter(
     tags=["Pedidos de Clientes"]
 )
 
+# Estados en los que un pedido ya no ocupa al delivery asignado
+_ESTADOS_FINALIZADOS = frozenset({
+    EstadoDelPedido.ENTREGADO,
+    EstadoDelPedido.CANCELADO
+})
+
 
 @router.post("/", response_model=PedidoResponse, status_code=status.HTTP_201_CREATED)
 def crear_pedido(
     request: CrearPedidoRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -55,21 +65,28 @@ def crear_pedido(
     """
 
     # 1. Validar zona
-    zona = db.query(ZonaDelivery).filter(
-        ZonaDelivery.zona_id == request.zona_id).first()
-    if not zona:
+    if obtener_nombre_zona(db, request.zona_id) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Zona no encontrada"
         )
 
     # 2. Validar y calcular total
-    total_pedido = 0
+    # Todos los menús del pedido en una sola consulta, bloqueados hasta el
+    # commit para que dos pedidos simultáneos no vendan el mismo stock
+    menus = {
+        menu.menu_dia_id: menu
+        for menu in db.query(MenuDia).filter(
+            MenuDia.menu_dia_id.in_({item.menu_dia_id for item in request.items})
+        ).with_for_update().all()
+    }
+
+    total_centavos = 0
     items_validados = []
+    cantidad_por_menu = {}
 
     for item in request.items:
-        menu = db.query(MenuDia).filter(
-            MenuDia.menu_dia_id == item.menu_dia_id).first()
+        menu = menus.get(item.menu_dia_id)
 
         if not menu:
             raise HTTPException(
@@ -83,23 +100,36 @@ def crear_pedido(
                 detail=f"El menú del {menu.fecha} no está publicado"
             )
 
-        if menu.cantidad_disponible < item.cantidad:
+        # El stock se valida contra el total pedido de ese menú
+        # (el mismo menú puede venir en varias líneas)
+        cantidad_por_menu[menu.menu_dia_id] = cantidad_por_menu.get(
+            menu.menu_dia_id, 0) + item.cantidad
+
+        if menu.cantidad_disponible < cantidad_por_menu[menu.menu_dia_id]:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Stock insuficiente para el menú del {menu.fecha}. Disponible: {menu.cantidad_disponible}"
             )
 
-        total_pedido += menu.precio_menu * item.cantidad
+        total_centavos += a_centavos(menu.precio_menu) * item.cantidad
         items_validados.append((menu, item))
 
+    total_pedido = desde_centavos(total_centavos)
+
     # 3. Generar token único
     token = generar_token_unico(db)
 
-    # 4. Buscar delivery disponible en la zona
-    delivery = db.query(Usuario).filter(
+    # 4. Buscar delivery disponible en la zona: el que tenga menos pedidos
+    # activos, para no cargar siempre al mismo
+    pedidos_activos = select(func.count()).where(
+        Pedido.delivery_asignado_id == Usuario.usuario_id,
+        Pedido.estado.notin_(_ESTADOS_FINALIZADOS)
+    ).correlate(Usuario).scalar_subquery()
+
+    delivery = db.query(Usuario.usuario_id, Usuario.nombre_completo).filter(
         Usuario.rol_id == 3,  # Rol Delivery
         Usuario.zona_reparto_id == request.zona_id
-    ).first()
+    ).order_by(pedidos_activos, Usuario.usuario_id).first()
 
     # 5. Crear el pedido
     nuevo_pedido = Pedido(
@@ -116,37 +146,62 @@ def crear_pedido(
         fecha_pedido=datetime.now()
     )
 
-    db.add(nuevo_pedido)
-    db.flush()  # Para obtener el pedido_id
-
-    # 6. Crear items del pedido y actualizar stock
-    for menu, item_request in items_validados:
-        # Crear item
-        item = PedidoItem(
-            pedido_id=nuevo_pedido.pedido_id,
-            menu_dia_id=menu.menu_dia_id,
-            cantidad=item_request.cantidad,
-            precio_unitario=menu.precio_menu
-        )
-        db.add(item)
-        db.flush()  # Para obtener el item_id
-
-        # Registrar exclusiones
-        for ingrediente_id in item_request.exclusiones:
-            exclusion = ItemExclusion(
-                item_id=item.item_id,
-                ingrediente_id=ingrediente_id
-            )
-            db.add(exclusion)
-
-        # Actualizar stock del menú
-        menu.cantidad_disponible -= item_request.cantidad
+    # El token puede venir solo del filtro en memoria (sin consultar la
+    # base de datos): si choca con la restricción única se reintenta una vez
+    # con un token verificado en la base. El savepoint deshace solo el INSERT
+    try:
+        with db.begin_nested():
+            db.add(nuevo_pedido)
+            db.flush()  # Para obtener el pedido_id
+    except IntegrityError:
+        token = nuevo_pedido.token_recoger = generar_token_unico(db, usar_filtro=False)
+        with db.begin_nested():
+            db.add(nuevo_pedido)
+            db.flush()
+
+    # 6. Crear items del pedido (un solo INSERT ... RETURNING, en el mismo
+    # orden en que vienen los items)
+    items_ids = db.execute(
+        insert(PedidoItem).returning(
+            PedidoItem.item_id, sort_by_parameter_order=True),
+        [
+            {
+                "pedido_id": nuevo_pedido.pedido_id,
+                "menu_dia_id": menu.menu_dia_id,
+                "cantidad": item_request.cantidad,
+                "precio_unitario": menu.precio_menu
+            }
+            for menu, item_request in items_validados
+        ]
+    ).scalars().all()
+
+    # Registrar exclusiones de todos los items en un solo INSERT
+    exclusiones = [
+        {"item_id": item_id, "ingrediente_id": ingrediente_id}
+        for item_id, (_, item_request) in zip(items_ids, items_validados)
+        for ingrediente_id in dict.fromkeys(item_request.exclusiones)
+    ]
+    if exclusiones:
+        db.execute(insert(ItemExclusion), exclusiones)
+
+    # Actualizar stock de todos los menús en un solo UPDATE
+    # (los menús están bloqueados desde la validación)
+    db.execute(
+        update(MenuDia).where(
+            MenuDia.menu_dia_id.in_(cantidad_por_menu)
+        ).values(
+            cantidad_disponible=MenuDia.cantidad_disponible - case(
+                cantidad_por_menu, value=MenuDia.menu_dia_id)
+        ).execution_options(synchronize_session=False)
+    )
 
     db.commit()
     db.refresh(nuevo_pedido)
 
     # 7. 🔔 CREAR NOTIFICACIONES
-    notificar_nuevo_pedido(
+    # (se envían en segundo plano, después de responder)
+    background_tasks.add_task(
+        notificar_nuevo_pedido,
         pedido_id=nuevo_pedido.pedido_id,
         token=token,
         cliente_nombre=current_user.nombre_completo,
@@ -156,7 +211,8 @@ def crear_pedido(
 
     # Si se asignó delivery, notificarle
     if delivery:
-        notificar_delivery_asignado(
+        background_tasks.add_task(
+            notificar_delivery_asignado,
             pedido_id=nuevo_pedido.pedido_id,
             token=token,
             delivery_id=delivery.usuario_id,
@@ -164,45 +220,88 @@ def crear_pedido(
             direccion=request.direccion_referencia
         )
 
-    return PedidoResponse.from_orm(nuevo_pedido)
+    return PedidoResponse.model_validate(nuevo_pedido)
 
 
 @router.get("/mis-pedidos", response_model=List[MisPedidosResponse])
 def obtener_mis_pedidos(
+    limit: int = Query(default=20, ge=1, le=100,
+                       description="Máximo de pedidos por página"),
+    before: Optional[datetime] = Query(
+        default=None,
+        description="Retornar pedidos anteriores a esta fecha (fecha_pedido del último pedido de la página anterior)"
+    ),
+    before_id: Optional[int] = Query(
+        default=None,
+        description="pedido_id del último pedido de la página anterior (desempata pedidos con la misma fecha)"
+    ),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
-    Obtiene el historial de pedidos del usuario autenticado.
+    Obtiene el historial de pedidos del usuario autenticado, del más
+    reciente al más antiguo.
+
+    Paginado por fecha: para la página siguiente se envía en 'before' la
+    fecha_pedido y en 'before_id' el pedido_id del último pedido recibido
+    (así no se saltan pedidos con la misma fecha). El header X-Has-More
+    indica si quedan pedidos más antiguos.
     """
-    pedidos = db.query(
+    # Cantidad de items por subconsulta correlacionada (usa el índice de
+    # pedido_items.pedido_id) en lugar de JOIN + GROUP BY sobre los pedidos
+    items_count = db.query(func.count(PedidoItem.item_id)).filter(
+        PedidoItem.pedido_id == Pedido.pedido_id
+    ).correlate(Pedido).scalar_subquery()
+
+    query = db.query(
         Pedido,
-        func.count(PedidoItem.item_id).label('items_count')
-    ).join(
-        PedidoItem, Pedido.pedido_id == PedidoItem.pedido_id
+        items_count.label('items_count')
     ).filter(
         Pedido.usuario_id == current_user.usuario_id
-    ).group_by(
-        Pedido.pedido_id
-    ).order_by(
-        Pedido.fecha_pedido.desc()
-    ).all()
+    )
+    if before is not None and before_id is not None:
+        query = query.filter(or_(
+            Pedido.fecha_pedido < before,
+            and_(Pedido.fecha_pedido == before, Pedido.pedido_id < before_id)
+        ))
+    elif before is not None:
+        query = query.filter(Pedido.fecha_pedido < before)
+
+    # Se pide un pedido extra solo para saber si hay más páginas
+    pedidos = query.order_by(
+        Pedido.fecha_pedido.desc(), Pedido.pedido_id.desc()
+    ).limit(limit + 1).all()
 
     resultado = []
-    for pedido, items_count in pedidos:
-        resultado.append(MisPedidosResponse(
-            pedido_id=pedido.pedido_id,
-            token_recoger=pedido.token_recoger,
-            estado=pedido.estado,
-            total_pedido=pedido.total_pedido,
-            metodo_pago=pedido.metodo_pago,
-            esta_pagado=pedido.esta_pagado,
-            fecha_pedido=pedido.fecha_pedido,
-            fecha_entrega=pedido.fecha_entrega,
-            items_count=items_count
-        ))
+    for pedido, items_count in pedidos[:limit]:
+        resultado.append(construir_respuesta(
+            MisPedidosResponse, pedido, items_count=items_count))
 
-    return resultado
+    # El header va en la respuesta que se retorna
+    respuesta = respuesta_json(resultado)
+    respuesta.headers["X-Has-More"] = "true" if len(pedidos) > limit else "false"
+    return respuesta
+
+
+def _pedido_no_disponible(db: Session, pedido_id: int, detalle_permiso: str):
+    """
+    Se llama cuando el pedido no se encontró filtrando por dueño.
+    Distingue con un EXISTS si no existe (404) o si es de otro usuario (403).
+    """
+    existe = db.query(
+        db.query(Pedido).filter(Pedido.pedido_id == pedido_id).exists()
+    ).scalar()
+
+    if not existe:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pedido no encontrado"
+        )
+
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=detalle_permiso
+    )
 
 
 @router.get("/{token}/track", response_model=TrackPedidoResponse)
@@ -222,27 +321,12 @@ def rastrear_pedido(token: str, db: Session = Depends(get_db)):
     # Obtener nombre del delivery si está asignado
     nombre_delivery = None
     if pedido.delivery_asignado_id:
-        delivery = db.query(Usuario).filter(
+        nombre_delivery = db.query(Usuario.nombre_completo).filter(
             Usuario.usuario_id == pedido.delivery_asignado_id
-        ).first()
-        if delivery:
-            nombre_delivery = delivery.nombre_completo
+        ).scalar()
 
-    return TrackPedidoResponse(
-        pedido_id=pedido.pedido_id,
-        token_recoger=pedido.token_recoger,
-        estado=pedido.estado,
-        total_pedido=pedido.total_pedido,
-        metodo_pago=pedido.metodo_pago,
-        esta_pagado=pedido.esta_pagado,
-        fecha_pedido=pedido.fecha_pedido,
-        fecha_confirmado=pedido.fecha_confirmado,
-        fecha_listo_cocina=pedido.fecha_listo_cocina,
-        fecha_en_reparto=pedido.fecha_en_reparto,
-        fecha_entrega=pedido.fecha_entrega,
-        delivery_asignado_id=pedido.delivery_asignado_id,
-        nombre_delivery=nombre_delivery
-    )
+    return respuesta_json(construir_respuesta(
+        TrackPedidoResponse, pedido, nombre_delivery=nombre_delivery))
 
 
 @router.get("/{pedido_id}/detalle", response_model=PedidoDetalleResponse)
@@ -255,55 +339,42 @@ def obtener_detalle_pedido(
     Obtiene el detalle completo de un pedido con sus items y exclusiones.
     Solo el usuario dueño del pedido puede ver el detalle.
     """
-    pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
+    # Pedido con items, menú y exclusiones (con su ingrediente) en 3 consultas.
+    # Se filtra por dueño para no cargar items de pedidos ajenos
+    pedido = db.query(Pedido).options(
+        selectinload(Pedido.items).joinedload(PedidoItem.menu),
+        selectinload(Pedido.items).selectinload(
+            PedidoItem.exclusiones).joinedload(ItemExclusion.ingrediente)
+    ).filter(
+        Pedido.pedido_id == pedido_id,
+        Pedido.usuario_id == current_user.usuario_id
+    ).first()
 
     if not pedido:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Pedido no encontrado"
-        )
-
-    # Verificar que el pedido pertenezca al usuario
-    if pedido.usuario_id != current_user.usuario_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permiso para ver este pedido"
-        )
-
-    # Obtener items del pedido
-    items_pedido = db.query(PedidoItem).filter(
-        PedidoItem.pedido_id == pedido_id
-    ).all()
+        _pedido_no_disponible(
+            db, pedido_id, "No tienes permiso para ver este pedido")
 
     items_response = []
-    for item in items_pedido:
-        # Obtener menú
-        menu = db.query(MenuDia).filter(
-            MenuDia.menu_dia_id == item.menu_dia_id
-        ).first()
-
-        # Obtener exclusiones
-        exclusiones_ids = db.query(ItemExclusion).filter(
-            ItemExclusion.item_id == item.item_id
-        ).all()
-
-        exclusiones_nombres = []
-        for excl in exclusiones_ids:
-            ingrediente = db.query(Ingrediente).filter(
-                Ingrediente.ingrediente_id == excl.ingrediente_id
-            ).first()
-            if ingrediente:
-                exclusiones_nombres.append(ingrediente.nombre)
+    for item in pedido.items:
+        exclusiones_nombres = [
+            excl.ingrediente.nombre
+            for excl in item.exclusiones
+            if excl.ingrediente
+        ]
 
         items_response.append(ItemPedidoResponse(
             item_id=item.item_id,
             cantidad=item.cantidad,
             precio_unitario=item.precio_unitario,
-            menu=MenuDiaSimple.from_orm(menu) if menu else None,
+            menu=MenuDiaSimple(
+                menu_dia_id=item.menu.menu_dia_id,
+                fecha=item.menu.fecha,
+                precio_menu=item.menu.precio_menu
+            ) if item.menu else None,
             exclusiones=exclusiones_nombres
         ))
 
-    return PedidoDetalleResponse(
+    return PedidoDetalleResponse.model_construct(
         pedido_id=pedido.pedido_id,
         token_recoger=pedido.token_recoger,
         estado=pedido.estado,
@@ -335,20 +406,14 @@ def cancelar_pedido(
     Solo se puede cancelar si está en estado PENDIENTE.
     Devuelve el stock al menú.
     """
-    pedido = db.query(Pedido).filter(Pedido.pedido_id == pedido_id).first()
+    pedido = db.query(Pedido).filter(
+        Pedido.pedido_id == pedido_id,
+        Pedido.usuario_id == current_user.usuario_id
+    ).first()
 
     if not pedido:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Pedido no encontrado"
-        )
-
-    # Verificar que el pedido pertenezca al usuario
-    if pedido.usuario_id != current_user.usuario_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permiso para cancelar este pedido"
-        )
+        _pedido_no_disponible(
+            db, pedido_id, "No tienes permiso para cancelar este pedido")
 
     # Solo se puede cancelar si está pendiente
     if pedido.estado != EstadoDelPedido.PENDIENTE:
@@ -358,16 +423,7 @@ def cancelar_pedido(
         )
 
     # Devolver stock a los menús
-    items_pedido = db.query(PedidoItem).filter(
-        PedidoItem.pedido_id == pedido_id
-    ).all()
-
-    for item in items_pedido:
-        menu = db.query(MenuDia).filter(
-            MenuDia.menu_dia_id == item.menu_dia_id
-        ).first()
-        if menu:
-            menu.cantidad_disponible += item.cantidad
+    restaurar_stock_pedido(db, pedido_id)
 
     # Eliminar el pedido y sus items (cascada)
     db.delete(pedido)
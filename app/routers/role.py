@@ -3,8 +3,8 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
-from app.models.role import Role
 from app.schemas.role import RoleResponse
+from app.utils.cache_referencia import obtener_roles
 
 router = APIRouter(
     prefix="/roles",
@@ -16,6 +16,6 @@ router = APIRouter(
 def get_roles(db: Session = Depends(get_db)):
     """
     Obtener todos los roles disponibles en el sistema
+    (cacheados unos minutos, los roles casi no cambian)
     """
-    roles = db.query(Role).all()
-    return roles
+    return obtener_roles(db)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends
+from fastapi.concurrency import run_in_threadpool
 import cloudinary
 import cloudinary.uploader
 from app.config import settings
@@ -17,23 +18,90 @@ cloudinary.config(
     api_secret=settings.CLOUDINARY_API_SECRET
 )
 
+# Tamaño de cada parte enviada a Cloudinary (upload_large sube por partes)
+CLOUDINARY_CHUNK_SIZE = 6_000_000
+
+# Firmas (magic bytes) de los formatos de imagen reconocidos
+FIRMAS_IMAGEN = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+# HEIC/HEIF (cámara del iPhone) y AVIF: contenedor ISO con una caja
+# "ftyp" en los bytes 4-7 y la marca del formato en los bytes 8-11
+MARCAS_FTYP = {
+    b"heic": "image/heic", b"heix": "image/heic",
+    b"hevc": "image/heic", b"hevx": "image/heic",
+    b"heim": "image/heic", b"heis": "image/heic",
+    b"mif1": "image/heif", b"msf1": "image/heif",
+    b"avif": "image/avif", b"avis": "image/avif",
+}
+
+# Tipos que se reconocen por su firma: si el cliente declara uno de estos,
+# el contenido tiene que coincidir
+TIPOS_CON_FIRMA = (
+    {mime for _, mime in FIRMAS_IMAGEN} | set(MARCAS_FTYP.values()) | {"image/webp"}
+)
+
+
+def detectar_tipo_imagen(cabecera: bytes):
+    """
+    Detecta el tipo real de imagen a partir de los primeros bytes del archivo.
+    Retorna el MIME type o None si no coincide con ninguna firma conocida.
+    """
+    for firma, mime in FIRMAS_IMAGEN:
+        if cabecera.startswith(firma):
+            return mime
+    # WEBP: contenedor RIFF con "WEBP" en los bytes 8-11
+    if cabecera[:4] == b"RIFF" and cabecera[8:12] == b"WEBP":
+        return "image/webp"
+    if cabecera[4:8] == b"ftyp":
+        return MARCAS_FTYP.get(cabecera[8:12])
+    return None
+
 @router.post("/image", status_code=status.HTTP_201_CREATED, dependencies=[Depends(verificar_admin)])
 async def upload_image(file: UploadFile = File(...)):
     """
     Sube una imagen a Cloudinary y devuelve la URL segura.
     """
-    try:
-        # Validar tipo de archivo (opcional pero recomendado)
-        if not file.content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El archivo debe ser una imagen"
-            )
+    # Validar antes de enviar nada a Cloudinary
+    if file.size is not None and file.size > settings.MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"La imagen no puede superar {settings.MAX_UPLOAD_BYTES // (1024 * 1024)} MB"
+        )
 
+    # El content_type lo envía el cliente: se verifica el contenido real.
+    # Los formatos sin firma conocida (por ejemplo SVG) se aceptan como
+    # antes si el content_type es image/*, y Cloudinary decide
+    cabecera = await file.read(16)
+    await file.seek(0)
+    content_type = file.content_type or ""
+    if not detectar_tipo_imagen(cabecera) and (
+        not content_type.startswith("image/") or content_type in TIPOS_CON_FIRMA
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El archivo debe ser una imagen"
+        )
+
+    try:
         # Subir a Cloudinary
-        # file.file es un objeto SpooledTemporaryFile que Cloudinary puede leer
-        result = cloudinary.uploader.upload(file.file)
-        
+        # file.file es un objeto SpooledTemporaryFile que Cloudinary lee por
+        # partes; el SDK es síncrono, así que corre en el threadpool para no
+        # bloquear el event loop durante la subida
+        result = await run_in_threadpool(
+            cloudinary.uploader.upload_large,
+            file.file,
+            filename=file.filename,
+            chunk_size=CLOUDINARY_CHUNK_SIZE
+        )
+
         return {
             "url": result.get("secure_url"),
             "public_id": result.get("public_id")
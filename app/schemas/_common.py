@@ -0,0 +1,15 @@
+"""
+Schemas compartidos por varios módulos de schemas.
+Se definen una sola vez para no duplicar validadores ni entradas en el
+esquema OpenAPI.
+"""
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ZonaResponse(BaseModel):
+    """Response de una zona de delivery"""
+    zona_id: int
+    nombre_zona: str
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,100 @@
+"""
+Construcción rápida de schemas de respuesta a partir de objetos ORM.
+
+Los datos leídos de la base de datos ya vienen con los tipos correctos,
+así que se usa model_construct (sin validación) en lugar de model_validate.
+Solo tiene sentido en endpoints que retornan respuesta_json(...): si el
+endpoint retorna el schema y FastAPI lo pasa por response_model, este lo
+vuelve a validar igual. Los requests se siguen validando normalmente.
+"""
+
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple, Type, TypeVar
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict
+
+M = TypeVar("M", bound=BaseModel)
+
+# Config de los schemas de respuesta que arma el servidor: se leen de
+# objetos ORM y nunca se revalidan al anidarlos ni al asignar campos
+CONFIG_RESPUESTA = ConfigDict(
+    from_attributes=True,
+    revalidate_instances="never",
+    validate_assignment=False,
+    extra="ignore",
+)
+
+# (schema, tipo del objeto) -> (campos que se leen del objeto, lector,
+# campos obligatorios que el objeto no tiene). Se calcula en la primera
+# conversión y se reutiliza en las siguientes
+_CAMPOS: Dict[
+    Tuple[type, type],
+    Tuple[Tuple[str, ...], Optional[Callable], FrozenSet[str]]
+] = {}
+
+
+def _campos_de(
+    cls: Type[BaseModel], obj: Any
+) -> Tuple[Tuple[str, ...], Optional[Callable], FrozenSet[str]]:
+    clave = (cls, type(obj))
+    cache = _CAMPOS.get(clave)
+    if cache is None:
+        campos = tuple(campo for campo in cls.model_fields if hasattr(obj, campo))
+        faltantes = frozenset(
+            nombre for nombre, campo in cls.model_fields.items()
+            if campo.is_required() and nombre not in campos
+        )
+        cache = _CAMPOS[clave] = (
+            campos, attrgetter(*campos) if campos else None, faltantes)
+    return cache
+
+
+def construir_respuesta(cls: Type[M], obj: Any, **valores: Any) -> M:
+    """
+    Crea una instancia de cls con los atributos de obj, sin validar.
+
+    Los valores pasados por nombre reemplazan a los de obj (por ejemplo,
+    campos calculados o anidados). Los campos opcionales que obj no tiene
+    toman su valor por defecto; si falta uno obligatorio se lanza
+    ValueError en lugar de armar un schema incompleto.
+    """
+    campos, leer, faltantes = _campos_de(cls, obj)
+    if faltantes and not faltantes <= valores.keys():
+        raise ValueError(
+            f"{cls.__name__}: faltan campos obligatorios "
+            f"{sorted(faltantes - valores.keys())}"
+        )
+    if len(campos) == 1:
+        datos = {campos[0]: leer(obj)}
+    elif campos:
+        datos = dict(zip(campos, leer(obj)))
+    else:
+        datos = {}
+    datos.update(valores)
+    return cls.model_construct(**datos)
+
+
+def _serializar_extra(valor: Any) -> Any:
+    """Tipos que orjson no serializa por sí solo"""
+    if isinstance(valor, BaseModel):
+        return valor.model_dump()
+    if isinstance(valor, Decimal):
+        # Igual que pydantic: los Decimal van como string ("15.50")
+        return str(valor)
+    raise TypeError
+
+
+def respuesta_json(contenido: Any) -> Response:
+    """
+    Serializa schemas (o listas de schemas) directamente con orjson.
+    Al retornar un Response, FastAPI no vuelve a validar ni a convertir
+    el resultado con response_model (que queda solo para la documentación).
+    """
+    return Response(
+        content=orjson.dumps(
+            contenido, default=_serializar_extra, option=orjson.OPT_UTC_Z),
+        media_type="application/json"
+    )
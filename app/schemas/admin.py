@@ -1,9 +1,12 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from typing_extensions import TypedDict
 from datetime import date, datetime
 from decimal import Decimal
 
 from app.models.enums import TipoPlato, EstadoDelPedido, MetodoPago
+from app.schemas._common import ZonaResponse
+from app.schemas._fast import CONFIG_RESPUESTA
 
 
 # ========== MENÚ DEL DÍA ==========
@@ -22,6 +25,8 @@ class CrearMenuRequest(BaseModel):
     publicado: bool = Field(
         default=False, description="Si está visible para clientes")
 
+    model_config = ConfigDict(extra="forbid")
+
 
 class ActualizarMenuRequest(BaseModel):
     """Request para actualizar stock o precio de un menú"""
@@ -45,7 +50,7 @@ class MenuResponse(BaseModel):
     imagen_url: Optional[str]
     publicado: bool
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = CONFIG_RESPUESTA
 
 
 # ========== PLATOS ==========
@@ -54,6 +59,8 @@ class IngredienteEnPlatoRequest(BaseModel):
     """Ingrediente que forma parte de un plato"""
     ingrediente_id: int = Field(..., description="ID del ingrediente")
 
+    model_config = ConfigDict(extra="forbid")
+
 
 class CrearPlatoRequest(BaseModel):
     """Request para crear un nuevo plato"""
@@ -69,6 +76,8 @@ class CrearPlatoRequest(BaseModel):
         description="Lista de ingredientes del plato"
     )
 
+    model_config = ConfigDict(extra="forbid")
+
 
 class PlatoResponse(BaseModel):
     """Response de un plato"""
@@ -81,13 +90,11 @@ class PlatoResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-class IngredienteEnPlatoResponse(BaseModel):
-    """Response de ingrediente dentro de un plato (con cantidad)"""
+class IngredienteEnPlatoResponse(TypedDict):
+    """Ingrediente dentro de un plato (solo va anidado en PlatoDetalleResponse)"""
     ingrediente_id: int
     nombre: str
 
-    model_config = ConfigDict(from_attributes=True)
-
 
 class PlatoDetalleResponse(BaseModel):
     """Response detallado de un plato con sus ingredientes"""
@@ -96,9 +103,9 @@ class PlatoDetalleResponse(BaseModel):
     imagen_url: Optional[str]
     descripcion: Optional[str]
     tipo: TipoPlato
-    ingredientes: List[IngredienteEnPlatoResponse] = []
+    ingredientes: Tuple[IngredienteEnPlatoResponse, ...] = ()
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = CONFIG_RESPUESTA
 
 
 # ========== INGREDIENTES ==========
@@ -135,11 +142,16 @@ class CrearEmpleadoRequest(BaseModel):
     zona_reparto_id: Optional[int] = Field(
         None, description="ID de zona para Delivery")
 
+    # Schema poco usado: el validador se construye recién en el primer uso
+    model_config = ConfigDict(defer_build=True)
+
 
 class AsignarZonaRequest(BaseModel):
     """Request para asignar zona a un delivery"""
     zona_reparto_id: int = Field(..., description="ID de la zona a asignar")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class EmpleadoResponse(BaseModel):
     """Response de un empleado"""
@@ -186,7 +198,7 @@ class PedidoDashboardResponse(BaseModel):
     fecha_en_reparto: Optional[datetime]
     fecha_entrega: Optional[datetime]
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = CONFIG_RESPUESTA
 
 
 class ReasignarDeliveryRequest(BaseModel):
@@ -194,30 +206,48 @@ class ReasignarDeliveryRequest(BaseModel):
     nuevo_delivery_id: int = Field(...,
                                    description="ID del nuevo delivery a asignar")
 
+    model_config = ConfigDict(defer_build=True)
+
 
 class ActualizarEstadoPedidoRequest(BaseModel):
     """Request para actualizar el estado de un pedido manualmente"""
     estado: EstadoDelPedido = Field(..., description="Nuevo estado del pedido")
 
 
+# Formas fijas de los diccionarios de KPIs. Las claves son los valores de
+# los enums (tienen espacios), por eso se declaran con la sintaxis funcional
+PedidosPorEstado = TypedDict(
+    "PedidosPorEstado", {estado.value: int for estado in EstadoDelPedido})
+
+VentasPorMetodoPago = TypedDict(
+    "VentasPorMetodoPago", {metodo.value: float for metodo in MetodoPago}, total=False)
+
+
+class PedidoTiempoEntry(TypedDict):
+    """Pedido en el top de más rápidos / más lentos"""
+    pedido_id: int
+    token: str
+    minutos_total: float
+
+
 class KPIsResponse(BaseModel):
     """Response con KPIs y métricas del día"""
     fecha: date
     total_pedidos: int
-    pedidos_por_estado: dict
+    pedidos_por_estado: PedidosPorEstado
     ventas_totales: Decimal
-    ventas_por_metodo_pago: dict
+    ventas_por_metodo_pago: VentasPorMetodoPago
     tiempo_promedio_preparacion: Optional[float] = Field(
         None, description="Minutos promedio entre pedido y listo para cocina"
     )
     tiempo_promedio_entrega: Optional[float] = Field(
         None, description="Minutos promedio entre pedido y entrega"
     )
-    pedidos_mas_rapidos: List[dict] = Field(
-        default_factory=list, description="Top 5 pedidos más rápidos"
+    pedidos_mas_rapidos: Tuple[PedidoTiempoEntry, ...] = Field(
+        (), description="Top 5 pedidos más rápidos"
     )
-    pedidos_mas_lentos: List[dict] = Field(
-        default_factory=list, description="Top 5 pedidos más lentos"
+    pedidos_mas_lentos: Tuple[PedidoTiempoEntry, ...] = Field(
+        (), description="Top 5 pedidos más lentos"
     )
 
 
@@ -234,10 +264,4 @@ class ActualizarZonaRequest(BaseModel):
     nombre_zona: str = Field(..., min_length=1, max_length=100,
                              description="Nuevo nombre de la zona")
 
-
-class ZonaResponse(BaseModel):
-    """Response de una zona de delivery"""
-    zona_id: int
-    nombre_zona: str
-
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(defer_build=True)
@@ -1,12 +1,32 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
 
+__all__ = [
+    "LoginRequest",
+    "RegisterRequest",
+    "TokenResponse",
+    "UserResponse",
+    "ActualizarPerfilRequest",
+    "CambiarPasswordRequest",
+]
+
 
 class LoginRequest(BaseModel):
     """Schema para la solicitud de login"""
-    email: EmailStr
+    # El login solo busca el email exacto en la base de datos, así que no
+    # hace falta la validación completa de EmailStr (se usa en el registro)
+    email: str = Field(..., max_length=254)
     password: str = Field(..., min_length=6)
 
+    @field_validator("email")
+    @classmethod
+    def validar_email(cls, v: str) -> str:
+        """Chequeo liviano del formato; normaliza el dominio como EmailStr"""
+        usuario, arroba, dominio = v.strip().rpartition("@")
+        if not arroba or not usuario or "." not in dominio:
+            raise ValueError("Email inválido")
+        return f"{usuario}@{dominio.lower()}"
+
 
 class RegisterRequest(BaseModel):
     """Schema para el registro de un nuevo usuario (Cliente)"""
@@ -1,29 +1,19 @@
 from pydantic import BaseModel
 from typing import Optional
+from typing_extensions import TypedDict
 from decimal import Decimal
 from datetime import date
 from app.models.enums import TipoPlato
+from app.schemas._common import ZonaResponse
 
 
-class ZonaResponse(BaseModel):
-    """Schema para la respuesta de zonas de delivery"""
-    zona_id: int
-    nombre_zona: str
-
-    class Config:
-        from_attributes = True
-
-
-class PlatoSimpleResponse(BaseModel):
-    """Schema simplificado de plato para el menú"""
+class PlatoSimpleResponse(TypedDict):
+    """Schema simplificado de plato para el menú (solo va anidado)"""
     plato_id: int
     nombre: str
     descripcion: Optional[str]
     tipo: TipoPlato
 
-    class Config:
-        from_attributes = True
-
 
 
 class IngredienteResponse(BaseModel):
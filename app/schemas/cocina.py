@@ -1,19 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
+from typing_extensions import TypedDict
 from decimal import Decimal
 from datetime import datetime, date
 from app.models.enums import EstadoDelPedido
+from app.schemas._fast import CONFIG_RESPUESTA
 
 
-class ExclusionCocina(BaseModel):
-    """Exclusión de ingrediente para mostrar en cocina"""
-    ingrediente_nombre: str
+# Los schemas que solo van anidados en otras respuestas son TypedDict:
+# se arman como diccionarios y no crean un modelo por cada elemento
 
-    class Config:
-        from_attributes = True
-
-
-class ItemCocina(BaseModel):
+class ItemCocina(TypedDict):
     """Item del pedido para cocina con exclusiones destacadas"""
     item_id: int
     cantidad: int
@@ -22,10 +19,7 @@ class ItemCocina(BaseModel):
     bebida: str
     postre: str
     # Exclusiones claramente visibles (ej: "Sin cebolla", "Sin ají")
-    exclusiones: List[str] = []
-
-    class Config:
-        from_attributes = True
+    exclusiones: List[str]
 
 
 class PedidoCocinaResponse(BaseModel):
@@ -45,16 +39,43 @@ class PedidoCocinaResponse(BaseModel):
     # Tiempo transcurrido (útil para KPIs)
     minutos_desde_pedido: Optional[int] = None
 
-    class Config:
-        from_attributes = True
+    model_config = CONFIG_RESPUESTA
+
+
+class PedidoCocinaColumnasResponse(BaseModel):
+    """
+    Pedido para cocina con los items en columnas: la posición i de cada
+    lista corresponde al mismo item (ej: cantidades[i] de platos_principales[i])
+    """
+    pedido_id: int
+    token_recoger: str
+    estado: EstadoDelPedido
+    fecha_pedido: Optional[datetime]
+
+    # Info del cliente
+    cliente_nombre: str
+    cliente_telefono: Optional[str]
+
+    # Items
+    item_ids: List[int]
+    cantidades: List[int]
+    menu_fechas: List[date]
+    platos_principales: List[str]
+    bebidas: List[str]
+    postres: List[str]
+    exclusiones: List[List[str]]
+
+    # Tiempo transcurrido (útil para KPIs)
+    minutos_desde_pedido: Optional[int] = None
+
+    model_config = CONFIG_RESPUESTA
 
 
 class CambiarEstadoCocinaRequest(BaseModel):
     """Request para cambiar el estado de un pedido desde cocina"""
     nuevo_estado: EstadoDelPedido
 
-    class Config:
-        use_enum_values = True
+    model_config = ConfigDict(use_enum_values=True, defer_build=True)
 
 
 class EstadisticasCocinaResponse(BaseModel):
@@ -66,3 +87,5 @@ class EstadisticasCocinaResponse(BaseModel):
     pedido_mas_rapido: Optional[int] = None  # minutos
     pedido_mas_lento: Optional[int] = None  # minutos
     platos_preparados: int
+
+    model_config = ConfigDict(defer_build=True)
@@ -1,8 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from decimal import Decimal
 from datetime import datetime, date
 from app.models.enums import EstadoDelPedido, MetodoPago
+from app.schemas._fast import CONFIG_RESPUESTA
 
 
 class EntregaDeliveryResponse(BaseModel):
@@ -36,8 +37,7 @@ class EntregaDeliveryResponse(BaseModel):
     # Tiempo transcurrido
     minutos_desde_listo: Optional[int] = None
 
-    class Config:
-        from_attributes = True
+    model_config = CONFIG_RESPUESTA
 
 
 class FinalizarEntregaRequest(BaseModel):
@@ -58,3 +58,5 @@ class EstadisticasDeliveryResponse(BaseModel):
     ingresos_del_dia: Decimal  # suma de pedidos entregados
     entrega_mas_rapida: Optional[int] = None  # minutos
     entrega_mas_lenta: Optional[int] = None  # minutos
+
+    model_config = ConfigDict(defer_build=True)
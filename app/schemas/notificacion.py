@@ -2,7 +2,7 @@
 Schemas para el sistema de notificaciones
 """
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional, Dict, Any
 
@@ -26,8 +26,13 @@ class ContadorEventosResponse(BaseModel):
     eventos_por_tipo: Dict[str, int]
 
 
+class CursorNotificacionesResponse(BaseModel):
+    """Schema para el cursor de notificaciones (último evento visible)"""
+    seq: int
+
+
 class NotificarLlegadaRequest(BaseModel):
     """Schema para endpoint de notificar llegada del delivery"""
-    latitud: float
-    longitud: float
-    mensaje_adicional: Optional[str] = None
+    latitud: float = Field(..., ge=-90.0, le=90.0)
+    longitud: float = Field(..., ge=-180.0, le=180.0)
+    mensaje_adicional: Optional[str] = Field(None, max_length=200)
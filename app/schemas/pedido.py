@@ -1,13 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
+from typing_extensions import TypedDict
 from decimal import Decimal
 from datetime import datetime, date
 from app.models.enums import EstadoDelPedido, MetodoPago
-
-
-class ExclusionRequest(BaseModel):
-    """Schema para las exclusiones de ingredientes en un item"""
-    ingrediente_id: int
+from app.schemas._fast import CONFIG_RESPUESTA
 
 
 class ItemPedidoRequest(BaseModel):
@@ -17,6 +14,9 @@ class ItemPedidoRequest(BaseModel):
     exclusiones: List[int] = Field(
         default_factory=list, description="IDs de ingredientes a excluir")
 
+    # Campos desconocidos se rechazan (422) en lugar de ignorarse
+    model_config = ConfigDict(extra="forbid")
+
 
 class CrearPedidoRequest(BaseModel):
     """Schema para crear un nuevo pedido"""
@@ -28,28 +28,26 @@ class CrearPedidoRequest(BaseModel):
     metodo_pago: MetodoPago
     items: List[ItemPedidoRequest] = Field(min_length=1)
 
+    model_config = ConfigDict(extra="forbid")
+
 
-class MenuDiaSimple(BaseModel):
+# Los schemas que solo van anidados en otras respuestas son TypedDict:
+# se arman como diccionarios y no crean un modelo por cada elemento
+
+class MenuDiaSimple(TypedDict):
     """Schema simplificado del menú del día para respuestas"""
     menu_dia_id: int
     fecha: date
     precio_menu: Decimal
 
-    class Config:
-        from_attributes = True
 
-
-class ItemPedidoResponse(BaseModel):
+class ItemPedidoResponse(TypedDict):
     """Schema para la respuesta de items del pedido"""
     item_id: int
     cantidad: int
     precio_unitario: Decimal
-    menu: MenuDiaSimple
-    exclusiones: List[str] = Field(
-        default_factory=list, description="Nombres de ingredientes excluidos")
-
-    class Config:
-        from_attributes = True
+    menu: Optional[MenuDiaSimple]
+    exclusiones: List[str]  # Nombres de ingredientes excluidos
 
 
 class PedidoResponse(BaseModel):
@@ -128,5 +126,4 @@ class PedidoDetalleResponse(BaseModel):
     fecha_entrega: Optional[datetime]
     items: List[ItemPedidoResponse]
 
-    class Config:
-        from_attributes = True
+    model_config = CONFIG_RESPUESTA
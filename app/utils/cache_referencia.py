@@ -0,0 +1,70 @@
+"""
+Cache en memoria para tablas de referencia pequeñas (zonas y roles).
+Cambian muy poco, así que se guardan unos minutos para no consultarlas
+en cada request. Los endpoints de administración invalidan la cache.
+"""
+
+from typing import List, Optional
+from cachetools import TTLCache
+from sqlalchemy.orm import Session
+import threading
+
+from app.models.role import Role
+from app.models.zona_delivery import ZonaDelivery
+
+TTL_SEGUNDOS = 300
+
+# zona_id -> nombre_zona
+_zonas = TTLCache(maxsize=256, ttl=TTL_SEGUNDOS)
+
+# Lista completa de roles como (rol_id, nombre_rol)
+_roles = TTLCache(maxsize=1, ttl=TTL_SEGUNDOS)
+
+_lock = threading.Lock()
+
+
+def obtener_nombre_zona(db: Session, zona_id: int) -> Optional[str]:
+    """
+    Retorna el nombre de la zona o None si no existe.
+    Las zonas inexistentes no se cachean.
+    """
+    with _lock:
+        nombre = _zonas.get(zona_id)
+    if nombre is not None:
+        return nombre
+
+    fila = db.query(ZonaDelivery.nombre_zona).filter(
+        ZonaDelivery.zona_id == zona_id).first()
+    if not fila:
+        return None
+
+    with _lock:
+        _zonas[zona_id] = fila.nombre_zona
+    return fila.nombre_zona
+
+
+def invalidar_zona(zona_id: Optional[int] = None):
+    """Elimina una zona de la cache (o todas si no se indica zona_id)"""
+    with _lock:
+        if zona_id is None:
+            _zonas.clear()
+        else:
+            _zonas.pop(zona_id, None)
+
+
+def obtener_roles(db: Session) -> List[dict]:
+    """Retorna todos los roles como diccionarios {rol_id, nombre_rol}"""
+    with _lock:
+        roles = _roles.get("roles")
+    if roles is not None:
+        return roles
+
+    roles = [
+        {"rol_id": rol_id, "nombre_rol": nombre_rol}
+        for rol_id, nombre_rol in db.query(Role.rol_id, Role.nombre_rol).order_by(Role.rol_id)
+    ]
+
+    with _lock:
+        _roles["roles"] = roles
+    return roles
+
@@ -1,12 +1,30 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
+from cachetools import TTLCache
+from operator import attrgetter
+import threading
+import time
 from app.database import get_db
 from app.models.usuario import Usuario
 from app.utils.security import decode_access_token
 
 security = HTTPBearer()
 
+# Cache corta token -> (exp del token, datos del usuario). Los paneles de
+# cocina y delivery hacen polling con el mismo token, así que se evita
+# decodificar el JWT y consultar la tabla de usuarios en cada request
+_USUARIO_CACHE_TTL_SEGUNDOS = 30
+_cache_usuarios = TTLCache(maxsize=10_000, ttl=_USUARIO_CACHE_TTL_SEGUNDOS)
+_cache_usuarios_lock = threading.Lock()
+
+# Columnas que se guardan en la cache (nunca el password_hash: si se
+# necesita, se carga de la base de datos al accederlo)
+_COLUMNAS_CACHE = (
+    "usuario_id", "rol_id", "email", "nombre_completo", "telefono", "zona_reparto_id"
+)
+_leer_columnas_cache = attrgetter(*_COLUMNAS_CACHE)
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -27,6 +45,22 @@ def get_current_user(
     """
     token = credentials.credentials
 
+    with _cache_usuarios_lock:
+        cache = _cache_usuarios.get(token)
+
+    if cache is not None:
+        exp, datos = cache
+        if time.time() < exp:
+            # Se reconstruye el usuario y se asocia a la sesión del request
+            # sin consultar la base de datos (los cambios se siguen guardando)
+            usuario = Usuario(**dict(zip(_COLUMNAS_CACHE, datos)))
+            make_transient_to_detached(usuario)
+            return db.merge(usuario, load=False)
+
+        # El token venció mientras estaba en la cache
+        with _cache_usuarios_lock:
+            _cache_usuarios.pop(token, None)
+
     # Decodificar el token
     payload = decode_access_token(token)
     if not payload:
@@ -46,8 +80,7 @@ def get_current_user(
         )
 
     # Buscar el usuario en la base de datos
-    usuario = db.query(Usuario).filter(
-        Usuario.usuario_id == usuario_id).first()
+    usuario = db.get(Usuario, int(usuario_id))
     if not usuario:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -55,9 +88,26 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    with _cache_usuarios_lock:
+        _cache_usuarios[token] = (payload["exp"], _leer_columnas_cache(usuario))
+
     return usuario
 
 
+def invalidar_usuario(usuario_id: int):
+    """
+    Elimina de la cache los tokens de un usuario.
+    Debe llamarse al modificar o eliminar el usuario.
+    """
+    with _cache_usuarios_lock:
+        tokens = [
+            token for token, (_, datos) in list(_cache_usuarios.items())
+            if datos[0] == usuario_id
+        ]
+        for token in tokens:
+            _cache_usuarios.pop(token, None)
+
+
 def verificar_admin(current_user: Usuario = Depends(get_current_user)):
     """Verifica que el usuario sea administrador"""
     if current_user.rol_id != 1:  # 1 = Administrador
@@ -65,3 +115,24 @@ def verificar_admin(current_user: Usuario = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Solo los administradores pueden acceder a esta sección"
         )
+
+
+def require_roles(*roles: int, detail: str = "No tienes permiso para acceder a este endpoint"):
+    """
+    Crea una dependency que exige que el usuario tenga alguno de los roles.
+    Retorna el usuario autenticado, así que puede reemplazar a get_current_user.
+
+    Uso: current_user: Usuario = Depends(require_roles(1, 2))
+    """
+    roles_permitidos = frozenset(roles)
+
+    def verificar_roles(current_user: Usuario = Depends(get_current_user)) -> Usuario:
+        if current_user.rol_id not in roles_permitidos:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=detail
+            )
+        return current_user
+
+    return verificar_roles
+
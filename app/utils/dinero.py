@@ -0,0 +1,29 @@
+"""
+Utilidades para montos de dinero.
+
+Los precios y totales se guardan con 2 decimales (Numeric(10, 2)). Para
+acumular muchos montos se trabaja en centavos enteros y se convierte a
+Decimal una sola vez al final, en lugar de operar con Decimal en cada paso.
+Las respuestas de la API siguen usando Decimal ("15.50"), no centavos.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable
+
+
+def a_centavos(monto: Decimal) -> int:
+    """
+    Convierte un monto a centavos enteros.
+    Si tiene más de 2 decimales se redondea (15.505 -> 1551), no se trunca.
+    """
+    return int(monto.scaleb(2).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def desde_centavos(centavos: int) -> Decimal:
+    """Convierte centavos enteros a Decimal con 2 decimales (ej: 1550 -> 15.50)"""
+    return Decimal(centavos).scaleb(-2)
+
+
+def sumar_montos(montos: Iterable[Decimal]) -> Decimal:
+    """Suma montos acumulando en centavos enteros"""
+    return desde_centavos(sum(map(a_centavos, montos)))
@@ -0,0 +1,18 @@
+"""
+Utilidades para filtros de fechas en consultas.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Tuple
+
+
+def rango_del_dia(fecha: date) -> Tuple[datetime, datetime]:
+    """
+    Retorna el rango [inicio, fin) de un día completo.
+
+    Permite filtrar con `columna >= inicio AND columna < fin` en lugar de
+    `func.date(columna) == fecha`, de modo que la consulta pueda usar los
+    índices sobre la columna.
+    """
+    inicio = datetime.combine(fecha, time.min)
+    return inicio, inicio + timedelta(days=1)
@@ -2,42 +2,33 @@
 Sistema de logging configurado para la aplicación.
 """
 
+import atexit
+import functools
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-from datetime import datetime
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# Crear directorio de logs si no existe
 LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+
+# Los logs en archivo se pueden desactivar (tests, scripts) con
+# SOLANDRE_FILE_LOG=0: así no se crea logs/ ni se abren archivos
+FILE_LOG = os.getenv("SOLANDRE_FILE_LOG", "1") != "0"
 
 # Configurar formato de logs
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
+# Un solo formatter compartido por los handlers de archivo
+_FMT = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+
 # Crear logger principal
 logger = logging.getLogger("solandre")
 logger.setLevel(logging.INFO)
-
-# Handler para archivo (rotativo - máximo 10MB, mantener 10 archivos)
-file_handler = RotatingFileHandler(
-    os.path.join(LOG_DIR, "app.log"),
-    maxBytes=10485760,  # 10MB
-    backupCount=10,
-    encoding='utf-8'
-)
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
-
-# Handler para archivo de errores (solo errores y críticos)
-error_handler = RotatingFileHandler(
-    os.path.join(LOG_DIR, "error.log"),
-    maxBytes=10485760,  # 10MB
-    backupCount=10,
-    encoding='utf-8'
-)
-error_handler.setLevel(logging.ERROR)
-error_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+# Sin propagar al logger raíz: evita que el mismo registro se emita dos
+# veces si algún handler de root está configurado
+logger.propagate = False
 
 # Handler para consola (solo en desarrollo)
 console_handler = logging.StreamHandler()
@@ -46,11 +37,91 @@ console_handler.setFormatter(logging.Formatter(
     '%(levelname)s: %(message)s'
 ))
 
-# Agregar handlers
-logger.addHandler(file_handler)
-logger.addHandler(error_handler)
 logger.addHandler(console_handler)
 
+# Registros pendientes de escribir en los archivos de log
+_cola_archivos: queue.Queue = queue.Queue(-1)
+
+
+@functools.cache
+def _listener_archivos() -> QueueListener:
+    """
+    Crea los handlers de archivo la primera vez que se necesitan (con el
+    primer registro o en el startup de la app).
+
+    Los archivos se escriben en un hilo aparte: en el request solo se
+    encola el registro, sin esperar al disco ni al lock de los handlers.
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    # Handler para archivo (rotativo - máximo 10MB, mantener 10 archivos)
+    file_handler = RotatingFileHandler(
+        os.path.join(LOG_DIR, "app.log"),
+        maxBytes=10485760,  # 10MB
+        backupCount=10,
+        encoding='utf-8'
+    )
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(_FMT)
+
+    # Handler para archivo de errores (solo errores y críticos)
+    error_handler = RotatingFileHandler(
+        os.path.join(LOG_DIR, "error.log"),
+        maxBytes=10485760,  # 10MB
+        backupCount=10,
+        encoding='utf-8'
+    )
+    error_handler.setLevel(logging.ERROR)
+    error_handler.setFormatter(_FMT)
+
+    return QueueListener(
+        _cola_archivos, file_handler, error_handler, respect_handler_level=True)
+
+
+# Estado del hilo de los archivos (QueueListener no expone si está corriendo)
+_listener_lock = threading.Lock()
+_listener_activo = False
+
+
+def iniciar_logging():
+    """
+    Inicia el hilo que escribe los logs en archivo. Arranca solo con el
+    primer registro; el startup de la app lo llama antes para no abrir
+    los archivos durante el primer request.
+    """
+    global _listener_activo
+    if not FILE_LOG or _listener_activo:
+        return
+    with _listener_lock:
+        if not _listener_activo:
+            _listener_archivos().start()
+            _listener_activo = True
+
+
+def detener_logging():
+    """Escribe los logs pendientes y detiene el hilo (shutdown de la app)"""
+    global _listener_activo
+    with _listener_lock:
+        if _listener_activo:
+            _listener_archivos().stop()
+            _listener_activo = False
+
+
+class _ColaArchivos(QueueHandler):
+    """Encola los registros para los archivos y arranca el hilo si hace falta"""
+
+    def emit(self, record: logging.LogRecord):
+        iniciar_logging()
+        super().emit(record)
+
+
+if FILE_LOG:
+    # Cualquier uso del logger (la app, add_indexes.py, los scripts de
+    # verificación) escribe en los archivos; al salir se escriben los
+    # registros pendientes
+    logger.addHandler(_ColaArchivos(_cola_archivos))
+    atexit.register(detener_logging)
+
 
 def log_request(method: str, path: str, status_code: int, duration: float):
     """Log de requests HTTP"""
@@ -4,13 +4,23 @@ No requiere base de datos, almacena eventos temporalmente en memoria.
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from collections import deque
-from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from itertools import count, islice
+from operator import attrgetter
+import asyncio
+import bisect
+import heapq
 import threading
+import time
 
+import orjson
+from cachetools import TTLCache
 
-@dataclass
+
+@dataclass(slots=True)
 class Evento:
     """Representa un evento/notificación del sistema"""
     evento_id: str
@@ -21,13 +31,160 @@ class Evento:
     titulo: str
     mensaje: str
     data: dict  # Información adicional (pedido_id, etc.)
-    fecha_creacion: datetime
+    # Microsegundos desde epoch: se compara como entero y solo se
+    # convierte a datetime al serializar
+    creado_us: int
+    # JSON ya serializado con los campos de EventoResponse (ver to_json_bytes)
+    _json_bytes: Optional[bytes] = field(
+        default=None, init=False, repr=False, compare=False)
+
+    @property
+    def fecha_creacion(self) -> datetime:
+        """Fecha de creación en hora local (como datetime.now())"""
+        return datetime.fromtimestamp(self.creado_us // 1_000_000).replace(
+            microsecond=self.creado_us % 1_000_000)
 
     def to_dict(self):
         """Convierte el evento a diccionario para JSON"""
-        result = asdict(self)
-        result['fecha_creacion'] = self.fecha_creacion.isoformat()
-        return result
+        return {
+            "evento_id": self.evento_id,
+            "tipo": self.tipo,
+            "destinatario_rol": self.destinatario_rol,
+            "destinatario_id": self.destinatario_id,
+            "titulo": self.titulo,
+            "mensaje": self.mensaje,
+            "data": self.data,
+            "fecha_creacion": self.fecha_creacion.isoformat()
+        }
+
+    def serializar(self) -> bytes:
+        """JSON del evento con los campos de EventoResponse"""
+        return orjson.dumps({
+            "evento_id": self.evento_id,
+            "tipo": self.tipo,
+            "titulo": self.titulo,
+            "mensaje": self.mensaje,
+            "data": self.data,
+            "fecha_creacion": self.fecha_creacion
+        }, default=str)
+
+    def to_json_bytes(self) -> bytes:
+        """
+        JSON del evento con los campos de EventoResponse. Se arma la primera
+        vez que se pide (fuera del lock de publicación) y se reutiliza en
+        cada consulta y en cada cliente del stream.
+        """
+        if self._json_bytes is None:
+            self._json_bytes = self.serializar()
+        return self._json_bytes
+
+
+@dataclass(eq=False, slots=True)
+class Suscripcion:
+    """Cliente conectado al stream de notificaciones (SSE)"""
+    rol_id: int
+    usuario_id: Optional[int]
+    cola: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+
+    def recibe(self, evento: Evento) -> bool:
+        """Indica si el evento va dirigido a este cliente"""
+        if evento.destinatario_rol != self.rol_id:
+            return False
+        return evento.destinatario_id is None or evento.destinatario_id == self.usuario_id
+
+    def encolar(self, evento: Evento):
+        """
+        Agrega el evento a la cola del cliente (corre en su event loop).
+        Si el cliente no consume y la cola está llena, se descarta el evento
+        más antiguo: un EventSource lento no hace crecer la memoria.
+        """
+        if self.cola.full():
+            self.cola.get_nowait()
+        self.cola.put_nowait(evento)
+
+
+_CREADO_US = attrgetter("creado_us")
+
+# Ventana por defecto de las consultas: últimos 5 minutos
+_VENTANA_DEFECTO_US = 5 * 60 * 1_000_000
+
+# Eventos pendientes por cliente del stream antes de descartar los más viejos
+_MAX_COLA_SUSCRIPCION = 100
+
+
+def _ahora_us() -> int:
+    """Hora actual en microsegundos desde epoch"""
+    return time.time_ns() // 1000
+
+
+def _a_microsegundos(fecha: datetime) -> int:
+    """Convierte un datetime (naive = hora local) a microsegundos desde epoch"""
+    return int(fecha.replace(microsecond=0).timestamp()) * 1_000_000 + fecha.microsecond
+
+
+class _IndiceEventos:
+    """
+    Eventos de un índice en orden de creación, con sus horas en una lista
+    paralela. 'desde' se ubica con bisect sobre esa lista (O(log n); sobre
+    un deque cada acceso hacia el medio es O(n)).
+
+    Los eventos más viejos (vencidos o por encima de max_eventos) se
+    descartan avanzando 'inicio'. Las listas se compactan cuando la parte
+    descartada supera la mitad, así cada evento se copia una vez en promedio.
+    """
+
+    __slots__ = ("_eventos", "_tiempos", "_inicio", "_max_eventos")
+
+    def __init__(self, max_eventos: int):
+        self._eventos: List[Evento] = []
+        self._tiempos: List[int] = []
+        self._inicio = 0
+        self._max_eventos = max_eventos
+
+    def __len__(self) -> int:
+        return len(self._eventos) - self._inicio
+
+    def __iter__(self) -> Iterator[Evento]:
+        return islice(self._eventos, self._inicio, None)
+
+    @property
+    def ultimo_us(self) -> int:
+        """Hora del evento más reciente (0 si está vacío)"""
+        return self._tiempos[-1] if len(self) else 0
+
+    def agregar(self, evento: Evento):
+        """Agrega un evento; su creado_us no puede ser menor que ultimo_us"""
+        self._eventos.append(evento)
+        self._tiempos.append(evento.creado_us)
+        if len(self) > self._max_eventos:
+            self._descartar(1)
+
+    def descartar_anteriores(self, limite_us: int) -> int:
+        """Descarta los eventos creados antes de limite_us y retorna cuántos"""
+        primero = bisect.bisect_left(self._tiempos, limite_us, self._inicio)
+        cantidad = primero - self._inicio
+        if cantidad:
+            self._descartar(cantidad)
+        return cantidad
+
+    def cantidad_desde(self, desde_us: int) -> int:
+        """Cantidad de eventos creados desde desde_us"""
+        return len(self._tiempos) - bisect.bisect_left(
+            self._tiempos, desde_us, self._inicio)
+
+    def desde(self, desde_us: int) -> Iterator[Evento]:
+        """Eventos creados desde desde_us, del más reciente al más antiguo"""
+        primero = bisect.bisect_left(self._tiempos, desde_us, self._inicio)
+        eventos = self._eventos
+        return (eventos[i] for i in range(len(eventos) - 1, primero - 1, -1))
+
+    def _descartar(self, cantidad: int):
+        self._inicio += cantidad
+        if self._inicio * 2 >= len(self._eventos):
+            del self._eventos[:self._inicio]
+            del self._tiempos[:self._inicio]
+            self._inicio = 0
 
 
 class GestorNotificaciones:
@@ -36,26 +193,57 @@ class GestorNotificaciones:
     Mantiene los últimos eventos durante 1 hora.
     """
 
-    def __init__(self, max_eventos: int = 1000, tiempo_vida_minutos: int = 60):
+    def __init__(
+        self,
+        max_eventos: int = 1000,
+        tiempo_vida_minutos: int = 60,
+        max_usuarios: int = 10_000
+    ):
         self.max_eventos = max_eventos
         self.tiempo_vida = timedelta(minutes=tiempo_vida_minutos)
-
-        # Almacenamiento por rol (para consultas rápidas)
-        self.eventos_por_rol: Dict[int, deque] = {
-            1: deque(maxlen=max_eventos),  # Admin
-            2: deque(maxlen=max_eventos),  # Cocina
-            3: deque(maxlen=max_eventos),  # Delivery
-            4: deque(maxlen=max_eventos),  # Cliente
+        self._tiempo_vida_us = tiempo_vida_minutos * 60 * 1_000_000
+
+        # Eventos broadcast por rol (destinatario_id = None)
+        self.eventos_por_rol: Dict[int, _IndiceEventos] = {
+            1: _IndiceEventos(max_eventos),  # Admin
+            2: _IndiceEventos(max_eventos),  # Cocina
+            3: _IndiceEventos(max_eventos),  # Delivery
+            4: _IndiceEventos(max_eventos),  # Cliente
         }
 
-        # Almacenamiento por usuario específico
-        self.eventos_por_usuario: Dict[int, deque] = {}
+        # Los mismos eventos broadcast, separados por rol y tipo: las
+        # consultas filtradas por tipo no recorren eventos de otros tipos
+        self.eventos_por_rol_tipo: Dict[int, Dict[str, _IndiceEventos]] = {
+            rol_id: {} for rol_id in self.eventos_por_rol
+        }
 
-        # Lock para thread-safety
-        self._lock = threading.Lock()
+        # Eventos personales indexados por (rol, usuario_id). Cada usuario
+        # vence tiempo_vida después de su último evento, así que los que ya
+        # no reciben notificaciones se liberan solos, sin limpieza manual
+        self.eventos_por_usuario: TTLCache = TTLCache(
+            maxsize=max_usuarios, ttl=self.tiempo_vida.total_seconds())
+
+        # Versión de cada índice: número del último evento que recibió.
+        # Permite cachear consultas sin tener que invalidarlas a mano
+        self._versiones: Dict[Tuple[int, Optional[int]], int] = {}
+        self._limpiezas = 0
+        self._contador_limpiezas = count(1)
+
+        # Clientes conectados al stream (reciben los eventos al crearse).
+        # Es una tupla que se reemplaza al suscribir/desuscribir, así que
+        # se puede recorrer sin tomar el lock
+        self._suscripciones: Tuple[Suscripcion, ...] = ()
+
+        # Un lock por rol para los eventos broadcast y otro para los
+        # personales: publicar a un rol no bloquea a los demás
+        self._locks_rol: Dict[int, threading.Lock] = {
+            rol_id: threading.Lock() for rol_id in self.eventos_por_rol
+        }
+        self._lock_usuarios = threading.Lock()
+        self._lock_suscripciones = threading.Lock()
 
-        # Contador para IDs únicos
-        self._contador = 0
+        # Contador para IDs únicos (next() es atómico)
+        self._contador = count(1)
 
     def crear_evento(
         self,
@@ -80,32 +268,170 @@ class GestorNotificaciones:
         Returns:
             El evento creado
         """
-        with self._lock:
-            self._contador += 1
-            evento_id = f"evt_{self._contador}_{int(datetime.now().timestamp())}"
-
-            evento = Evento(
-                evento_id=evento_id,
-                tipo=tipo,
-                destinatario_rol=destinatario_rol,
-                destinatario_id=destinatario_id,
-                titulo=titulo,
-                mensaje=mensaje,
-                data=data or {},
-                fecha_creacion=datetime.now()
+        if destinatario_id:
+            lock = self._lock_usuarios
+        else:
+            lock = self._locks_rol[destinatario_rol]
+
+        with lock:
+            # Número y hora se toman con el lock del índice, así quedan en
+            # orden dentro de cada índice
+            evento = self._guardar(
+                next(self._contador), _ahora_us(), tipo, destinatario_rol,
+                titulo, mensaje, data or {}, destinatario_id
             )
 
-            # Guardar por rol
-            self.eventos_por_rol[destinatario_rol].append(evento)
+        self._publicar(evento)
+        return evento
+
+    def crear_evento_broadcast(
+        self,
+        tipo: str,
+        roles: List[int],
+        titulo_por_rol: Dict[int, str],
+        mensaje_por_rol: Dict[int, str],
+        data: dict = None
+    ) -> List[Evento]:
+        """
+        Crea el mismo evento para varios roles a la vez (un evento por rol,
+        con su propio título y mensaje). Todos comparten la hora de creación
+        y el diccionario data.
+
+        Returns:
+            Los eventos creados, en el orden de roles
+        """
+        data = data or {}
+        with ExitStack() as locks:
+            # Siempre en el mismo orden, para no bloquearse con otra
+            # publicación a varios roles
+            for rol_id in sorted(set(roles)):
+                locks.enter_context(self._locks_rol[rol_id])
+
+            # Misma hora para todos los roles, sin retroceder en ninguno
+            creado_us = max(
+                _ahora_us(), *(self.eventos_por_rol[r].ultimo_us for r in roles))
+            eventos = [
+                self._guardar(
+                    next(self._contador), creado_us, tipo, rol_id,
+                    titulo_por_rol[rol_id], mensaje_por_rol[rol_id], data
+                )
+                for rol_id in roles
+            ]
+
+        for evento in eventos:
+            self._publicar(evento)
+        return eventos
 
-            # Si es para usuario específico, guardar también ahí
-            if destinatario_id:
-                if destinatario_id not in self.eventos_por_usuario:
-                    self.eventos_por_usuario[destinatario_id] = deque(
-                        maxlen=self.max_eventos)
-                self.eventos_por_usuario[destinatario_id].append(evento)
+    def _guardar(
+        self,
+        numero: int,
+        creado_us: int,
+        tipo: str,
+        destinatario_rol: int,
+        titulo: str,
+        mensaje: str,
+        data: dict,
+        destinatario_id: Optional[int] = None
+    ) -> Evento:
+        """
+        Arma el evento y lo agrega a su índice. Debe llamarse con el lock
+        del índice tomado.
+
+        Si el reloj del sistema retrocede (por ejemplo un ajuste de NTP), la
+        hora se lleva a la del último evento del índice: cada índice queda
+        ordenado por creado_us, que es lo que supone la búsqueda binaria.
+        """
+        if destinatario_id:
+            clave = (destinatario_rol, destinatario_id)
+            indice = self.eventos_por_usuario.get(clave)
+            if indice is None:
+                indice = _IndiceEventos(self.max_eventos)
+        else:
+            indice = self.eventos_por_rol[destinatario_rol]
+        creado_us = max(creado_us, indice.ultimo_us)
+
+        evento = Evento(
+            evento_id=f"evt_{numero}_{creado_us // 1_000_000}",
+            tipo=tipo,
+            destinatario_rol=destinatario_rol,
+            destinatario_id=destinatario_id,
+            titulo=titulo,
+            mensaje=mensaje,
+            data=data,
+            creado_us=creado_us
+        )
+        # Cada evento se guarda en un solo índice: el del usuario si
+        # es personal, o el del rol si es broadcast
+        indice.agregar(evento)
+        if destinatario_id:
+            # Volver a asignar renueva el vencimiento del usuario
+            self.eventos_por_usuario[clave] = indice
+        else:
+            por_tipo = self.eventos_por_rol_tipo[destinatario_rol]
+            if tipo not in por_tipo:
+                por_tipo[tipo] = _IndiceEventos(self.max_eventos)
+            por_tipo[tipo].agregar(evento)
+
+        self._versiones[(destinatario_rol, destinatario_id or None)] = numero
+        return evento
+
+    def _publicar(self, evento: Evento):
+        """
+        Empuja el evento a los clientes conectados al stream.
+        crear_evento puede correr en otro hilo, por eso se usa
+        call_soon_threadsafe sobre el loop de cada suscripción.
+        """
+        for suscripcion in self._suscripciones:
+            if suscripcion.recibe(evento):
+                try:
+                    suscripcion.loop.call_soon_threadsafe(
+                        suscripcion.encolar, evento)
+                except RuntimeError:
+                    # El loop del cliente ya se cerró
+                    pass
+
+    def version(self, rol_id: int, usuario_id: Optional[int] = None) -> Tuple[int, int, int]:
+        """
+        Versión de los eventos visibles para un rol/usuario.
+        Si no cambió, una consulta anterior con los mismos filtros sigue vigente.
+        """
+        return (
+            self._versiones.get((rol_id, None), 0),
+            self._versiones.get((rol_id, usuario_id), 0) if usuario_id else 0,
+            self._limpiezas
+        )
+
+    def cursor(self, rol_id: int, usuario_id: Optional[int] = None) -> int:
+        """
+        Número del último evento visible para un rol/usuario (0 si no hay).
+        Solo crece, así que el cliente puede compararlo con el último que
+        vio antes de pedir la lista de notificaciones.
+        """
+        return max(
+            self._versiones.get((rol_id, None), 0),
+            self._versiones.get((rol_id, usuario_id), 0) if usuario_id else 0
+        )
+
+    def suscribir(self, rol_id: int, usuario_id: Optional[int] = None) -> Suscripcion:
+        """
+        Registra un cliente del stream. Debe llamarse dentro del event loop
+        que va a consumir la cola.
+        """
+        suscripcion = Suscripcion(
+            rol_id=rol_id,
+            usuario_id=usuario_id,
+            cola=asyncio.Queue(maxsize=_MAX_COLA_SUSCRIPCION),
+            loop=asyncio.get_running_loop()
+        )
+        with self._lock_suscripciones:
+            self._suscripciones = self._suscripciones + (suscripcion,)
+        return suscripcion
 
-            return evento
+    def desuscribir(self, suscripcion: Suscripcion):
+        """Elimina un cliente del stream (al desconectarse)"""
+        with self._lock_suscripciones:
+            self._suscripciones = tuple(
+                s for s in self._suscripciones if s is not suscripcion)
 
     def obtener_eventos_recientes(
         self,
@@ -128,62 +454,147 @@ class GestorNotificaciones:
         Returns:
             Lista de eventos que cumplen los criterios
         """
-        with self._lock:
-            # Determinar desde qué fecha buscar
-            if desde is None:
-                desde = datetime.now() - timedelta(minutes=5)
-
-            eventos = []
-
-            # Primero buscar eventos personales
-            if usuario_id and usuario_id in self.eventos_por_usuario:
-                eventos.extend(self.eventos_por_usuario[usuario_id])
-
-            # Luego eventos del rol (broadcast)
-            eventos.extend(self.eventos_por_rol[rol_id])
-
-            # Filtrar por fecha y tipo
-            eventos_filtrados = [
-                e for e in eventos
-                if e.fecha_creacion >= desde
-                and (tipo is None or e.tipo == tipo)
-                and (e.destinatario_id is None or e.destinatario_id == usuario_id)
-            ]
+        # Determinar desde qué fecha buscar
+        if desde is None:
+            desde_us = _ahora_us() - _VENTANA_DEFECTO_US
+        else:
+            desde_us = _a_microsegundos(desde)
+
+        # Eventos personales y broadcast del rol. Ambos índices están en
+        # orden de creación, así que se recorren desde el final y se
+        # corta apenas se pasa de 'desde' o se llega al límite
+        with self._locks_rol[rol_id]:
+            if tipo is None:
+                indice_rol = self.eventos_por_rol[rol_id]
+            else:
+                indice_rol = self.eventos_por_rol_tipo[rol_id].get(tipo)
+            broadcast = self._recientes(
+                self._vigentes(indice_rol), desde_us, tipo, limit)
+        if not usuario_id:
+            return broadcast
+
+        with self._lock_usuarios:
+            personales = self._recientes(
+                self._vigentes(self.eventos_por_usuario.get((rol_id, usuario_id))),
+                desde_us, tipo, limit
+            )
 
-            # Ordenar por fecha (más recientes primero)
-            eventos_filtrados.sort(
-                key=lambda x: x.fecha_creacion, reverse=True)
+        # Cada lista ya viene ordenada y cortada en el límite: si una está
+        # vacía (lo común para los personales) la otra es el resultado
+        if not personales or not broadcast:
+            return personales or broadcast
 
-            # Limitar resultados
-            return eventos_filtrados[:limit]
+        # Ambas listas ya vienen de la más reciente a la más antigua:
+        # se intercalan y se corta en el límite, sin ordenar todo
+        return list(islice(heapq.merge(
+            personales, broadcast,
+            key=_CREADO_US, reverse=True
+        ), limit))
 
-    def limpiar_eventos_antiguos(self):
-        """Limpia eventos más antiguos que tiempo_vida"""
-        with self._lock:
-            fecha_limite = datetime.now() - self.tiempo_vida
-
-            # Limpiar por rol
-            for rol_id in self.eventos_por_rol:
-                self.eventos_por_rol[rol_id] = deque(
-                    (e for e in self.eventos_por_rol[rol_id]
-                     if e.fecha_creacion >= fecha_limite),
-                    maxlen=self.max_eventos
-                )
+    def contar_eventos_por_tipo(
+        self,
+        rol_id: int,
+        usuario_id: Optional[int] = None,
+        desde: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """
+        Cuenta los eventos recientes agrupados por tipo, sin armar la lista
+        de eventos.
 
-            # Limpiar por usuario
+        Args:
+            rol_id: Rol del usuario consultante
+            usuario_id: ID del usuario (para eventos personales)
+            desde: Fecha desde la cual contar (default: últimos 5 minutos)
+
+        Returns:
+            Diccionario {tipo: cantidad}
+        """
+        if desde is None:
+            desde_us = _ahora_us() - _VENTANA_DEFECTO_US
+        else:
+            desde_us = _a_microsegundos(desde)
+
+        conteo = Counter()
+        with self._locks_rol[rol_id]:
+            eventos = self._vigentes(self.eventos_por_rol[rol_id])
+            conteo.update(e.tipo for e in eventos.desde(desde_us))
+        if usuario_id:
+            with self._lock_usuarios:
+                eventos = self._vigentes(
+                    self.eventos_por_usuario.get((rol_id, usuario_id)))
+                conteo.update(e.tipo for e in eventos.desde(desde_us))
+
+        return dict(conteo)
+
+    def _vigentes(self, eventos: Optional[_IndiceEventos]) -> _IndiceEventos:
+        """
+        Descarta del índice los eventos vencidos y lo retorna. Debe llamarse
+        con el lock del índice tomado.
+        """
+        if not eventos:
+            return eventos or _IndiceEventos(0)
+
+        if eventos.descartar_anteriores(_ahora_us() - self._tiempo_vida_us):
+            self._marcar_limpieza()
+        return eventos
+
+    def _marcar_limpieza(self):
+        """
+        Cambia la versión de limpieza. Se toma un número nuevo del contador
+        en lugar de sumar sobre el valor actual, así no hace falta un lock
+        común a todos los índices: cada limpieza deja un valor distinto.
+        """
+        self._limpiezas = next(self._contador_limpiezas)
+
+    @staticmethod
+    def _recientes(
+        eventos: _IndiceEventos,
+        desde_us: int,
+        tipo: Optional[str],
+        limit: int
+    ) -> List[Evento]:
+        """Eventos desde un instante, del más reciente al más antiguo"""
+        recientes = eventos.desde(desde_us)
+        if tipo is not None:
+            recientes = (e for e in recientes if e.tipo == tipo)
+        return list(islice(recientes, limit))
+
+    def limpiar_eventos_antiguos(self):
+        """
+        Limpia eventos más antiguos que tiempo_vida.
+        No es necesario llamarlo periódicamente: las consultas ya descartan
+        los eventos vencidos y los usuarios inactivos vencen solos.
+        """
+        limite_us = _ahora_us() - self._tiempo_vida_us
+        self._marcar_limpieza()
+
+        # Los eventos se agregan en orden de creación, así que los
+        # vencidos siempre están al inicio: se descartan hasta el primero
+        # vigente, sin recorrer ni recrear los índices
+        for rol_id, eventos in self.eventos_por_rol.items():
+            with self._locks_rol[rol_id]:
+                eventos.descartar_anteriores(limite_us)
+
+                por_tipo = self.eventos_por_rol_tipo[rol_id]
+                tipos_vacios = []
+                for tipo, eventos_tipo in por_tipo.items():
+                    eventos_tipo.descartar_anteriores(limite_us)
+                    if not eventos_tipo:
+                        tipos_vacios.append(tipo)
+                for tipo in tipos_vacios:
+                    del por_tipo[tipo]
+
+        with self._lock_usuarios:
+            self.eventos_por_usuario.expire()
             usuarios_vacios = []
-            for usuario_id in self.eventos_por_usuario:
-                self.eventos_por_usuario[usuario_id] = deque(
-                    (e for e in self.eventos_por_usuario[usuario_id]
-                     if e.fecha_creacion >= fecha_limite),
-                    maxlen=self.max_eventos
-                )
-                if len(self.eventos_por_usuario[usuario_id]) == 0:
-                    usuarios_vacios.append(usuario_id)
+            for clave, eventos in list(self.eventos_por_usuario.items()):
+                eventos.descartar_anteriores(limite_us)
+                if not eventos:
+                    usuarios_vacios.append(clave)
 
             # Eliminar usuarios sin eventos
-            for usuario_id in usuarios_vacios:
-                del self.eventos_por_usuario[usuario_id]
+            for clave in usuarios_vacios:
+                del self.eventos_por_usuario[clave]
 
     def contador_no_vistos(
         self,
@@ -202,12 +613,22 @@ class GestorNotificaciones:
         Returns:
             Número de eventos nuevos
         """
-        eventos = self.obtener_eventos_recientes(
-            rol_id=rol_id,
-            usuario_id=usuario_id,
-            desde=desde
-        )
-        return len(eventos)
+        if desde is None:
+            desde_us = _ahora_us() - _VENTANA_DEFECTO_US
+        else:
+            desde_us = _a_microsegundos(desde)
+
+        # Solo se ubica el primer evento desde 'desde' en cada índice:
+        # no se recorren ni se agrupan los eventos
+        with self._locks_rol[rol_id]:
+            total = self._vigentes(
+                self.eventos_por_rol[rol_id]).cantidad_desde(desde_us)
+        if usuario_id:
+            with self._lock_usuarios:
+                total += self._vigentes(self.eventos_por_usuario.get(
+                    (rol_id, usuario_id))).cantidad_desde(desde_us)
+
+        return total
 
 
 # Instancia global del gestor de notificaciones
@@ -226,21 +647,15 @@ def notificar_nuevo_pedido(pedido_id: int, token: str, cliente_nombre: str, item
         "total": total
     }
 
-    # Notificar a cocina
-    gestor_notificaciones.crear_evento(
+    # Notificar a cocina y admin en una sola publicación
+    gestor_notificaciones.crear_evento_broadcast(
         tipo="NUEVO_PEDIDO",
-        destinatario_rol=2,  # Cocina
-        titulo="Nuevo Pedido",
-        mensaje=f"Pedido #{pedido_id} - {cliente_nombre} ({items_count} items)",
-        data=data
-    )
-
-    # Notificar a admin
-    gestor_notificaciones.crear_evento(
-        tipo="NUEVO_PEDIDO",
-        destinatario_rol=1,  # Admin
-        titulo="Nuevo Pedido",
-        mensaje=f"Pedido #{pedido_id} de {cliente_nombre}",
+        roles=[2, 1],  # Cocina, Admin
+        titulo_por_rol={2: "Nuevo Pedido", 1: "Nuevo Pedido"},
+        mensaje_por_rol={
+            2: f"Pedido #{pedido_id} - {cliente_nombre} ({items_count} items)",
+            1: f"Pedido #{pedido_id} de {cliente_nombre}",
+        },
         data=data
     )
 
@@ -345,18 +760,33 @@ def notificar_delivery_cerca(
     pedido_id: int,
     token: str,
     cliente_id: int,
-    delivery_nombre: str
+    delivery_nombre: str,
+    latitud: Optional[float] = None,
+    longitud: Optional[float] = None,
+    mensaje_adicional: Optional[str] = None
 ):
-    """Notifica al cliente que el delivery está llegando"""
+    """
+    Notifica al cliente que el delivery está llegando.
+    La ubicación y el mensaje adicional del delivery son opcionales.
+    """
+    mensaje = f"{delivery_nombre} está afuera con tu pedido"
+    if mensaje_adicional:
+        mensaje = f"{mensaje}: {mensaje_adicional}"
+
+    data = {
+        "pedido_id": pedido_id,
+        "token": token,
+        "delivery": delivery_nombre
+    }
+    if latitud is not None and longitud is not None:
+        data["latitud"] = latitud
+        data["longitud"] = longitud
+
     gestor_notificaciones.crear_evento(
         tipo="DELIVERY_CERCA",
         destinatario_rol=4,  # Cliente
         destinatario_id=cliente_id,
         titulo="¡Tu delivery está llegando!",
-        mensaje=f"{delivery_nombre} está afuera con tu pedido",
-        data={
-            "pedido_id": pedido_id,
-            "token": token,
-            "delivery": delivery_nombre
-        }
+        mensaje=mensaje,
+        data=data
     )
@@ -1,11 +1,32 @@
 from passlib.context import CryptContext
-from jose import JWTError, jwt
-from datetime import datetime, timedelta
+import jwt
+import orjson
+import time
+from datetime import timedelta
 from typing import Optional
 from app.config import settings
 
-# Configuración para hashear passwords
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configuración para hashear passwords. Los hashes nuevos usan Argon2id;
+# los bcrypt existentes se siguen verificando con el esquema bcrypt
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    default="argon2",
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=65536,
+    argon2__parallelism=2,
+)
+
+# Decodificador de tokens armado una sola vez (se usa en cada request
+# autenticado). Todo token emitido por la API lleva "exp"
+_decodificador_jwt = jwt.PyJWT(options={"require": ["exp"]})
+_algoritmos_jwt = [settings.ALGORITHM]
+
+# Firmador y clave para emitir tokens: SECRET_KEY y ALGORITHM no cambian
+# mientras corre la aplicación, así que se preparan una sola vez
+_firmador_jwt = jwt.PyJWS()
+_clave_firma = settings.SECRET_KEY.encode()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -36,13 +57,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode = data.copy()
 
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        segundos = expires_delta.total_seconds()
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        segundos = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    # "exp" va directo como timestamp entero (no hace falta convertir un datetime)
+    to_encode["exp"] = int(time.time() + segundos)
+    encoded_jwt = _firmador_jwt.encode(
+        orjson.dumps(to_encode), _clave_firma, algorithm=settings.ALGORITHM)
 
     return encoded_jwt
 
@@ -58,8 +80,8 @@ def decode_access_token(token: str) -> Optional[dict]:
         Diccionario con los datos del token si es válido, None si no lo es
     """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY,
-                             algorithms=[settings.ALGORITHM])
+        payload = _decodificador_jwt.decode(
+            token, settings.SECRET_KEY, algorithms=_algoritmos_jwt)
         return payload
-    except JWTError:
+    except jwt.PyJWTError:
         return None
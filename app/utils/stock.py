@@ -0,0 +1,33 @@
+"""
+Utilidades para el manejo de stock de los menús.
+"""
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.models.menu_dia import MenuDia
+from app.models.pedido_item import PedidoItem
+
+
+def restaurar_stock_pedido(db: Session, pedido_id: int):
+    """
+    Devuelve a cada menú la cantidad reservada por los items de un pedido.
+
+    Se hace con un único UPDATE ... FROM (SELECT ... GROUP BY) en la base de
+    datos, en lugar de cargar y modificar cada menú por separado.
+    No hace commit.
+    """
+    cantidades = db.query(
+        PedidoItem.menu_dia_id,
+        func.sum(PedidoItem.cantidad).label("cantidad")
+    ).filter(
+        PedidoItem.pedido_id == pedido_id
+    ).group_by(PedidoItem.menu_dia_id).subquery()
+
+    db.execute(
+        update(MenuDia).where(
+            MenuDia.menu_dia_id == cantidades.c.menu_dia_id
+        ).values(
+            cantidad_disponible=MenuDia.cantidad_disponible + cantidades.c.cantidad
+        ).execution_options(synchronize_session=False)
+    )
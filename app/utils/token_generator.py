@@ -1,31 +1,162 @@
-import random
+import hashlib
+import math
+import os
 import string
+import threading
 from sqlalchemy.orm import Session
+from app.models.enums import EstadoDelPedido
 from app.models.pedido import Pedido
 
+# Caracteres permitidos en el token, como bytes para indexarlos directo
+_CARACTERES = (string.ascii_uppercase + string.digits).encode()
+# Mayor múltiplo de 36 que cabe en un byte: los bytes aleatorios por encima
+# se descartan para que todos los caracteres salgan con la misma probabilidad
+_LIMITE_BYTE = 256 - 256 % len(_CARACTERES)
 
-def generar_token_unico(db: Session, longitud: int = 8) -> str:
+# Tokens que se generan y verifican juntos en cada consulta
+_CANDIDATOS_POR_CONSULTA = 16
+
+
+class _FiltroBloom:
+    """
+    Conjunto aproximado de tokens: si dice que un token no está, seguro
+    no está; si dice que está, puede ser un falso positivo.
+    Se dimensiona para 'capacidad' tokens con la tasa de error indicada.
+    """
+
+    def __init__(self, capacidad: int, tasa_error: float):
+        bits = math.ceil(-capacidad * math.log(tasa_error) / math.log(2) ** 2)
+        self._bits = bytearray((bits + 7) // 8)
+        self._total_bits = bits
+        self._hashes = max(1, math.ceil(math.log2(1 / tasa_error)))
+        self.capacidad = capacidad
+        self.tasa_error = tasa_error
+        self.cantidad = 0
+
+    def _posiciones(self, valor: str):
+        digest = hashlib.blake2b(
+            valor.encode(), digest_size=self._hashes * 4).digest()
+        for i in range(0, len(digest), 4):
+            yield int.from_bytes(digest[i:i + 4], "little") % self._total_bits
+
+    def agregar(self, valor: str):
+        for posicion in self._posiciones(valor):
+            self._bits[posicion >> 3] |= 1 << (posicion & 7)
+        self.cantidad += 1
+
+    def __contains__(self, valor: str) -> bool:
+        return all(
+            self._bits[posicion >> 3] & (1 << (posicion & 7))
+            for posicion in self._posiciones(valor)
+        )
+
+
+class _FiltroBloomEscalable:
+    """
+    Filtro de Bloom que crece: cuando el filtro actual llega a su capacidad
+    se agrega otro del doble de tamaño y con la mitad de tasa de error, así
+    la tasa de error total queda acotada (< 2 veces la inicial) sin importar
+    cuántos tokens se agreguen.
+    """
+
+    def __init__(self, capacidad_inicial: int = 10_000, tasa_error: float = 1e-4):
+        self._filtros = [_FiltroBloom(capacidad_inicial, tasa_error / 2)]
+
+    def agregar(self, valor: str):
+        actual = self._filtros[-1]
+        if actual.cantidad >= actual.capacidad:
+            actual = _FiltroBloom(actual.capacidad * 2, actual.tasa_error / 2)
+            self._filtros.append(actual)
+        actual.agregar(valor)
+
+    def __contains__(self, valor: str) -> bool:
+        return any(valor in filtro for filtro in self._filtros)
+
+
+# Pedidos cuyos tokens se cargan al iniciar. Los finalizados quedan fuera
+# para que la carga no crezca con el historial: un token que choque con uno
+# de ellos lo detecta la restricción única al insertar (ver crear_pedido)
+_ESTADOS_FINALIZADOS = (EstadoDelPedido.ENTREGADO, EstadoDelPedido.CANCELADO)
+
+# Tokens ya usados. Solo se consulta después de cargar_tokens_activos;
+# antes de eso todos los tokens se verifican en la base de datos
+_tokens_en_uso = _FiltroBloomEscalable()
+_filtro_cargado = False
+_lock = threading.Lock()
+
+
+def cargar_tokens_activos(db: Session):
+    """
+    Carga en el filtro los tokens de los pedidos no finalizados. Se llama
+    una vez al iniciar la aplicación.
+    """
+    global _tokens_en_uso, _filtro_cargado
+    filtro = _FiltroBloomEscalable()
+    for fila in db.query(Pedido.token_recoger).filter(
+            Pedido.estado.notin_(_ESTADOS_FINALIZADOS)).yield_per(5000):
+        filtro.agregar(fila.token_recoger)
+
+    with _lock:
+        _tokens_en_uso = filtro
+        _filtro_cargado = True
+
+
+def _token_aleatorio(longitud: int) -> str:
+    """Token alfanumérico en mayúsculas generado con os.urandom"""
+    token = b""
+    while len(token) < longitud:
+        token += bytes(
+            _CARACTERES[b % len(_CARACTERES)]
+            for b in os.urandom(longitud * 2) if b < _LIMITE_BYTE
+        )
+    return token[:longitud].decode()
+
+
+def generar_token_unico(db: Session, longitud: int = 8, usar_filtro: bool = True) -> str:
     """
     Genera un token único alfanumérico de 8 caracteres para identificar pedidos.
     Verifica que no exista en la base de datos.
 
+    Con el filtro cargado, un token que el filtro no conoce se usa sin
+    consultar la base de datos. El filtro no conoce los pedidos finalizados
+    ni los creados por otros procesos, así que quien inserta el pedido debe
+    reintentar con usar_filtro=False si choca con la restricción única.
+
     Args:
         db: Sesión de base de datos
         longitud: Longitud del token (por defecto 8)
+        usar_filtro: False para verificar siempre en la base de datos
 
     Returns:
         Token único de 8 caracteres
     """
-    caracteres = string.ascii_uppercase + string.digits
     max_intentos = 100
 
-    for _ in range(max_intentos):
-        token = ''.join(random.choices(caracteres, k=longitud))
+    if usar_filtro and _filtro_cargado:
+        token = _token_aleatorio(longitud)
+        with _lock:
+            if token not in _tokens_en_uso:
+                _tokens_en_uso.agregar(token)
+                return token
+
+    # Sin filtro, o el filtro dio un posible choque: verificar en la base
+    for _ in range(0, max_intentos, _CANDIDATOS_POR_CONSULTA):
+        candidatos = [
+            _token_aleatorio(longitud) for _ in range(_CANDIDATOS_POR_CONSULTA)
+        ]
 
-        # Verificar que no exista en la base de datos
-        existe = db.query(Pedido).filter(Pedido.token_recoger == token).first()
-        if not existe:
-            return token
+        # Verificar todos los candidatos con una sola consulta, leyendo
+        # solo la columna del token (token_recoger ya tiene índice único)
+        existentes = {
+            fila.token_recoger for fila in db.query(Pedido.token_recoger).filter(
+                Pedido.token_recoger.in_(candidatos))
+        }
+        for token in candidatos:
+            if token not in existentes:
+                if _filtro_cargado:
+                    with _lock:
+                        _tokens_en_uso.agregar(token)
+                return token
 
     raise Exception(
         "No se pudo generar un token único después de múltiples intentos")
@@ -0,0 +1,112 @@
+"""
+Fixtures compartidas por los scripts de verificación.
+
+La app, el TestClient y la base de datos de prueba se crean una sola vez
+por sesión de pytest y los reutilizan todos los módulos de tests/.
+Los dependency_overrides se ponen y se quitan dentro de las fixtures, así
+un módulo no afecta a los demás.
+"""
+
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+# Add app to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Los tests no necesitan los archivos de log (se puede activar con =1)
+os.environ.setdefault("SOLANDRE_FILE_LOG", "0")
+
+from app.main import app
+from app import models  # noqa: F401  (registra todas las tablas en SQLModel.metadata)
+from app.database import get_db, get_session_factory
+from app.models.usuario import Usuario
+from app.utils.dependencies import get_current_user
+
+# Armar el esquema OpenAPI al importar: FastAPI lo guarda y el primer
+# request de la sesión no paga su construcción
+app.openapi()
+
+
+@pytest.fixture(scope="session")
+def test_engine():
+    """
+    SQLite en memoria con todas las tablas, creadas una sola vez.
+    StaticPool usa siempre la misma conexión, así la base en memoria se
+    comparte entre todas las sesiones.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def test_session_local(test_engine):
+    """Fábrica de sesiones sobre test_engine"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+
+@pytest.fixture(scope="session")
+def client(test_session_local):
+    """
+    TestClient único para toda la sesión. Los endpoints usan la base de
+    prueba en lugar de DATABASE_URL.
+    """
+    def override_get_db():
+        db = test_session_local()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    # Endpoints que abren su propia sesión (historial de cocina)
+    app.dependency_overrides[get_session_factory] = lambda: test_session_local
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_session_factory, None)
+
+
+@pytest.fixture
+def db(test_session_local):
+    """Sesión sobre la base de prueba para preparar los datos de un test"""
+    sesion = test_session_local()
+    yield sesion
+    sesion.close()
+
+
+@pytest.fixture
+def admin_mock():
+    """Simula un administrador autenticado durante un test"""
+    def mock_get_current_user():
+        return Usuario(usuario_id=1, email="admin@solandre.com", rol_id=1, nombre_completo="Admin")
+
+    # solo_admin (require_roles) toma el usuario de get_current_user
+    app.dependency_overrides[get_current_user] = mock_get_current_user
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.fixture
+def como_usuario():
+    """
+    Autentica los requests del test como el usuario indicado.
+    Uso: como_usuario(Usuario(usuario_id=..., rol_id=..., ...))
+    """
+    def autenticar(usuario: Usuario):
+        app.dependency_overrides[get_current_user] = lambda: usuario
+        return usuario
+
+    yield autenticar
+    app.dependency_overrides.pop(get_current_user, None)
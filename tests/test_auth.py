@@ -0,0 +1,82 @@
+from itertools import count
+
+import pytest
+
+from app.models.usuario import Usuario
+from app.utils.dependencies import _cache_usuarios
+from app.utils.security import create_access_token
+
+_usuarios = count()
+
+
+@pytest.fixture
+def con_token(db):
+    """
+    Crea un usuario con el rol indicado y retorna (usuario, headers) con un
+    token real: los requests pasan por get_current_user y su cache.
+    """
+    def crear(rol_id, nombre="Original"):
+        usuario = Usuario(
+            rol_id=rol_id, nombre_completo=nombre, password_hash="x",
+            email=f"auth{next(_usuarios)}@x.com"
+        )
+        db.add(usuario)
+        db.commit()
+        db.refresh(usuario)
+        token = create_access_token({
+            "sub": usuario.email, "usuario_id": usuario.usuario_id, "rol_id": rol_id
+        })
+        return usuario, {"Authorization": f"Bearer {token}"}
+
+    yield crear
+    _cache_usuarios.clear()
+
+
+def test_perfil_sale_de_la_cache_hasta_invalidar(client, db, con_token):
+    usuario, headers = con_token(4)
+    assert client.get("/auth/perfil", headers=headers).json()["nombre_completo"] == "Original"
+
+    # Un cambio hecho por fuera de la API no se ve mientras dure la cache
+    db.get(Usuario, usuario.usuario_id).nombre_completo = "Cambiado"
+    db.commit()
+    assert client.get("/auth/perfil", headers=headers).json()["nombre_completo"] == "Original"
+
+    # Actualizar el perfil invalida la cache: se vuelve a leer de la base
+    respuesta = client.patch("/auth/perfil", headers=headers, json={"telefono": "70000000"})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["nombre_completo"] == "Cambiado"
+
+    perfil = client.get("/auth/perfil", headers=headers).json()
+    assert (perfil["nombre_completo"], perfil["telefono"]) == ("Cambiado", "70000000")
+
+
+def test_empleado_eliminado_pierde_el_acceso(client, con_token):
+    _, headers_admin = con_token(1)
+    empleado, headers_empleado = con_token(2)
+    # Primer request: el token del empleado queda en la cache
+    assert client.get("/auth/perfil", headers=headers_empleado).status_code == 200
+
+    respuesta = client.delete(f"/admin/empleados/{empleado.usuario_id}", headers=headers_admin)
+    assert respuesta.status_code == 200
+
+    respuesta = client.get("/auth/perfil", headers=headers_empleado)
+    assert respuesta.status_code == 401
+    assert respuesta.json()["detail"] == "Usuario no encontrado"
+
+
+def test_cambio_de_rol_se_aplica_al_invalidar(client, con_token):
+    _, headers_admin = con_token(1)
+    empleado, headers_empleado = con_token(2)
+    assert client.get("/cocina/pendientes", headers=headers_empleado).status_code == 200
+
+    respuesta = client.put(
+        f"/admin/empleados/{empleado.usuario_id}", headers=headers_admin,
+        json={
+            "email": empleado.email, "nombre_completo": "Ahora delivery",
+            "rol_id": 3, "password": "secreta123"
+        }
+    )
+    assert respuesta.status_code == 200
+
+    # El mismo token ya no tiene acceso a cocina
+    assert client.get("/cocina/pendientes", headers=headers_empleado).status_code == 403
@@ -0,0 +1,50 @@
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.models.enums import EstadoDelPedido, MetodoPago
+from app.models.pedido import Pedido
+from app.models.usuario import Usuario
+from app.routers import cocina
+
+
+def test_historial_transmite_los_pedidos_del_dia(client, db, como_usuario, monkeypatch):
+    # Lotes de 2 para que el stream cruce más de un lote
+    monkeypatch.setattr(cocina, "_LOTE_HISTORIAL", 2)
+    como_usuario(Usuario(usuario_id=90, rol_id=2, email="cocina@x.com", nombre_completo="Cocina"))
+    dia = datetime(2026, 3, 2, 9, 0)
+    estados = [
+        EstadoDelPedido.LISTO_PARA_ENTREGA,
+        EstadoDelPedido.EN_REPARTO,
+        EstadoDelPedido.ENTREGADO,
+        EstadoDelPedido.EN_COCINA,  # Todavía no pasó por el historial
+    ]
+    pedidos = [
+        Pedido(
+            usuario_id=90, zona_id=1, token_recoger=f"HIS{i:05d}", estado=estado,
+            total_pedido=Decimal("10.00"), metodo_pago=MetodoPago.EFECTIVO,
+            fecha_pedido=dia + timedelta(minutes=i),
+            fecha_listo_cocina=dia + timedelta(minutes=30 + i)
+        )
+        for i, estado in enumerate(estados)
+    ]
+    db.add_all(pedidos)
+    db.commit()
+
+    respuesta = client.get("/cocina/historial", params={"fecha": "2026-03-02"})
+
+    assert respuesta.status_code == 200
+    historial = json.loads(respuesta.content)
+    # Del más reciente al más antiguo según fecha_listo_cocina
+    assert [p["pedido_id"] for p in historial] == [p.pedido_id for p in pedidos[2::-1]]
+    assert historial[0]["estado"] == "Entregado"
+    assert historial[0]["items"] == []
+
+
+def test_historial_de_un_dia_sin_pedidos(client, como_usuario):
+    como_usuario(Usuario(usuario_id=91, rol_id=2, email="cocina2@x.com", nombre_completo="Cocina"))
+
+    respuesta = client.get("/cocina/historial", params={"fecha": "2026-03-03"})
+
+    assert respuesta.status_code == 200
+    assert json.loads(respuesta.content) == []
@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+import pytest
+
+from app.utils.dinero import a_centavos, desde_centavos, sumar_montos
+
+
+@pytest.mark.parametrize("monto, centavos", [
+    (Decimal("15.50"), 1550),
+    (Decimal("0.1"), 10),
+    (Decimal("7"), 700),
+    # Más de 2 decimales: se redondea, no se trunca
+    (Decimal("15.505"), 1551),
+    (Decimal("15.499"), 1550),
+    (Decimal("19.999"), 2000),
+])
+def test_a_centavos(monto, centavos):
+    assert a_centavos(monto) == centavos
+
+
+def test_desde_centavos_mantiene_dos_decimales():
+    assert str(desde_centavos(1550)) == "15.50"
+    assert str(desde_centavos(0)) == "0.00"
+
+
+def test_sumar_montos():
+    assert sumar_montos([Decimal("15.50")] * 3 + [Decimal("0.10")]) == Decimal("46.60")
+    assert str(sumar_montos([])) == "0.00"
@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+
+from app.utils import logger as modulo_logger
+
+
+@pytest.fixture
+def logs_en(tmp_path, monkeypatch):
+    """Archivos de log activados, en un directorio temporal"""
+    directorio = tmp_path / "logs"
+    monkeypatch.setattr(modulo_logger, "FILE_LOG", True)
+    monkeypatch.setattr(modulo_logger, "LOG_DIR", str(directorio))
+    modulo_logger._listener_archivos.cache_clear()
+    yield directorio
+    modulo_logger.detener_logging()
+    for handler in modulo_logger._listener_archivos().handlers:
+        handler.close()
+    modulo_logger._listener_archivos.cache_clear()
+
+
+def registro(nivel, mensaje):
+    return logging.LogRecord("solandre", nivel, __file__, 1, mensaje, None, None)
+
+
+def test_archivos_se_abren_con_el_primer_registro(logs_en):
+    handler = modulo_logger._ColaArchivos(modulo_logger._cola_archivos)
+    # Sin startup de la app (como en un script): nada se crea hasta loguear
+    assert not logs_en.exists()
+    assert not modulo_logger._listener_activo
+
+    handler.handle(registro(logging.INFO, "primer registro"))
+    handler.handle(registro(logging.ERROR, "un error"))
+    assert modulo_logger._listener_activo
+
+    # Al detener se escriben los registros pendientes
+    modulo_logger.detener_logging()
+    app_log = (logs_en / "app.log").read_text(encoding="utf-8")
+    assert "primer registro" in app_log and "un error" in app_log
+    assert "primer registro" not in (logs_en / "error.log").read_text(encoding="utf-8")
+
+
+def test_iniciar_logging_no_hace_nada_sin_archivos(logs_en, monkeypatch):
+    monkeypatch.setattr(modulo_logger, "FILE_LOG", False)
+
+    modulo_logger.iniciar_logging()
+
+    assert not modulo_logger._listener_activo
+    assert not logs_en.exists()
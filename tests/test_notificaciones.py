@@ -0,0 +1,380 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from cachetools import TTLCache
+
+from app.models.enums import EstadoDelPedido, MetodoPago
+from app.models.pedido import Pedido
+from app.models.usuario import Usuario
+from app.routers import notificaciones as router_notificaciones
+from app.utils import notificaciones as modulo_notificaciones
+from app.utils.notificaciones import GestorNotificaciones, _a_microsegundos
+
+
+class Reloj:
+    """
+    Hora del gestor durante un test. Cada lectura avanza 1 µs, así los
+    eventos creados seguidos tienen horas distintas y crecientes.
+    """
+
+    def __init__(self):
+        self.inicio = datetime.now()
+        self.ir_a(self.inicio)
+
+    def __call__(self) -> int:
+        self._us += 1
+        return self._us
+
+    def ir_a(self, fecha: datetime):
+        self._us = _a_microsegundos(fecha)
+
+    def retroceder(self, minutos: float):
+        """Lleva el reloj a 'minutos' antes del inicio del test"""
+        self.ir_a(self.inicio - timedelta(minutes=minutos))
+
+
+def hace(minutos):
+    return datetime.now() - timedelta(minutes=minutos)
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(modulo_notificaciones, "_ahora_us", reloj)
+    return reloj
+
+
+@pytest.fixture
+def gestor():
+    return GestorNotificaciones(max_eventos=100, tiempo_vida_minutos=60)
+
+
+def test_recientes_del_mas_nuevo_al_mas_viejo_e_intercalados(gestor, reloj):
+    # Eventos broadcast y personales intercalados en el tiempo
+    for i in range(6):
+        if i % 2:
+            gestor.crear_evento("X", 4, f"b{i}", "m")
+        else:
+            gestor.crear_evento("X", 4, f"p{i}", "m", destinatario_id=7)
+
+    eventos = gestor.obtener_eventos_recientes(4, usuario_id=7)
+    assert [e.titulo for e in eventos] == ["b5", "p4", "b3", "p2", "b1", "p0"]
+
+    # Sin usuario_id solo se ven los eventos broadcast
+    assert [e.titulo for e in gestor.obtener_eventos_recientes(4)] == ["b5", "b3", "b1"]
+    # Otros usuarios no ven los eventos personales
+    assert [e.titulo for e in gestor.obtener_eventos_recientes(4, usuario_id=8)] == ["b5", "b3", "b1"]
+
+
+def test_el_limite_se_aplica_despues_de_intercalar(gestor, reloj):
+    for i in range(10):
+        gestor.crear_evento("X", 2, f"b{i}", "m")
+        gestor.crear_evento("X", 2, f"p{i}", "m", destinatario_id=1)
+
+    eventos = gestor.obtener_eventos_recientes(2, usuario_id=1, limit=3)
+    assert [e.titulo for e in eventos] == ["p9", "b9", "p8"]
+    assert len(gestor.obtener_eventos_recientes(2, limit=4)) == 4
+
+
+def test_filtro_por_tipo(gestor, reloj):
+    for i, tipo in enumerate("ABC" * 3):
+        gestor.crear_evento(tipo, 1, f"{tipo}{i}", "m")
+        gestor.crear_evento(tipo, 1, f"u{tipo}{i}", "m", destinatario_id=5)
+
+    eventos = gestor.obtener_eventos_recientes(1, usuario_id=5, tipo="B", limit=4)
+    assert [e.titulo for e in eventos] == ["uB7", "B7", "uB4", "B4"]
+    assert all(e.tipo == "B" for e in gestor.obtener_eventos_recientes(1, tipo="B"))
+    assert gestor.obtener_eventos_recientes(1, tipo="Z") == []
+
+
+def test_corte_por_desde(gestor, reloj):
+    for minutos in (30, 20, 10, 0):
+        reloj.retroceder(minutos)
+        gestor.crear_evento("X", 3, f"b{minutos}", "m")
+        gestor.crear_evento("X", 3, f"p{minutos}", "m", destinatario_id=2)
+
+    eventos = gestor.obtener_eventos_recientes(3, usuario_id=2, desde=hace(15))
+    assert [e.titulo for e in eventos] == ["p0", "b0", "p10", "b10"]
+
+    # Ventana por defecto: últimos 5 minutos
+    assert [e.titulo for e in gestor.obtener_eventos_recientes(3)] == ["b0"]
+
+    assert gestor.contar_eventos_por_tipo(3, 2, desde=hace(25)) == {"X": 6}
+    assert gestor.contador_no_vistos(3, 2, desde=hace(25)) == 6
+    assert gestor.contador_no_vistos(3, desde=hace(25)) == 3
+
+
+def test_los_vencidos_se_descartan_al_leer(gestor, reloj):
+    reloj.retroceder(90)
+    gestor.crear_evento("X", 2, "viejo", "m")
+    gestor.crear_evento("X", 4, "viejo", "m", destinatario_id=3)
+    reloj.retroceder(0)
+    gestor.crear_evento("X", 2, "nuevo", "m")
+    version = gestor.version(2)
+
+    eventos = gestor.obtener_eventos_recientes(2, desde=hace(24 * 60))
+    assert [e.titulo for e in eventos] == ["nuevo"]
+    assert len(gestor.eventos_por_rol[2]) == 1
+    # Descartar eventos cambia la versión, así se renuevan las respuestas cacheadas
+    assert gestor.version(2) != version
+
+    assert gestor.obtener_eventos_recientes(4, 3, desde=hace(24 * 60)) == []
+    assert gestor.contador_no_vistos(4, 3, desde=hace(24 * 60)) == 0
+
+
+def test_limpiar_eventos_antiguos(gestor, reloj):
+    for minutos in (120, 90, 30):
+        reloj.retroceder(minutos)
+        gestor.crear_evento("X", 2, "m", "m")
+        gestor.crear_evento("Y", 4, "m", "m", destinatario_id=9)
+        if minutos == 90:
+            gestor.crear_evento("Y", 4, "m", "m", destinatario_id=8)
+    reloj.retroceder(0)
+    gestor.crear_evento("Z", 2, "m", "m")
+    indice = gestor.eventos_por_rol[2]
+
+    gestor.limpiar_eventos_antiguos()
+
+    assert gestor.eventos_por_rol[2] is indice
+    assert len(indice) == 2
+    assert {tipo: len(e) for tipo, e in gestor.eventos_por_rol_tipo[2].items()} == {"X": 1, "Z": 1}
+    # Se eliminan los usuarios que quedan sin eventos
+    assert {clave: len(e) for clave, e in gestor.eventos_por_usuario.items()} == {(4, 9): 1}
+
+
+def test_los_usuarios_inactivos_vencen():
+    ahora = [0.0]
+    gestor = GestorNotificaciones(tiempo_vida_minutos=60)
+    gestor.eventos_por_usuario = TTLCache(maxsize=10, ttl=3600, timer=lambda: ahora[0])
+
+    gestor.crear_evento("X", 4, "m", "m", destinatario_id=1)
+    ahora[0] = 1800
+    gestor.crear_evento("X", 4, "m", "m", destinatario_id=2)
+    ahora[0] = 3700
+
+    # El usuario 1 venció, el 2 tuvo un evento más reciente
+    assert (4, 1) not in gestor.eventos_por_usuario
+    assert (4, 2) in gestor.eventos_por_usuario
+
+
+def test_versiones_y_cursor(gestor):
+    assert gestor.cursor(2) == 0
+    gestor.crear_evento("X", 2, "m", "m")
+    cursor_rol = gestor.cursor(2)
+    gestor.crear_evento("X", 2, "m", "m", destinatario_id=4)
+
+    assert gestor.cursor(2) == cursor_rol
+    assert gestor.cursor(2, 4) > cursor_rol
+    # Los eventos de otros roles no cambian la versión
+    version = gestor.version(2, 4)
+    gestor.crear_evento("X", 3, "m", "m")
+    assert gestor.version(2, 4) == version
+
+
+def test_broadcast_crea_un_evento_por_rol(gestor):
+    eventos = gestor.crear_evento_broadcast(
+        tipo="NUEVO_PEDIDO",
+        roles=[2, 1],
+        titulo_por_rol={2: "cocina", 1: "admin"},
+        mensaje_por_rol={2: "m2", 1: "m1"},
+        data={"pedido_id": 1}
+    )
+
+    assert [e.destinatario_rol for e in eventos] == [2, 1]
+    assert len({e.evento_id for e in eventos}) == 2
+    assert eventos[0].creado_us == eventos[1].creado_us
+    assert [e.titulo for e in gestor.obtener_eventos_recientes(2)] == ["cocina"]
+    assert [e.titulo for e in gestor.obtener_eventos_recientes(1, tipo="NUEVO_PEDIDO")] == ["admin"]
+    assert gestor.cursor(1) > 0 and gestor.cursor(2) > 0
+
+
+def test_orden_de_locks_del_broadcast_sin_deadlock(gestor):
+    # Dos hilos publican a los mismos roles en orden inverso mientras un
+    # tercero publica eventos simples; los locks se toman siempre por rol
+    def publicar(roles):
+        for _ in range(300):
+            gestor.crear_evento_broadcast(
+                "X", roles, {r: "t" for r in roles}, {r: "m" for r in roles})
+
+    def publicar_simple():
+        for i in range(300):
+            gestor.crear_evento("X", 1 + i % 2, "t", "m")
+
+    hilos = [
+        threading.Thread(target=publicar, args=([1, 2],)),
+        threading.Thread(target=publicar, args=([2, 1],)),
+        threading.Thread(target=publicar_simple),
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(timeout=10)
+    assert not any(hilo.is_alive() for hilo in hilos)
+
+    # Cada índice de rol queda en orden de creación
+    for rol_id in (1, 2):
+        creados = [e.creado_us for e in gestor.eventos_por_rol[rol_id]]
+        assert creados == sorted(creados)
+
+
+def test_reloj_que_retrocede_no_desordena_los_indices(gestor, reloj):
+    gestor.crear_evento("X", 2, "antes", "m")
+    gestor.crear_evento("X", 2, "antes", "m", destinatario_id=6)
+    # Ajuste de NTP: el reloj del sistema vuelve 10 minutos atrás
+    reloj.retroceder(10)
+    gestor.crear_evento("X", 2, "despues", "m")
+    gestor.crear_evento("X", 2, "despues", "m", destinatario_id=6)
+    gestor.crear_evento_broadcast("X", [1, 2], {1: "t", 2: "despues"}, {1: "m", 2: "m"})
+
+    for indice in (gestor.eventos_por_rol[2], gestor.eventos_por_usuario[(2, 6)]):
+        creados = [e.creado_us for e in indice]
+        assert creados == sorted(creados)
+        assert indice._tiempos[indice._inicio:] == creados
+
+    reloj.retroceder(0)
+    # Los eventos de después no quedan 10 minutos atrás: siguen a la vista
+    eventos = gestor.obtener_eventos_recientes(2, usuario_id=6)
+    assert sorted(e.titulo for e in eventos) == ["antes"] * 2 + ["despues"] * 3
+    assert gestor.contador_no_vistos(2, 6, desde=reloj.inicio) == 5
+
+
+def test_max_eventos_descarta_los_mas_viejos(reloj):
+    gestor = GestorNotificaciones(max_eventos=3, tiempo_vida_minutos=60)
+    for i in range(10):
+        gestor.crear_evento("X", 2, f"e{i}", "m")
+        gestor.crear_evento("X", 2, f"u{i}", "m", destinatario_id=1)
+
+    for indice in (
+        gestor.eventos_por_rol[2],
+        gestor.eventos_por_rol_tipo[2]["X"],
+        gestor.eventos_por_usuario[(2, 1)],
+    ):
+        assert len(indice) == 3
+        # Las listas se compactan: lo descartado no se acumula
+        assert len(indice._eventos) == len(indice._tiempos) < 2 * 3
+
+    eventos = gestor.obtener_eventos_recientes(2, usuario_id=1, limit=10)
+    assert [e.titulo for e in eventos] == ["u9", "e9", "u8", "e8", "u7", "e7"]
+    assert gestor.contador_no_vistos(2, 1, desde=hace(1)) == 6
+
+
+@pytest.fixture
+def gestor_router(gestor, monkeypatch):
+    """Gestor vacío para los endpoints, sin eventos de otros tests"""
+    monkeypatch.setattr(router_notificaciones, "gestor_notificaciones", gestor)
+    monkeypatch.setattr(modulo_notificaciones, "gestor_notificaciones", gestor)
+    return gestor
+
+
+def test_contador_cuenta_desde_la_fecha_exacta(client, como_usuario, gestor_router, reloj):
+    como_usuario(Usuario(usuario_id=70, rol_id=4, email="c@x.com", nombre_completo="C"))
+    inicio_bucket = hace(1).replace(microsecond=0)
+    inicio_bucket -= timedelta(seconds=inicio_bucket.second % 5)
+    desde = inicio_bucket + timedelta(seconds=3)
+
+    # Ya visto: entre el inicio del bucket de 5 s y 'desde'
+    reloj.ir_a(inicio_bucket + timedelta(seconds=1))
+    gestor_router.crear_evento("X", 4, "visto", "m", destinatario_id=70)
+    reloj.ir_a(desde + timedelta(seconds=1))
+    gestor_router.crear_evento("X", 4, "nuevo", "m", destinatario_id=70)
+    reloj.retroceder(0)
+
+    respuesta = client.get("/notificaciones/contador", params={"desde": desde.isoformat()})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["total"] == 1
+    assert respuesta.json()["eventos_por_tipo"] == {"X": 1}
+
+    # Otro 'desde' en el mismo bucket no reutiliza el conteo cacheado
+    respuesta = client.get(
+        "/notificaciones/contador", params={"desde": inicio_bucket.isoformat()})
+    assert respuesta.json()["total"] == 2
+
+
+@pytest.fixture
+def pedido_en_reparto(db):
+    """Pedido del cliente 71 asignado al delivery 72"""
+    pedido = Pedido(
+        usuario_id=71, zona_id=1, token_recoger="LLEGADA1", total_pedido=Decimal("10.00"),
+        metodo_pago=MetodoPago.EFECTIVO, estado=EstadoDelPedido.EN_REPARTO,
+        delivery_asignado_id=72
+    )
+    db.add(pedido)
+    db.commit()
+    yield pedido
+    db.delete(pedido)
+    db.commit()
+
+
+def test_notificar_llegada_con_ubicacion_y_mensaje(client, como_usuario, gestor_router, pedido_en_reparto):
+    como_usuario(Usuario(usuario_id=72, rol_id=3, email="d@x.com", nombre_completo="Luis"))
+    url = f"/notificaciones/delivery/notificar-llegada/{pedido_en_reparto.pedido_id}"
+
+    respuesta = client.post(url, json={
+        "latitud": -16.5, "longitud": -68.15, "mensaje_adicional": "Estoy en la puerta lateral"
+    })
+
+    assert respuesta.status_code == 200
+    evento, = gestor_router.obtener_eventos_recientes(4, usuario_id=71)
+    assert evento.mensaje == "Luis está afuera con tu pedido: Estoy en la puerta lateral"
+    assert (evento.data["latitud"], evento.data["longitud"]) == (-16.5, -68.15)
+
+    # Sin body se notifica igual, sin ubicación
+    assert client.post(url).status_code == 200
+    evento = gestor_router.obtener_eventos_recientes(4, usuario_id=71)[0]
+    assert evento.mensaje == "Luis está afuera con tu pedido"
+    assert "latitud" not in evento.data
+
+
+@pytest.mark.parametrize("body", [
+    {"latitud": 91, "longitud": 0},
+    {"latitud": 0, "longitud": -181},
+    {"latitud": 0, "longitud": 0, "mensaje_adicional": "x" * 201},
+])
+def test_notificar_llegada_valida_el_body(client, como_usuario, gestor_router, pedido_en_reparto, body):
+    como_usuario(Usuario(usuario_id=72, rol_id=3, email="d@x.com", nombre_completo="Luis"))
+
+    respuesta = client.post(
+        f"/notificaciones/delivery/notificar-llegada/{pedido_en_reparto.pedido_id}", json=body)
+
+    assert respuesta.status_code == 422
+    assert gestor_router.obtener_eventos_recientes(4, usuario_id=71) == []
+
+
+def test_cola_del_stream_descarta_los_mas_antiguos(gestor, monkeypatch):
+    monkeypatch.setattr("app.utils.notificaciones._MAX_COLA_SUSCRIPCION", 3)
+
+    async def probar():
+        suscripcion = gestor.suscribir(2)
+        for i in range(5):
+            gestor.crear_evento("X", 2, f"e{i}", "m")
+        await asyncio.sleep(0)
+        return [suscripcion.cola.get_nowait().titulo for _ in range(suscripcion.cola.qsize())]
+
+    assert asyncio.run(probar()) == ["e2", "e3", "e4"]
+
+
+def test_stream_se_suscribe_al_empezar_el_cuerpo(gestor_router):
+    usuario = Usuario(usuario_id=5, rol_id=2, email="s@x.com", nombre_completo="S")
+
+    async def probar():
+        respuesta = await router_notificaciones.stream_notificaciones(
+            request=None, current_user=usuario)
+        # Si el cliente se va antes de leer el cuerpo, no queda suscripción
+        assert gestor_router._suscripciones == ()
+
+        cuerpo = respuesta.body_iterator
+        siguiente = asyncio.ensure_future(cuerpo.__anext__())
+        await asyncio.sleep(0)
+        assert len(gestor_router._suscripciones) == 1
+
+        gestor_router.crear_evento("NUEVO_PEDIDO", 2, "t", "m")
+        mensaje = await asyncio.wait_for(siguiente, timeout=1)
+        assert "event: NUEVO_PEDIDO" in mensaje
+
+        await cuerpo.aclose()
+        assert gestor_router._suscripciones == ()
+
+    asyncio.run(probar())
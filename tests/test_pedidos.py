@@ -0,0 +1,183 @@
+from datetime import date, datetime, timedelta
+from itertools import count
+from decimal import Decimal
+
+import pytest
+
+from app.models.enums import EstadoDelPedido, MetodoPago, TipoPlato
+from app.models.ingrediente import Ingrediente
+from app.models.item_exclusion import ItemExclusion
+from app.models.menu_dia import MenuDia
+from app.models.pedido import Pedido
+from app.models.pedido_item import PedidoItem
+from app.models.plato import Plato
+from app.models.usuario import Usuario
+from app.models.zona_delivery import ZonaDelivery
+from app.routers import pedido as router_pedido
+
+
+def crear_cliente(db, email):
+    usuario = Usuario(rol_id=4, nombre_completo="Cliente", email=email, password_hash="x")
+    db.add(usuario)
+    db.commit()
+    db.refresh(usuario)
+    return usuario
+
+
+def test_mis_pedidos_paginacion_con_fechas_repetidas(client, db, como_usuario):
+    usuario = como_usuario(crear_cliente(db, "paginado@x.com"))
+    misma_fecha = datetime(2026, 1, 10, 12, 0)
+    fechas = [misma_fecha] * 4 + [misma_fecha - timedelta(days=1)]
+    pedidos = [
+        Pedido(
+            usuario_id=usuario.usuario_id, zona_id=1, token_recoger=f"PAG{i:05d}",
+            total_pedido=Decimal("10.00"), metodo_pago=MetodoPago.EFECTIVO,
+            fecha_pedido=fecha
+        )
+        for i, fecha in enumerate(fechas)
+    ]
+    db.add_all(pedidos)
+    db.commit()
+
+    # Páginas de 2: el borde cae entre pedidos con la misma fecha
+    vistos, params = [], {"limit": 2}
+    while True:
+        respuesta = client.get("/pedidos/mis-pedidos", params=params)
+        assert respuesta.status_code == 200
+        pagina = respuesta.json()
+        vistos += [p["pedido_id"] for p in pagina]
+        if respuesta.headers["X-Has-More"] == "false":
+            break
+        params = {
+            "limit": 2,
+            "before": pagina[-1]["fecha_pedido"],
+            "before_id": pagina[-1]["pedido_id"],
+        }
+
+    ids = [p.pedido_id for p in pedidos]
+    assert vistos == sorted(ids[:4], reverse=True) + [ids[4]]
+
+
+def test_mis_pedidos_header_visible_para_el_navegador(client, db, como_usuario):
+    como_usuario(crear_cliente(db, "cors@x.com"))
+
+    respuesta = client.get(
+        "/pedidos/mis-pedidos", headers={"Origin": "http://frontend.example"})
+
+    assert respuesta.headers["X-Has-More"] == "false"
+    expuestos = respuesta.headers["Access-Control-Expose-Headers"]
+    assert "X-Has-More" in expuestos and "ETag" in expuestos
+
+
+_catalogos = count()
+
+
+@pytest.fixture
+def catalogo(db):
+    """Zona con dos deliveries, un menú publicado y un ingrediente"""
+    n = next(_catalogos)
+    zona = ZonaDelivery(nombre_zona=f"Zona pedidos {n}")
+    plato = Plato(nombre=f"Sopa {n}", tipo=TipoPlato.PRINCIPAL)
+    ingrediente = Ingrediente(nombre=f"Cebolla {n}")
+    db.add_all([zona, plato, ingrediente])
+    db.flush()
+    menu = MenuDia(
+        fecha=date(2026, 4, 1) + timedelta(days=n), plato_principal_id=plato.plato_id,
+        precio_menu=Decimal("15.50"), publicado=True, cantidad_disponible=10
+    )
+    deliveries = [
+        Usuario(rol_id=3, nombre_completo=f"Delivery {i}", email=f"delivery{n}-{i}@x.com",
+                password_hash="x", zona_reparto_id=zona.zona_id)
+        for i in range(2)
+    ]
+    db.add(menu)
+    db.add_all(deliveries)
+    db.commit()
+    return zona, menu, ingrediente, deliveries
+
+
+def pedido_de(zona, menu, ingrediente):
+    return {
+        "zona_id": zona.zona_id,
+        "metodo_pago": "Efectivo",
+        "items": [
+            {"menu_dia_id": menu.menu_dia_id, "cantidad": 2,
+             "exclusiones": [ingrediente.ingrediente_id, ingrediente.ingrediente_id]},
+            {"menu_dia_id": menu.menu_dia_id, "cantidad": 1},
+        ],
+    }
+
+
+def test_crear_pedido_inserta_items_y_descuenta_stock(client, db, como_usuario, catalogo):
+    zona, menu, ingrediente, (cargado, libre) = catalogo
+    # El primer delivery ya tiene un pedido activo: se asigna el otro
+    db.add(Pedido(
+        usuario_id=cargado.usuario_id, zona_id=zona.zona_id, token_recoger="ACTIVO01",
+        total_pedido=Decimal("1.00"), metodo_pago=MetodoPago.EFECTIVO,
+        estado=EstadoDelPedido.EN_REPARTO, delivery_asignado_id=cargado.usuario_id
+    ))
+    db.commit()
+    como_usuario(crear_cliente(db, "crear@x.com"))
+
+    respuesta = client.post("/pedidos/", json=pedido_de(zona, menu, ingrediente))
+
+    assert respuesta.status_code == 201
+    datos = respuesta.json()
+    assert datos["total_pedido"] == "46.50"
+    pedido = db.get(Pedido, datos["pedido_id"])
+    assert pedido.delivery_asignado_id == libre.usuario_id
+
+    items = db.query(PedidoItem).filter(PedidoItem.pedido_id == pedido.pedido_id).order_by(PedidoItem.item_id).all()
+    assert [(i.cantidad, i.precio_unitario) for i in items] == [(2, Decimal("15.50")), (1, Decimal("15.50"))]
+    # Las exclusiones repetidas se guardan una sola vez
+    exclusiones = db.query(ItemExclusion).filter(ItemExclusion.item_id.in_([i.item_id for i in items])).all()
+    assert [(e.item_id, e.ingrediente_id) for e in exclusiones] == [(items[0].item_id, ingrediente.ingrediente_id)]
+
+    db.expire_all()
+    assert db.get(MenuDia, menu.menu_dia_id).cantidad_disponible == 7
+
+
+def test_crear_pedido_sin_stock_no_guarda_nada(client, db, como_usuario, catalogo):
+    zona, menu, ingrediente, _ = catalogo
+    menu.cantidad_disponible = 2
+    db.commit()
+    como_usuario(crear_cliente(db, "sinstock@x.com"))
+
+    respuesta = client.post("/pedidos/", json=pedido_de(zona, menu, ingrediente))
+
+    assert respuesta.status_code == 400
+    db.expire_all()
+    assert db.get(MenuDia, menu.menu_dia_id).cantidad_disponible == 2
+    assert db.query(PedidoItem).filter(PedidoItem.menu_dia_id == menu.menu_dia_id).count() == 0
+
+
+def test_crear_pedido_reintenta_si_el_token_ya_existe(client, db, como_usuario, catalogo, monkeypatch):
+    zona, menu, ingrediente, _ = catalogo
+    usuario = como_usuario(crear_cliente(db, "token@x.com"))
+    db.add(Pedido(
+        usuario_id=usuario.usuario_id, zona_id=zona.zona_id, token_recoger="REPETIDO",
+        total_pedido=Decimal("1.00"), metodo_pago=MetodoPago.EFECTIVO,
+        estado=EstadoDelPedido.ENTREGADO
+    ))
+    db.commit()
+
+    # El filtro en memoria no conoce los pedidos finalizados: da un token
+    # que ya está en la base. El reintento consulta la base de datos
+    generar_real = router_pedido.generar_token_unico
+    llamadas = []
+
+    def generar(db, longitud=8, usar_filtro=True):
+        llamadas.append(usar_filtro)
+        return "REPETIDO" if usar_filtro else generar_real(db, longitud, usar_filtro)
+
+    monkeypatch.setattr(router_pedido, "generar_token_unico", generar)
+
+    respuesta = client.post("/pedidos/", json=pedido_de(zona, menu, ingrediente))
+
+    assert respuesta.status_code == 201
+    assert llamadas == [True, False]
+    token = respuesta.json()["token_recoger"]
+    assert token != "REPETIDO"
+    pedido = db.query(Pedido).filter(Pedido.token_recoger == token).one()
+    # El savepoint solo deshizo el INSERT que falló: los items quedan en el pedido nuevo
+    assert db.query(PedidoItem).filter(PedidoItem.pedido_id == pedido.pedido_id).count() == 2
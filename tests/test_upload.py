@@ -0,0 +1,26 @@
+import pytest
+
+from app.routers.upload import detectar_tipo_imagen
+
+
+@pytest.mark.parametrize("cabecera, mime", [
+    (b"\xff\xd8\xff\xe0" + b"0" * 12, "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n" + b"0" * 8, "image/png"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"BM" + b"0" * 14, "image/bmp"),
+    # Fotos del iPhone (HEIC) y AVIF: marca de la caja ftyp
+    (b"\x00\x00\x00\x18ftypheic\x00\x00\x00\x00", "image/heic"),
+    (b"\x00\x00\x00\x18ftypmif1\x00\x00\x00\x00", "image/heif"),
+    (b"\x00\x00\x00\x1cftypavif\x00\x00\x00\x00", "image/avif"),
+])
+def test_detecta_formatos_de_imagen(cabecera, mime):
+    assert detectar_tipo_imagen(cabecera) == mime
+
+
+@pytest.mark.parametrize("cabecera", [
+    b"<html><body>",
+    # Contenedor ISO de video (MP4), no de imagen
+    b"\x00\x00\x00\x18ftypisom\x00\x00\x00\x00",
+])
+def test_no_detecta_otros_archivos(cabecera):
+    assert detectar_tipo_imagen(cabecera) is None
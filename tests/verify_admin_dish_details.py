@@ -4,15 +4,11 @@ from app.main import app
 from app.utils.dependencies import get_current_user
 from app.models.usuario import Usuario
 
-# Mock admin user
+# Mock admin user (under pytest the admin_mock fixture does the same)
 def mock_get_current_user():
     return Usuario(usuario_id=1, email="admin@solandre.com", rol_id=1, nombre_completo="Admin")
 
-app.dependency_overrides[get_current_user] = mock_get_current_user
-
-client = TestClient(app)
-
-def test_admin_dish_details():
+def test_admin_dish_details(client, admin_mock):
     print("Testing admin dish details endpoint...", flush=True)
 
     try:
@@ -48,4 +44,5 @@ def test_admin_dish_details():
         print(f"❌ Exception: {e}", flush=True)
 
 if __name__ == "__main__":
-    test_admin_dish_details()
+    app.dependency_overrides[get_current_user] = mock_get_current_user
+    test_admin_dish_details(TestClient(app), None)
@@ -5,15 +5,11 @@ from app.utils.dependencies import get_current_user
 from app.models.usuario import Usuario
 import random
 
-# Mock admin user
+# Mock admin user (under pytest the admin_mock fixture does the same)
 def mock_get_current_user():
     return Usuario(usuario_id=1, email="admin@solandre.com", rol_id=1, nombre_completo="Admin")
 
-app.dependency_overrides[get_current_user] = mock_get_current_user
-
-client = TestClient(app)
-
-def test_create_ingredient():
+def test_create_ingredient(client, admin_mock):
     print("Testing create ingredient endpoint...", flush=True)
 
     try:
@@ -42,4 +38,5 @@ def test_create_ingredient():
         print(f"❌ Exception: {e}", flush=True)
 
 if __name__ == "__main__":
-    test_create_ingredient()
+    app.dependency_overrides[get_current_user] = mock_get_current_user
+    test_create_ingredient(TestClient(app), None)
@@ -2,9 +2,7 @@ import sys
 from fastapi.testclient import TestClient
 from app.main import app
 
-client = TestClient(app)
-
-def test_public_endpoints():
+def test_public_endpoints(client):
     print("Testing public endpoints...", flush=True)
 
     try:
@@ -24,4 +22,4 @@ def test_public_endpoints():
         print(f"❌ Exception: {e}", flush=True)
 
 if __name__ == "__main__":
-    test_public_endpoints()
+    test_public_endpoints(TestClient(app))
@@ -1,9 +1,7 @@
 from fastapi.testclient import TestClient
 from app.main import app
 
-client = TestClient(app)
-
-def test_public_endpoints():
+def test_public_endpoints(client):
     print("Testing public endpoints...")
 
     # 1. Test GET /catalogo/zonas
@@ -34,4 +32,4 @@ def test_public_endpoints():
         print(f"❌ Failed: {response.status_code} - {response.text}")
 
 if __name__ == "__main__":
-    test_public_endpoints()
+    test_public_endpoints(TestClient(app))
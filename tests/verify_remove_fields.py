@@ -1,8 +1,10 @@
 import sys
 import os
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from decimal import Decimal
 
 # Add app to path
@@ -15,33 +17,29 @@ from app.models.usuario import Usuario
 from app.models.ingrediente import Ingrediente
 from app.utils.security import create_access_token
 
-# Setup test DB
-if os.path.exists("./test_verify_remove.db"):
-    os.remove("./test_verify_remove.db")
+OUTPUT_FILE = "verify_remove_output.txt"
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test_verify_remove.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Open output file while a run is in progress (see output_log)
+_output = None
 
-def override_get_db():
+@contextmanager
+def output_log(path=OUTPUT_FILE):
+    """Open the output file once per run; every log() line goes through it"""
+    global _output
     try:
-        db = TestingSessionLocal()
-        yield db
+        with open(path, "w") as _output:
+            yield
     finally:
-        db.close()
-
-app.dependency_overrides[get_db] = override_get_db
-
-client = TestClient(app)
+        _output = None
 
 def log(msg):
     print(msg)
-    with open("verify_remove_output.txt", "a") as f:
-        f.write(msg + "\n")
+    if _output is not None:
+        _output.write(msg + "\n")
 
-def verify_fix():
-    # Create tables
-    SQLModel.metadata.create_all(bind=engine)
+def verify_fix(client, TestingSessionLocal):
+    # Tables are created once by whoever owns the engine, and the app's get_db
+    # must already point to the same database
     db = TestingSessionLocal()
 
     # Create admin user
@@ -63,8 +61,13 @@ def verify_fix():
     db.commit()
     db.refresh(ingrediente)
 
-    # Get token
-    token = create_access_token(data={"sub": admin.email})
+    # Get token (same claims as /auth/login)
+    token = create_access_token(data={
+        "sub": str(admin.usuario_id),
+        "usuario_id": admin.usuario_id,
+        "rol_id": admin.rol_id,
+        "email": admin.email
+    })
     headers = {"Authorization": f"Bearer {token}"}
 
     log(f"Testing PUT /admin/ingredientes/{ingrediente.ingrediente_id}")
@@ -86,21 +89,47 @@ def verify_fix():
     
     if response.status_code == 200:
         data = response.json()
-        if data["nombre"] == "Tomate Cherry" and data["stock_actual"] == 15.0:
+        # Decimals are serialized as strings ("15.00")
+        if data["nombre"] == "Tomate Cherry" and Decimal(str(data["stock_actual"])) == 15:
              log("PASS: Ingredient updated successfully without extra fields")
         else:
              log("FAIL: Data mismatch")
     else:
         log("FAIL: Status code not 200")
 
-    # Cleanup
-    SQLModel.metadata.drop_all(bind=engine)
     db.close()
+    return response
+
+def test_remove_fields(client, test_session_local, tmp_path):
+    with output_log(tmp_path / OUTPUT_FILE):
+        response = verify_fix(client, test_session_local)
+
+    assert response.status_code == 200
+    assert response.json()["nombre"] == "Tomate Cherry"
 
 if __name__ == "__main__":
-    if os.path.exists("verify_remove_output.txt"):
-        os.remove("verify_remove_output.txt")
-    try:
-        verify_fix()
-    except Exception as e:
-        log(f"Error: {e}")
+    # Setup test DB: in-memory, StaticPool keeps the single connection
+    # (and the data) shared by every session of the run
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        try:
+            db = TestingSessionLocal()
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with output_log():
+        try:
+            verify_fix(TestClient(app), TestingSessionLocal)
+        except Exception as e:
+            log(f"Error: {e}")
+        finally:
+            app.dependency_overrides.pop(get_db, None)